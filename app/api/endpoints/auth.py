@@ -3,14 +3,15 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.core.security import (
     create_access_token,
     get_current_active_user,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
 )
 from app.core.config import settings
 from app.models import User
@@ -22,11 +23,14 @@ router = APIRouter()
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
 ) -> Any:
-    user = db.query(User).filter(User.username == form_data.username).first()
+    result = await db.execute(
+        select(User).where(User.username == form_data.username)
+    )
+    user = result.scalars().first()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -44,16 +48,15 @@ async def login_for_access_token(
 @router.post("/register", response_model=UserSchema)
 async def register_user(
         user_in: UserCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
 ) -> Any:
     # Check if user already exists
-    existing_user = (
-        db.query(User)
-        .filter(
+    result = await db.execute(
+        select(User).where(
             (User.email == user_in.email) | (User.username == user_in.username)
         )
-        .first()
     )
+    existing_user = result.scalars().first()
 
     if existing_user:
         raise HTTPException(
@@ -62,15 +65,15 @@ async def register_user(
         )
 
     # Create new user
+    hashed_password = await get_password_hash_async(user_in.password)
     user = User(
         email=user_in.email,
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password,
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
 
     return user
 
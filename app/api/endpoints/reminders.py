@@ -1,16 +1,22 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.core.security import get_current_active_user
 from app.models import Reminder, Task, User
+from app.repositories import bump_version, collection_version, import_records, open_text, reminders
+from app.repositories.versions import REMINDERS
 from app.schemas import (
+    ImportResult,
     Reminder as ReminderSchema,
     ReminderCreate,
     ReminderUpdate,
 )
+from app.utils.conditional import collection_etag, etag_matches, not_modified, set_etag
+from app.utils.serialization import list_response
 
 router = APIRouter()
 
@@ -19,13 +25,14 @@ router = APIRouter()
 async def create_reminder(
         task_id: int,
         reminder_in: ReminderCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -34,129 +41,94 @@ async def create_reminder(
         )
 
     reminder = Reminder(
-        **reminder_in.dict(),
+        **reminder_in.model_dump(),
         task_id=task_id,
     )
 
     db.add(reminder)
-    db.commit()
-    db.refresh(reminder)
+    await bump_version(db, REMINDERS, [current_user.id])
+    await db.commit()
 
     return reminder
 
 
+@router.post("/import", response_model=ImportResult)
+async def import_reminders(
+        file: UploadFile,
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        gzip: bool = False,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Import reminders from an uploaded NDJSON or CSV file (`gzip=true` for a
+    .gz file). Every row names one of the user's tasks by task_id. Rows
+    that fail validation are skipped and reported with their line; the
+    rest is loaded in chunks.
+    """
+    stream = open_text(file.file, gzip)
+    return await import_records(db, "reminders", current_user.id, stream, format)
+
+
 @router.get("/tasks/{task_id}", response_model=List[ReminderSchema])
 async def read_reminders(
         task_id: int,
-        db: Session = Depends(get_db),
+        response: Response,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
+    """The ETag follows the user's reminder collection version."""
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task.id).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
 
-    if not task:
+    if result.first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    reminders = db.query(Reminder).filter(Reminder.task_id == task_id).all()
-    return reminders
+    etag = collection_etag(REMINDERS, current_user.id, await collection_version(db, current_user.id, REMINDERS))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    result = await db.execute(
+        select(Reminder).where(Reminder.task_id == task_id)
+    )
+    reminders = result.scalars().all()
+    set_etag(response, etag)
+    return list_response(ReminderSchema, reminders, response)
 
 
 @router.get("/reminders/{reminder_id}", response_model=ReminderSchema)
 async def read_reminder(
         reminder_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    reminder = db.query(Reminder).filter(Reminder.id == reminder_id).first()
-
-    if not reminder:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Reminder not found",
-        )
-
-    # Check if reminder's task belongs to user
-    task = db.query(Task).filter(
-        Task.id == reminder.task_id, Task.owner_id == current_user.id
-    ).first()
-
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions",
-        )
-
-    return reminder
+    return await reminders.get(db, reminder_id, current_user.id)
 
 
 @router.put("/update/{reminder_id}", response_model=ReminderSchema)
 async def update_reminder(
         reminder_id: int,
         reminder_in: ReminderUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    reminder = db.query(Reminder).filter(Reminder.id == reminder_id).first()
-
-    if not reminder:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Reminder not found",
-        )
-
-    # Check if reminder's task belongs to user
-    task = db.query(Task).filter(
-        Task.id == reminder.task_id, Task.owner_id == current_user.id
-    ).first()
-
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions",
-        )
-
-    update_data = reminder_in.dict(exclude_unset=True)
-
-    for field, value in update_data.items():
-        setattr(reminder, field, value)
-
-    db.add(reminder)
-    db.commit()
-    db.refresh(reminder)
-
-    return reminder
+    update_data = reminder_in.model_dump(exclude_unset=True)
+    if "reminder_time" in update_data:
+        # A moved reminder is delivered again, whatever failed before
+        update_data["delivery_error"] = None
+    return await reminders.update(db, reminder_id, current_user.id, update_data)
 
 
 @router.delete("/delete/{reminder_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_reminder(
         reminder_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> None:
-    reminder = db.query(Reminder).filter(Reminder.id == reminder_id).first()
-
-    if not reminder:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Reminder not found",
-        )
-
-    # Check if reminder's task belongs to user
-    task = db.query(Task).filter(
-        Task.id == reminder.task_id, Task.owner_id == current_user.id
-    ).first()
-
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions",
-        )
-
-    db.delete(reminder)
-    db.commit()
-
+    await reminders.delete(db, reminder_id, current_user.id)
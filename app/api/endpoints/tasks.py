@@ -1,39 +1,72 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy import delete, insert, literal, select, tuple_, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_db
+from app.core.config import settings
+from app.core.db import get_async_db
 from app.core.security import get_current_active_user
-from app.models import Task, RecurringTask, User
+from app.models import Task, TaskTombstone, RecurringTask, Reminder, TimeTrack, User
+from app.repositories import (bump_version, collection_version, discard_occurrences, import_records,
+                              materialize_occurrences, open_text, reschedule_occurrences)
+from app.repositories.versions import TASKS
 from app.schemas import (
     Task as TaskSchema,
     TaskCreate,
     TaskUpdate,
+    TaskBulkCreate,
+    TaskBulkUpdate,
+    TaskBulkDelete,
+    TaskBulkResult,
+    TaskSync,
+    ImportResult,
     RecurringTask as RecurringTaskSchema,
     RecurringTaskCreate,
     RecurringTaskUpdate,
 )
+from app.utils.conditional import collection_etag, etag_matches, not_modified, set_etag, task_etag
+from app.utils.export import export_response
 from app.utils.metrics import record_task_created, record_task_completed
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
+from app.utils.serialization import list_response
 
 router = APIRouter()
 
 
+def apply_task_update(task: Task, update_data: dict) -> None:
+    # If task status is being updated to "done", set completed_at
+    if "status" in update_data and update_data["status"] == "done" and task.status != "done":
+        update_data["completed_at"] = datetime.utcnow()
+
+        # Record task completion metrics
+        if task.completed_at is None:  # Only if it's being completed for the first time
+            duration = (datetime.utcnow() - task.created_at).total_seconds()
+            record_task_completed(
+                category=task.category.value,
+                priority=task.priority.value,
+                duration_seconds=duration,
+            )
+
+    for field, value in update_data.items():
+        setattr(task, field, value)
+
+
 @router.post("/", response_model=TaskSchema)
 async def create_task(
         task_in: TaskCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     task = Task(
-        **task_in.dict(),
+        **task_in.model_dump(),
         owner_id=current_user.id,
     )
 
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await bump_version(db, TASKS, [current_user.id])
+    await db.commit()
 
     # Record metrics
     record_task_created(
@@ -46,37 +79,313 @@ async def create_task(
 
 @router.get("/", response_model=List[TaskSchema])
 async def read_tasks(
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: str = Query("due_date", pattern="^(due_date|updated_at)$"),
         status: Optional[str] = None,
         priority: Optional[str] = None,
         category: Optional[str] = None,
-        db: Session = Depends(get_db),
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    query = db.query(Task).filter(Task.owner_id == current_user.id)
+    """
+    List tasks ordered by (order_by, id).
+
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the
+    next page with a keyset seek instead of an OFFSET scan; `skip` is
+    ignored in that mode.
+
+    The ETag follows the user's task collection version: send it back in
+    If-None-Match to get a 304 without the list being read.
+    """
+    # Read the version before the rows: a write committing in between then
+    # leaves a newer list under an older ETag, never the other way round
+    etag = collection_etag(TASKS, current_user.id, await collection_version(db, current_user.id, TASKS))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    sort_column = getattr(Task, order_by)
+    query = select(Task).where(Task.owner_id == current_user.id)
 
     # Apply filters if provided
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
     if priority:
-        query = query.filter(Task.priority == priority)
+        query = query.where(Task.priority == priority)
     if category:
-        query = query.filter(Task.category == category)
+        query = query.where(Task.category == category)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, order_by)
+        query = query.where(keyset_after(sort_column, Task.id, value, last_id))
+    else:
+        query = query.offset(skip)
+
+    query = query.order_by(sort_column.asc().nulls_last(), Task.id.asc())
+
+    result = await db.execute(query.limit(limit))
+    tasks = result.scalars().all()
+
+    if tasks and len(tasks) == limit:
+        last = tasks[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            order_by, getattr(last, order_by), last.id
+        )
+    set_etag(response, etag)
 
-    tasks = query.offset(skip).limit(limit).all()
-    return tasks
+    return list_response(TaskSchema, tasks, response)
+
+
+@router.get("/sync", response_model=TaskSync)
+async def sync_tasks(
+        since: Optional[str] = None,
+        limit: int = Query(500, ge=1, le=settings.SYNC_MAX_ITEMS),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Tasks created, updated or deleted since the `since` watermark; without
+    it, every task (initial sync).
+
+    Task updates (updated_at) and tombstones (deleted_at) are walked
+    together in (time, id) order, each side on its owner-scoped index. Pass
+    the returned watermark back as `since` until has_more is false. Apply
+    `deleted` before `tasks`.
+    """
+    changes = union_all(
+        select(
+            Task.updated_at.label("changed_at"),
+            Task.id.label("task_id"),
+            literal(False).label("deleted"),
+        ).where(Task.owner_id == current_user.id),
+        select(
+            TaskTombstone.deleted_at,
+            TaskTombstone.task_id,
+            literal(True),
+        ).where(TaskTombstone.owner_id == current_user.id),
+    ).subquery()
+
+    query = select(changes)
+    position = None
+    if since:
+        position = decode_cursor(since, "sync")
+        if position[0] is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        query = query.where(tuple_(changes.c.changed_at, changes.c.task_id) > tuple_(*position))
+
+    result = await db.execute(
+        query.order_by(changes.c.changed_at, changes.c.task_id).limit(limit + 1)
+    )
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    updated_ids = [row.task_id for row in rows if not row.deleted]
+    tasks = []
+    if updated_ids:
+        result = await db.execute(
+            select(Task).where(Task.id.in_(updated_ids)).order_by(Task.updated_at, Task.id)
+        )
+        tasks = result.scalars().all()
+
+    # Don't move the watermark into the settle window: a transaction still
+    # in flight may yet commit a change timestamped before it. What lies
+    # beyond is sent again on the next sync instead.
+    settled = (datetime.utcnow() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS), 0)
+    last = (rows[-1].changed_at, rows[-1].task_id) if rows else settled
+    watermark = min(last, settled)
+    if position is not None:
+        watermark = max(watermark, position)
+    if watermark < last:
+        has_more = False
+
+    return {
+        "tasks": tasks,
+        "deleted": [row.task_id for row in rows if row.deleted],
+        "watermark": encode_cursor("sync", *watermark),
+        "has_more": has_more,
+    }
+
+
+@router.get("/export")
+async def export_tasks(
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        gzip: bool = False,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    All of the user's tasks as an NDJSON or CSV download, streamed from a
+    server-side cursor; `gzip=true` sends a .gz file.
+    """
+    query = (
+        select(
+            Task.id,
+            Task.title,
+            Task.description,
+            Task.status,
+            Task.priority,
+            Task.category,
+            Task.due_date,
+            Task.created_at,
+            Task.updated_at,
+            Task.completed_at,
+        )
+        .where(Task.owner_id == current_user.id)
+        .order_by(Task.id)
+    )
+    return export_response(db, query, "tasks", format, gzip)
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_tasks(
+        file: UploadFile,
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        gzip: bool = False,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Import tasks from an uploaded NDJSON or CSV file (`gzip=true` for a
+    .gz file). Rows that fail validation are skipped and reported
+    with their line; the rest is loaded in chunks.
+    """
+    stream = open_text(file.file, gzip)
+    return await import_records(db, "tasks", current_user.id, stream, format)
+
+
+# Bulk Tasks Endpoints
+@router.post("/bulk", response_model=List[TaskBulkResult])
+async def bulk_create_tasks(
+        tasks_in: TaskBulkCreate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    rows = [
+        {**task_in.model_dump(), "owner_id": current_user.id}
+        for task_in in tasks_in.items
+    ]
+
+    # One multi-row INSERT ... RETURNING, rows come back in input order
+    result = await db.scalars(
+        insert(Task).returning(Task, sort_by_parameter_order=True), rows
+    )
+    tasks = result.all()
+    await bump_version(db, TASKS, [current_user.id])
+    await db.commit()
+
+    for task in tasks:
+        record_task_created(
+            category=task.category.value,
+            priority=task.priority.value,
+        )
+
+    return [
+        {"id": task.id, "status": "created", "task": task}
+        for task in tasks
+    ]
+
+
+@router.patch("/bulk", response_model=List[TaskBulkResult])
+async def bulk_update_tasks(
+        tasks_in: TaskBulkUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    ids = {item.id for item in tasks_in.items}
+    result = await db.execute(
+        select(Task).where(Task.id.in_(ids), Task.owner_id == current_user.id)
+    )
+    tasks = {task.id: task for task in result.scalars().all()}
+
+    results = []
+    for item in tasks_in.items:
+        task = tasks.get(item.id)
+        if not task:
+            results.append({"id": item.id, "status": "not_found"})
+            continue
+
+        apply_task_update(task, item.model_dump(exclude_unset=True, exclude={"id"}))
+        results.append({"id": item.id, "status": "updated", "task": task})
+
+    if tasks:
+        await bump_version(db, TASKS, [current_user.id])
+
+    # The unit of work flushes all changed rows as executemany UPDATEs
+    await db.commit()
+
+    return results
+
+
+@router.post("/bulk/delete", response_model=List[TaskBulkResult])
+async def bulk_delete_tasks(
+        tasks_in: TaskBulkDelete,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    owned_ids = select(Task.id).where(
+        Task.id.in_(tasks_in.ids), Task.owner_id == current_user.id
+    )
+
+    # Detach children the same way a single ORM delete does
+    for model in (TimeTrack, Reminder, RecurringTask):
+        await db.execute(
+            update(model)
+            .where(model.task_id.in_(owned_ids))
+            .values(task_id=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    result = await db.execute(
+        delete(Task)
+        .where(Task.id.in_(tasks_in.ids), Task.owner_id == current_user.id)
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted_ids = set(result.scalars().all())
+    if deleted_ids:
+        await db.execute(insert(TaskTombstone), [
+            {"task_id": task_id, "owner_id": current_user.id} for task_id in deleted_ids
+        ])
+        await bump_version(db, TASKS, [current_user.id])
+    await db.commit()
+
+    return [
+        {"id": task_id, "status": "deleted" if task_id in deleted_ids else "not_found"}
+        for task_id in tasks_in.ids
+    ]
 
 
 @router.get("/{task_id}", response_model=TaskSchema)
 async def read_task(
         task_id: int,
-        db: Session = Depends(get_db),
+        response: Response,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    """The ETag is derived from id and updated_at; a match is answered with 304."""
+    if if_none_match:
+        # Revalidation: compare against updated_at before loading the row
+        result = await db.execute(
+            select(Task.updated_at).where(Task.id == task_id, Task.owner_id == current_user.id)
+        )
+        row = result.first()
+        if row is not None:
+            etag = task_etag(task_id, row.updated_at)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -84,6 +393,7 @@ async def read_task(
             detail="Task not found",
         )
 
+    set_etag(response, task_etag(task.id, task.updated_at))
     return task
 
 
@@ -91,12 +401,13 @@ async def read_task(
 async def update_task(
         task_id: int,
         task_in: TaskUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -104,27 +415,11 @@ async def update_task(
             detail="Task not found",
         )
 
-    update_data = task_in.dict(exclude_unset=True)
-
-    # If task status is being updated to "done", set completed_at
-    if "status" in update_data and update_data["status"] == "done" and task.status != "done":
-        update_data["completed_at"] = datetime.utcnow()
-
-        # Record task completion metrics
-        if task.completed_at is None:  # Only if it's being completed for the first time
-            duration = (datetime.utcnow() - task.created_at).total_seconds()
-            record_task_completed(
-                category=task.category.value,
-                priority=task.priority.value,
-                duration_seconds=duration,
-            )
-
-    for field, value in update_data.items():
-        setattr(task, field, value)
+    apply_task_update(task, task_in.model_dump(exclude_unset=True))
 
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await bump_version(db, TASKS, [current_user.id])
+    await db.commit()
 
     return task
 
@@ -132,12 +427,13 @@ async def update_task(
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
         task_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> None:
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -145,8 +441,10 @@ async def delete_task(
             detail="Task not found",
         )
 
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    db.add(TaskTombstone(task_id=task.id, owner_id=current_user.id))
+    await bump_version(db, TASKS, [current_user.id])
+    await db.commit()
 
 
 # Recurring Tasks Endpoints
@@ -154,13 +452,14 @@ async def delete_task(
 async def create_recurring_task(
         task_id: int,
         recurring_task_in: RecurringTaskCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -169,9 +468,10 @@ async def create_recurring_task(
         )
 
     # Check if recurring task already exists
-    existing_recurring = db.query(RecurringTask).filter(
-        RecurringTask.task_id == task_id
-    ).first()
+    result = await db.execute(
+        select(RecurringTask).where(RecurringTask.task_id == task_id)
+    )
+    existing_recurring = result.scalars().first()
 
     if existing_recurring:
         raise HTTPException(
@@ -180,13 +480,15 @@ async def create_recurring_task(
         )
 
     recurring_task = RecurringTask(
-        **recurring_task_in.dict(),
+        **recurring_task_in.model_dump(),
         task_id=task_id,
     )
 
     db.add(recurring_task)
-    db.commit()
-    db.refresh(recurring_task)
+    await db.commit()
+
+    # Occurrences up to the horizon right away; the bot process keeps them going
+    await materialize_occurrences(db, series_ids=[recurring_task.id])
 
     return recurring_task
 
@@ -194,13 +496,14 @@ async def create_recurring_task(
 @router.get("/{task_id}/recurring", response_model=RecurringTaskSchema)
 async def read_recurring_task(
         task_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -208,9 +511,10 @@ async def read_recurring_task(
             detail="Task not found",
         )
 
-    recurring_task = db.query(RecurringTask).filter(
-        RecurringTask.task_id == task_id
-    ).first()
+    result = await db.execute(
+        select(RecurringTask).where(RecurringTask.task_id == task_id)
+    )
+    recurring_task = result.scalars().first()
 
     if not recurring_task:
         raise HTTPException(
@@ -225,13 +529,14 @@ async def read_recurring_task(
 async def update_recurring_task(
         task_id: int,
         recurring_task_in: RecurringTaskUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -239,9 +544,10 @@ async def update_recurring_task(
             detail="Task not found",
         )
 
-    recurring_task = db.query(RecurringTask).filter(
-        RecurringTask.task_id == task_id
-    ).first()
+    result = await db.execute(
+        select(RecurringTask).where(RecurringTask.task_id == task_id)
+    )
+    recurring_task = result.scalars().first()
 
     if not recurring_task:
         raise HTTPException(
@@ -249,14 +555,18 @@ async def update_recurring_task(
             detail="Recurring task not found",
         )
 
-    update_data = recurring_task_in.dict(exclude_unset=True)
+    update_data = recurring_task_in.model_dump(exclude_unset=True)
 
     for field, value in update_data.items():
         setattr(recurring_task, field, value)
 
+    if update_data:
+        await reschedule_occurrences(db, recurring_task, current_user.id)
+
     db.add(recurring_task)
-    db.commit()
-    db.refresh(recurring_task)
+    await db.commit()
+
+    await materialize_occurrences(db, series_ids=[recurring_task.id])
 
     return recurring_task
 
@@ -264,13 +574,14 @@ async def update_recurring_task(
 @router.delete("/{task_id}/recurring", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_recurring_task(
         task_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> None:
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -278,9 +589,10 @@ async def delete_recurring_task(
             detail="Task not found",
         )
 
-    recurring_task = db.query(RecurringTask).filter(
-        RecurringTask.task_id == task_id
-    ).first()
+    result = await db.execute(
+        select(RecurringTask).where(RecurringTask.task_id == task_id)
+    )
+    recurring_task = result.scalars().first()
 
     if not recurring_task:
         raise HTTPException(
@@ -288,5 +600,7 @@ async def delete_recurring_task(
             detail="Recurring task not found",
         )
 
-    db.delete(recurring_task)
-    db.commit()
+    # Occurrences already written stay, except those still ahead and to do
+    await discard_occurrences(db, recurring_task.id, current_user.id, datetime.utcnow())
+    await db.delete(recurring_task)
+    await db.commit()
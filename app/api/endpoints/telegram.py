@@ -1,9 +1,10 @@
 from typing import Any, Dict
 
 from fastapi import APIRouter, Body, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.core.security import get_current_active_user
 from app.models import TelegramUser, User
 from app.schemas import (
@@ -18,15 +19,14 @@ router = APIRouter()
 @router.post("/connect", response_model=TelegramUserSchema)
 async def connect_telegram(
         telegram_data: TelegramUserCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     # Check if user already has a connected Telegram account
-    existing_connection = (
-        db.query(TelegramUser)
-        .filter(TelegramUser.user_id == current_user.id)
-        .first()
+    result = await db.execute(
+        select(TelegramUser).where(TelegramUser.user_id == current_user.id)
     )
+    existing_connection = result.scalars().first()
 
     if existing_connection:
         raise HTTPException(
@@ -36,27 +36,25 @@ async def connect_telegram(
 
     # Create new Telegram connection
     telegram_user = TelegramUser(
-        **telegram_data.dict(),
+        **telegram_data.model_dump(),
         user_id=current_user.id,
     )
 
     db.add(telegram_user)
-    db.commit()
-    db.refresh(telegram_user)
+    await db.commit()
 
     return telegram_user
 
 
 @router.get("/connection", response_model=TelegramUserSchema)
 async def get_telegram_connection(
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    telegram_user = (
-        db.query(TelegramUser)
-        .filter(TelegramUser.user_id == current_user.id)
-        .first()
+    result = await db.execute(
+        select(TelegramUser).where(TelegramUser.user_id == current_user.id)
     )
+    telegram_user = result.scalars().first()
 
     if not telegram_user:
         raise HTTPException(
@@ -70,14 +68,13 @@ async def get_telegram_connection(
 @router.put("/connection", response_model=TelegramUserSchema)
 async def update_telegram_connection(
         telegram_data: TelegramUserUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    telegram_user = (
-        db.query(TelegramUser)
-        .filter(TelegramUser.user_id == current_user.id)
-        .first()
+    result = await db.execute(
+        select(TelegramUser).where(TelegramUser.user_id == current_user.id)
     )
+    telegram_user = result.scalars().first()
 
     if not telegram_user:
         raise HTTPException(
@@ -85,28 +82,26 @@ async def update_telegram_connection(
             detail="No Telegram connection found",
         )
 
-    update_data = telegram_data.dict(exclude_unset=True)
+    update_data = telegram_data.model_dump(exclude_unset=True)
 
     for field, value in update_data.items():
         setattr(telegram_user, field, value)
 
     db.add(telegram_user)
-    db.commit()
-    db.refresh(telegram_user)
+    await db.commit()
 
     return telegram_user
 
 
 @router.delete("/connection", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_telegram_connection(
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> None:
-    telegram_user = (
-        db.query(TelegramUser)
-        .filter(TelegramUser.user_id == current_user.id)
-        .first()
+    result = await db.execute(
+        select(TelegramUser).where(TelegramUser.user_id == current_user.id)
     )
+    telegram_user = result.scalars().first()
 
     if not telegram_user:
         raise HTTPException(
@@ -114,14 +109,14 @@ async def delete_telegram_connection(
             detail="No Telegram connection found",
         )
 
-    db.delete(telegram_user)
-    db.commit()
+    await db.delete(telegram_user)
+    await db.commit()
 
 
 @router.post("/webhook")
 async def telegram_webhook(
         update: Dict[str, Any] = Body(...),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
 ) -> Dict[str, str]:
     """
     Endpoint for Telegram webhook.
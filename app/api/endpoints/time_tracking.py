@@ -1,17 +1,35 @@
-from datetime import datetime
-from typing import Any, List
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.core.security import get_current_active_user
+from app.core.sql import seconds_between
 from app.models import Task, TimeTrack, User
+from app.repositories import (
+    bump_version,
+    collection_version,
+    import_records,
+    open_text,
+    time_report,
+    time_tracks,
+    update_rollup,
+)
+from app.repositories.versions import TIME_TRACKS
 from app.schemas import (
+    ImportResult,
+    TimeReport,
     TimeTrack as TimeTrackSchema,
     TimeTrackCreate,
     TimeTrackUpdate,
 )
+from app.utils.conditional import collection_etag, etag_matches, not_modified, set_etag
+from app.utils.export import export_response
+from app.utils.serialization import list_response
 
 router = APIRouter()
 
@@ -20,13 +38,14 @@ router = APIRouter()
 async def create_time_track(
         task_id: int,
         time_track_in: TimeTrackCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -35,7 +54,7 @@ async def create_time_track(
         )
 
     # Calculate duration if end_time is provided
-    time_track_data = time_track_in.dict()
+    time_track_data = time_track_in.model_dump()
     if time_track_data.get("end_time") and time_track_data.get("start_time"):
         start_time = time_track_data["start_time"]
         end_time = time_track_data["end_time"]
@@ -48,8 +67,9 @@ async def create_time_track(
     )
 
     db.add(time_track)
-    db.commit()
-    db.refresh(time_track)
+    await update_rollup(db, current_user.id, task_id, after=time_track)
+    await bump_version(db, TIME_TRACKS, [current_user.id])
+    await db.commit()
 
     return time_track
 
@@ -57,136 +77,148 @@ async def create_time_track(
 @router.get("/tasks/{task_id}/time", response_model=List[TimeTrackSchema])
 async def read_time_tracks(
         task_id: int,
-        db: Session = Depends(get_db),
+        response: Response,
+        if_none_match: Optional[str] = Header(None),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
+    """The ETag follows the user's time track collection version."""
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task.id).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
 
-    if not task:
+    if result.first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    time_tracks = db.query(TimeTrack).filter(TimeTrack.task_id == task_id).all()
-    return time_tracks
+    etag = collection_etag(TIME_TRACKS, current_user.id, await collection_version(db, current_user.id, TIME_TRACKS))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
 
+    result = await db.execute(
+        select(TimeTrack).where(TimeTrack.task_id == task_id)
+    )
+    time_tracks = result.scalars().all()
+    set_etag(response, etag)
+    return list_response(TimeTrackSchema, time_tracks, response)
 
-@router.get("/time/{time_track_id}", response_model=TimeTrackSchema)
-async def read_time_track(
-        time_track_id: int,
-        db: Session = Depends(get_db),
+
+@router.get("/reports", response_model=TimeReport)
+async def read_time_report(
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        bins: int = Query(20, ge=1, le=100),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    time_track = db.query(TimeTrack).filter(TimeTrack.id == time_track_id).first()
+    # Defaults to the last 30 days, today included
+    if date_to is None:
+        date_to = datetime.utcnow().date()
+    if date_from is None:
+        date_from = date_to - timedelta(days=29)
 
-    if not time_track:
+    if date_from > date_to:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Time track not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must not be after date_to",
         )
 
-    # Check if time track's task belongs to user
-    task = db.query(Task).filter(
-        Task.id == time_track.task_id, Task.owner_id == current_user.id
-    ).first()
+    return await time_report(db, current_user.id, date_from, date_to, bins)
 
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions",
+
+@router.get("/export")
+async def export_time_tracks(
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        gzip: bool = False,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    All of the user's time tracks as an NDJSON or CSV download, streamed
+    from a server-side cursor; `gzip=true` sends a .gz file.
+    """
+    query = (
+        select(
+            TimeTrack.id,
+            TimeTrack.task_id,
+            TimeTrack.start_time,
+            TimeTrack.end_time,
+            TimeTrack.duration,
         )
+        .join(Task, Task.id == TimeTrack.task_id)
+        .where(Task.owner_id == current_user.id)
+        .order_by(TimeTrack.id)
+    )
+    return export_response(db, query, "time-tracks", format, gzip)
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_time_tracks(
+        file: UploadFile,
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        gzip: bool = False,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Import time tracks from an uploaded NDJSON or CSV file (`gzip=true` for a
+    .gz file). Every row names one of the user's tasks by task_id. Rows
+    that fail validation are skipped and reported with their line; the
+    rest is loaded in chunks.
+    """
+    stream = open_text(file.file, gzip)
+    return await import_records(db, "time_tracks", current_user.id, stream, format)
 
-    return time_track
+
+@router.get("/time/{time_track_id}", response_model=TimeTrackSchema)
+async def read_time_track(
+        time_track_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_active_user),
+) -> Any:
+    return await time_tracks.get(db, time_track_id, current_user.id)
 
 
 @router.put("/time/{time_track_id}", response_model=TimeTrackSchema)
 async def update_time_track(
         time_track_id: int,
         time_track_in: TimeTrackUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    time_track = db.query(TimeTrack).filter(TimeTrack.id == time_track_id).first()
+    update_data = time_track_in.model_dump(exclude_unset=True)
 
-    if not time_track:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Time track not found",
-        )
-
-    # Check if time track's task belongs to user
-    task = db.query(Task).filter(
-        Task.id == time_track.task_id, Task.owner_id == current_user.id
-    ).first()
-
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions",
-        )
+    # If end_time is being updated, recalculate duration from the stored
+    # start_time (SET expressions see the row as it was before the update)
+    if update_data.get("end_time"):
+        update_data["duration"] = seconds_between(TimeTrack.start_time, update_data["end_time"])
 
-    update_data = time_track_in.dict(exclude_unset=True)
-
-    # If end_time is being updated, recalculate duration
-    if "end_time" in update_data:
-        end_time = update_data["end_time"]
-        if end_time:
-            duration = int((end_time - time_track.start_time).total_seconds())
-            update_data["duration"] = duration
-
-    for field, value in update_data.items():
-        setattr(time_track, field, value)
-
-    db.add(time_track)
-    db.commit()
-    db.refresh(time_track)
-
-    return time_track
+    return await time_tracks.update(db, time_track_id, current_user.id, update_data)
 
 
 @router.delete("/time/{time_track_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_time_track(
         time_track_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> None:
-    time_track = db.query(TimeTrack).filter(TimeTrack.id == time_track_id).first()
-
-    if not time_track:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Time track not found",
-        )
-
-    # Check if time track's task belongs to user
-    task = db.query(Task).filter(
-        Task.id == time_track.task_id, Task.owner_id == current_user.id
-    ).first()
-
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions",
-        )
-
-    db.delete(time_track)
-    db.commit()
+    await time_tracks.delete(db, time_track_id, current_user.id)
 
 
 @router.post("/tasks/{task_id}/time/start", response_model=TimeTrackSchema)
 async def start_time_tracking(
         task_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -195,11 +227,12 @@ async def start_time_tracking(
         )
 
     # Check if there's already an active time tracking
-    active_tracking = (
-        db.query(TimeTrack)
-        .filter(TimeTrack.task_id == task_id, TimeTrack.end_time == None)
-        .first()
+    result = await db.execute(
+        select(TimeTrack).where(
+            TimeTrack.task_id == task_id, TimeTrack.end_time == None
+        )
     )
+    active_tracking = result.scalars().first()
 
     if active_tracking:
         raise HTTPException(
@@ -213,8 +246,8 @@ async def start_time_tracking(
     )
 
     db.add(time_track)
-    db.commit()
-    db.refresh(time_track)
+    await bump_version(db, TIME_TRACKS, [current_user.id])
+    await db.commit()
 
     return time_track
 
@@ -222,13 +255,14 @@ async def start_time_tracking(
 @router.post("/tasks/{task_id}/time/stop", response_model=TimeTrackSchema)
 async def stop_time_tracking(
         task_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: User = Depends(get_current_active_user),
 ) -> Any:
     # Check if task exists and belongs to user
-    task = db.query(Task).filter(
-        Task.id == task_id, Task.owner_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Task).where(Task.id == task_id, Task.owner_id == current_user.id)
+    )
+    task = result.scalars().first()
 
     if not task:
         raise HTTPException(
@@ -237,11 +271,12 @@ async def stop_time_tracking(
         )
 
     # Find active time tracking
-    active_tracking = (
-        db.query(TimeTrack)
-        .filter(TimeTrack.task_id == task_id, TimeTrack.end_time == None)
-        .first()
+    result = await db.execute(
+        select(TimeTrack).where(
+            TimeTrack.task_id == task_id, TimeTrack.end_time == None
+        )
     )
+    active_tracking = result.scalars().first()
 
     if not active_tracking:
         raise HTTPException(
@@ -249,6 +284,9 @@ async def stop_time_tracking(
             detail="No active time tracking found for this task",
         )
 
+    # A track created with a duration is already in the rollup
+    before = SimpleNamespace(start_time=active_tracking.start_time, duration=active_tracking.duration)
+
     # Set end time and calculate duration
     end_time = datetime.utcnow()
     duration = int((end_time - active_tracking.start_time).total_seconds())
@@ -257,7 +295,8 @@ async def stop_time_tracking(
     active_tracking.duration = duration
 
     db.add(active_tracking)
-    db.commit()
-    db.refresh(active_tracking)
+    await update_rollup(db, current_user.id, task_id, before=before, after=active_tracking)
+    await bump_version(db, TIME_TRACKS, [current_user.id])
+    await db.commit()
 
     return active_tracking
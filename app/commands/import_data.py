@@ -0,0 +1,52 @@
+"""
+Bulk import tasks, time tracks or reminders for a user from CSV or NDJSON.
+
+    python -m app.commands.import_data tasks tasks.csv --user-id ID
+    python -m app.commands.import_data time_tracks time-tracks.ndjson.gz --user-id ID
+
+The format and gzip compression follow the file name (.csv, .ndjson,
+optionally .gz) unless given with --format and --gzip. The same files as
+GET /api/tasks/export and friends produce are accepted. Rows are loaded in
+chunks (COPY on Postgres); rows that fail validation are skipped and
+listed by line, and the command exits non-zero if there were any.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.core.db import AsyncSessionLocal, async_engine
+from app.repositories import IMPORT_KINDS, import_records, open_text
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("kind", choices=sorted(IMPORT_KINDS))
+    parser.add_argument("path")
+    parser.add_argument("--user-id", type=int, required=True, help="owner of the imported rows")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    parser.add_argument("--gzip", action="store_true", default=None)
+    args = parser.parse_args()
+
+    name = args.path[:-3] if args.path.endswith(".gz") else args.path
+    compressed = args.gzip if args.gzip is not None else args.path.endswith(".gz")
+    format = args.format or ("csv" if name.endswith(".csv") else "ndjson")
+
+    try:
+        with open(args.path, "rb") as binary:
+            async with AsyncSessionLocal() as db:
+                result = await import_records(
+                    db, args.kind, args.user_id, open_text(binary, compressed), format,
+                )
+    finally:
+        await async_engine.dispose()
+
+    for error in result["errors"]:
+        print(f"line {error['line']}: {error['error']}")
+    if result["failed"] > len(result["errors"]):
+        print(f"... and {result['failed'] - len(result['errors'])} more")
+    print(f"Imported {result['imported']} {args.kind}, {result['failed']} rows failed")
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,33 @@
+"""
+Materialize recurring task occurrences up to the horizon, once.
+
+    python -m app.commands.materialize [--horizon-days DAYS]
+
+The bot process does this every RECURRENCE_INTERVAL_SECONDS; run it by hand
+after a bulk load of series, or to look further ahead than
+RECURRENCE_HORIZON_DAYS. Safe to run at any time, also next to the bot:
+no occurrence is ever written twice.
+"""
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, async_engine
+from app.repositories import materialize_occurrences
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--horizon-days", type=int, default=settings.RECURRENCE_HORIZON_DAYS)
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            written = await materialize_occurrences(db, horizon_days=args.horizon_days)
+        print(f"Materialized {written} occurrences")
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""
+Check or rebuild the time_track_daily rollup (see app.models.TimeTrackDaily).
+
+    python -m app.commands.rollup verify [--user-id ID]
+    python -m app.commands.rollup rebuild [--user-id ID]
+
+`verify` recomputes the rollup from the raw time tracks and lists every
+(user, task, day) whose stored totals differ; it exits non-zero if any do.
+`rebuild` replaces the stored rows with the recomputed ones.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.core.db import AsyncSessionLocal, async_engine
+from app.repositories import rebuild_rollup, verify_rollup
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--user-id", type=int, default=None, help="only this user's rows")
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            if args.command == "rebuild":
+                rows = await rebuild_rollup(db, args.user_id)
+                print(f"Rebuilt time_track_daily: {rows} rows")
+                return 0
+
+            mismatches = await verify_rollup(db, args.user_id)
+            for (user_id, task_id, day), expected, stored in mismatches:
+                print(f"user={user_id} task={task_id} day={day} expected={expected} stored={stored}")
+            print(f"{len(mismatches)} mismatched rows")
+            return 1 if mismatches else 0
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,5 +1,5 @@
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Literal, Optional
 
 from pydantic import PostgresDsn, field_validator, model_validator
 from pydantic_settings import BaseSettings
@@ -9,6 +9,11 @@ class Settings(BaseSettings):
     # API Settings
     API_PORT: int = 8000
     API_HOST: str = "0.0.0.0"
+    # Worker processes when served by gunicorn (app/utils/gunicorn_config.py)
+    API_WORKERS: int = 4
+
+    # Which process this is: each one sizes its own connection pool
+    PROCESS_TYPE: Literal["api", "bot"] = "api"
 
     # Database Settings
     POSTGRES_USER: str
@@ -18,15 +23,97 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int
     DATABASE_URI: Optional[PostgresDsn] = None
 
+    # Connection pool per process type. The API serves many concurrent
+    # requests; the bot only needs a handful of connections
+    API_DB_POOL_SIZE: int = 20
+    API_DB_MAX_OVERFLOW: int = 40
+    BOT_DB_POOL_SIZE: int = 5
+    BOT_DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    # "always" pings every connection on checkout, "idle" only connections
+    # that sat in the pool longer than DB_POOL_PRE_PING_IDLE_SECONDS
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "always"
+    DB_POOL_PRE_PING_IDLE_SECONDS: int = 30
+
     # JWT Settings
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 1 week
 
+    # Password hashing: bcrypt cost factor and the bounded executor it runs on.
+    # "process" works with every passlib backend; "thread" is enough when the
+    # backend releases the GIL (the `bcrypt` package does, os_crypt does not).
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: Literal["process", "thread"] = "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Auth cache (decoded tokens and active users), per process
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 10000
+
+    # SQL instrumentation: statements slower than this are logged with their
+    # parameters (0 disables the slow-query log)
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_LOG_PARAMETERS: bool = True
+
+    # Bulk endpoints
+    BULK_MAX_ITEMS: int = 500
+
+    # Delta sync. Changes from the last SYNC_SETTLE_SECONDS are sent again on
+    # the next sync, so a slow transaction that commits with an older
+    # updated_at than changes already synced is never skipped
+    SYNC_MAX_ITEMS: int = 1000
+    SYNC_SETTLE_SECONDS: int = 5
+
+    # Exports: rows fetched from the server-side cursor and encoded per
+    # chunk, and the zlib level of gzipped exports
+    EXPORT_CHUNK_SIZE: int = 1000
+    EXPORT_GZIP_LEVEL: int = 6
+
+    # Bulk import: rows validated and loaded (COPY on Postgres) per chunk,
+    # each chunk in its own transaction; row errors listed in the result
+    IMPORT_CHUNK_SIZE: int = 5000
+    IMPORT_MAX_ERRORS: int = 1000
+
+    # Recurring tasks: occurrences are materialized as tasks up to midnight
+    # (UTC) RECURRENCE_HORIZON_DAYS ahead, RECURRENCE_BATCH_SIZE series per
+    # transaction, every RECURRENCE_INTERVAL_SECONDS by the bot process
+    RECURRENCE_HORIZON_DAYS: int = 30
+    RECURRENCE_BATCH_SIZE: int = 1000
+    RECURRENCE_INTERVAL_SECONDS: int = 300
+
+    # Response compression (gzip, br, zstd; negotiated per request). Bodies
+    # smaller than COMPRESSION_MIN_SIZE bytes are sent uncompressed.
+    # Levels: gzip 1-9, brotli 0-11, zstd 1-22
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
     # Telegram Settings
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_WEBHOOK_URL: Optional[str] = None
 
+    # Reminder scheduler: how far ahead reminders are loaded into memory (and
+    # how far back re-scans look) and how often the loaded window is
+    # re-scanned as a LISTEN/NOTIFY fallback. A failed delivery is retried
+    # after REMINDER_RETRY_SECONDS, doubling with every further failure, for
+    # up to REMINDER_MAX_ATTEMPTS attempts
+    REMINDER_LOOKAHEAD_MINUTES: int = 60
+    REMINDER_POLL_INTERVAL_SECONDS: int = 30
+    REMINDER_RETRY_SECONDS: int = 30
+    REMINDER_MAX_ATTEMPTS: int = 5
+
+    # Reminder delivery. Telegram allows about 30 messages per second per bot
+    # and about one message per second per chat
+    REMINDER_DELIVERY_WORKERS: int = 32
+    REMINDER_DELIVERY_BATCH_SIZE: int = 500
+    TELEGRAM_GLOBAL_RATE_PER_SECOND: float = 30
+    TELEGRAM_CHAT_RATE_PER_SECOND: float = 1
+    TELEGRAM_MAX_RETRIES: int = 3
+
     TRAEFIK_DASHBOARD_PORT: Optional[int] = 8080
     PROMETHEUS_PORT: Optional[int] = 9090
     GRAFANA_PORT: Optional[int] = 3000
@@ -1,27 +1,185 @@
-from sqlalchemy import create_engine, QueuePool
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.utils.metrics import (
+    record_db_pool_pre_ping_failure,
+    record_db_pool_timeout,
+    record_db_pool_wait,
+    record_query,
+    set_db_pool_usage,
+)
+
+logger = logging.getLogger(__name__)
 
 db_uri = str(settings.DATABASE_URI)
+async_db_uri = db_uri.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+class _PoolTelemetry:
+    """
+    Mixin for the pool classes: times every checkout and counts checkouts
+    that time out waiting for a free connection.
+    """
+
+    telemetry_name = ""
+
+    def connect(self):
+        start_time = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            record_db_pool_timeout(self.telemetry_name)
+            raise
+        finally:
+            record_db_pool_wait(self.telemetry_name, time.perf_counter() - start_time)
+
+
+class InstrumentedQueuePool(_PoolTelemetry, QueuePool):
+    telemetry_name = "sync"
+
+
+class InstrumentedAsyncAdaptedQueuePool(_PoolTelemetry, AsyncAdaptedQueuePool):
+    telemetry_name = "async"
+
+
+def pool_options() -> Dict[str, Any]:
+    """Pool arguments for create_engine, sized for this process type."""
+    if settings.PROCESS_TYPE == "bot":
+        pool_size, max_overflow = settings.BOT_DB_POOL_SIZE, settings.BOT_DB_MAX_OVERFLOW
+    else:
+        pool_size, max_overflow = settings.API_DB_POOL_SIZE, settings.API_DB_MAX_OVERFLOW
+
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        # Pre-ping is done by the checkout listener in instrument_pool
+        "pool_pre_ping": False,
+    }
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Export pool usage and ping connections on checkout per DB_POOL_PRE_PING."""
+    pool = engine.pool
+    name = pool.telemetry_name
+    if settings.DB_POOL_PRE_PING == "always":
+        pre_ping_idle_seconds = 0
+    elif settings.DB_POOL_PRE_PING == "idle":
+        pre_ping_idle_seconds = settings.DB_POOL_PRE_PING_IDLE_SECONDS
+    else:
+        pre_ping_idle_seconds = None
+
+    def update_usage() -> None:
+        set_db_pool_usage(name, pool.checkedout(), max(pool.overflow(), 0))
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.pop("checked_in_at", None)
+        # Brand new connections have never been checked in and need no ping
+        if (
+                pre_ping_idle_seconds is not None
+                and checked_in_at is not None
+                and time.monotonic() - checked_in_at >= pre_ping_idle_seconds
+        ):
+            try:
+                engine.dialect.do_ping(dbapi_connection)
+            except Exception as e:
+                record_db_pool_pre_ping_failure(name)
+                logger.warning(f"Pooled connection failed pre-ping, reconnecting: {e}")
+                # Makes the pool discard this connection and check out another
+                raise exc.DisconnectionError() from e
+
+        update_usage()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+        update_usage()
+
 
 # Create SQLAlchemy engine
 engine = create_engine(
     db_uri,
-    poolclass=QueuePool,
-    pool_size=20,
-    max_overflow=40,
-    pool_timeout=30,
-    pool_recycle=1800,
-    pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,
+    **pool_options(),
+)
+instrument_pool(engine)
+
+# Create async SQLAlchemy engine used by the API endpoints
+async_engine = create_async_engine(
+    async_db_uri,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    **pool_options(),
 )
+instrument_pool(async_engine.sync_engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create AsyncSessionLocal class. Objects stay usable after commit, so
+# handlers never trigger an implicit (blocking) lazy load.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+# SQL instrumentation. Listening on the Engine class covers every engine,
+# including the async engines' sync proxies: each statement is timed,
+# counted towards the current request (app.utils.metrics.track_queries) and
+# logged when it exceeds SLOW_QUERY_THRESHOLD_MS.
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    # rowcount is -1 where the driver doesn't report it (SQLite SELECTs)
+    record_query(duration, max(cursor.rowcount, 0))
+
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold and duration * 1000 >= threshold:
+        if settings.SLOW_QUERY_LOG_PARAMETERS:
+            logger.warning(f"Slow query ({duration * 1000:.1f} ms): {statement} parameters={parameters!r}")
+        else:
+            logger.warning(f"Slow query ({duration * 1000:.1f} ms): {statement}")
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_query_timer(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+class _ModelBase:
+    # Server-generated columns come back in the INSERT/UPDATE itself
+    # (RETURNING), so a written object is complete after commit and handlers
+    # build their responses without a refresh() round trip
+    __mapper_args__ = {"eager_defaults": True}
+
+
 # Create Base class for models
-Base = declarative_base()
+Base = declarative_base(cls=_ModelBase)
 
 
 # Function to get DB session
@@ -33,6 +191,12 @@ def get_db():
         db.close()
 
 
+# Function to get async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def wait_for_db():
     import time
     from sqlalchemy.exc import OperationalError
@@ -54,6 +218,37 @@ def wait_for_db():
     raise Exception("Could not connect to the database after multiple retries")
 
 
-# Function to create tables
-def create_db_and_tables():
-    Base.metadata.create_all(bind=engine)
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Revision matching the schema create_all() used to produce
+BASELINE_REVISION = "0001"
+
+# Key for pg_advisory_xact_lock so that several workers starting at once
+# apply migrations one after another instead of racing each other.
+MIGRATION_LOCK_KEY = 7_420_501
+
+
+# Function to bring the schema up to date
+def run_migrations():
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect, text
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+
+        if connection.dialect.name == "postgresql":
+            connection.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+            )
+
+        # Databases created by the old create_all() call have the tables
+        # but no version table yet: adopt them at the baseline revision.
+        inspector = inspect(connection)
+        if inspector.has_table("users") and not inspector.has_table("alembic_version"):
+            command.stamp(config, BASELINE_REVISION)
+
+        command.upgrade(config, "head")
@@ -1,3 +1,7 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union
 
@@ -5,19 +9,52 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.models import User
 from app.schemas import TokenData
+from app.utils.metrics import record_password_hash_rejected, set_password_hash_queue_depth
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+_password_executor: Optional[Executor] = None
+_password_jobs = 0  # running + queued, only touched from the event loop
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
+# Auth caches: token -> (user_id, exp) and user_id -> detached active User
+token_cache = TTLCache(
+    "auth_token", settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS
+)
+user_cache = TTLCache(
+    "auth_user", settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.pop(user_id)
+
+
+def clear_auth_cache() -> None:
+    token_cache.clear()
+    user_cache.clear()
+
+
+# Drop cached users as soon as they are changed, deactivated or deleted
+# through the ORM in this process; other workers catch up within the TTL.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -27,6 +64,57 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def get_password_executor() -> Executor:
+    # bcrypt is CPU bound: run it on a dedicated, bounded pool instead of the
+    # event loop so a burst of logins does not stall every other request.
+    # Created lazily so importing this module never starts worker processes.
+    global _password_executor
+
+    if _password_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "thread":
+            _password_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+        else:
+            _password_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    return _password_executor
+
+
+async def _run_password_job(func, *args) -> Any:
+    global _password_jobs
+
+    capacity = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+    if _password_jobs >= capacity:
+        record_password_hash_rejected()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    _password_jobs += 1
+    set_password_hash_queue_depth(max(0, _password_jobs - settings.PASSWORD_HASH_WORKERS))
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        _password_jobs -= 1
+        set_password_hash_queue_depth(max(0, _password_jobs - settings.PASSWORD_HASH_WORKERS))
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(get_password_hash, password)
+
+
 def create_access_token(
         data: dict, expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -48,7 +136,7 @@ def create_access_token(
 
 
 async def get_current_user(
-        token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+        token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,24 +144,40 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: Optional[int] = payload.get("sub")
+    cached_token = token_cache.get(token)
+    if cached_token is not None and cached_token[1] > time.time():
+        token_data = TokenData(user_id=cached_token[0])
+    else:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            user_id: Optional[int] = payload.get("sub")
+
+            if user_id is None:
+                raise credentials_exception
 
-        if user_id is None:
+            token_data = TokenData(user_id=int(user_id))
+        except JWTError:
             raise credentials_exception
 
-        token_data = TokenData(user_id=int(user_id))
-    except JWTError:
-        raise credentials_exception
+        token_cache.set(token, (token_data.user_id, payload.get("exp", float("inf"))))
+
+    user = user_cache.get(token_data.user_id)
+    if user is not None:
+        return user
 
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    result = await db.execute(select(User).where(User.id == token_data.user_id))
+    user = result.scalars().first()
 
     if user is None:
         raise credentials_exception
 
+    if user.is_active:
+        # Detach so the cached row can be shared across request sessions
+        db.expunge(user)
+        user_cache.set(user.id, user)
+
     return user
 
 
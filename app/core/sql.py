@@ -0,0 +1,106 @@
+from sqlalchemy import Date, Integer, String
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class seconds_between(FunctionElement):
+    """Whole seconds from `start` to `end` (timestamps), truncated like int()."""
+
+    type = Integer()
+    inherit_cache = True
+    name = "seconds_between"
+
+
+@compiles(seconds_between, "postgresql")
+def _seconds_between_postgresql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return (
+        f"CAST(TRUNC(EXTRACT(EPOCH FROM ({compiler.process(end, **kw)} - "
+        f"{compiler.process(start, **kw)}))) AS INTEGER)"
+    )
+
+
+@compiles(seconds_between, "sqlite")
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    # Rounded to milliseconds first: julianday() differences are floats
+    return (
+        f"CAST(ROUND((julianday({compiler.process(end, **kw)}) - "
+        f"julianday({compiler.process(start, **kw)})) * 86400, 3) AS INTEGER)"
+    )
+
+
+class day_start(FunctionElement):
+    """Calendar day of a timestamp, as a date."""
+
+    type = Date()
+    inherit_cache = True
+    name = "day_start"
+
+
+@compiles(day_start, "postgresql")
+def _day_start_postgresql(element, compiler, **kw):
+    return f"CAST(date_trunc('day', {compiler.process(element.clauses, **kw)}) AS DATE)"
+
+
+@compiles(day_start, "sqlite")
+def _day_start_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+
+class week_start(FunctionElement):
+    """Monday of the ISO week a timestamp or date falls in, as a date."""
+
+    type = Date()
+    inherit_cache = True
+    name = "week_start"
+
+
+@compiles(week_start, "postgresql")
+def _week_start_postgresql(element, compiler, **kw):
+    return f"CAST(date_trunc('week', {compiler.process(element.clauses, **kw)}) AS DATE)"
+
+
+@compiles(week_start, "sqlite")
+def _week_start_sqlite(element, compiler, **kw):
+    # Back six days, then forward to the next Monday: a Monday maps to itself
+    return f"date({compiler.process(element.clauses, **kw)}, '-6 days', 'weekday 1')"
+
+
+class IntegerList(TypeDecorator):
+    """Result type of int_array_agg: a list of ints on every backend."""
+
+    impl = String
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, list):
+            return value
+        return [int(item) for item in value.split(",")]
+
+
+class int_array_agg(FunctionElement):
+    """All values of an integer column in the group, as one list."""
+
+    type = IntegerList()
+    inherit_cache = True
+    name = "int_array_agg"
+
+
+@compiles(int_array_agg, "postgresql")
+def _int_array_agg_postgresql(element, compiler, **kw):
+    return f"array_agg({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(int_array_agg, "sqlite")
+def _int_array_agg_sqlite(element, compiler, **kw):
+    return f"group_concat({compiler.process(element.clauses, **kw)})"
+
+
+def upsert(db: AsyncSession, model):
+    """INSERT into `model` for the session's backend, with on_conflict_do_update() / _do_nothing()."""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
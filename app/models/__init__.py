@@ -4,8 +4,11 @@ from app.models.task import (
     TaskPriority,
     TaskStatus,
     TaskCategory,
+    TaskTombstone,
+    CollectionVersion,
     RecurringTask,
     TimeTrack,
+    TimeTrackDaily,
     Reminder,
     TelegramUser,
 )
@@ -16,8 +19,11 @@ __all__ = [
     "TaskPriority",
     "TaskStatus",
     "TaskCategory",
+    "TaskTombstone",
+    "CollectionVersion",
     "RecurringTask",
     "TimeTrack",
+    "TimeTrackDaily",
     "Reminder",
     "TelegramUser",
 ]
\ No newline at end of file
@@ -1,21 +1,28 @@
-from datetime import datetime
+from datetime import datetime, time
 from enum import Enum
 
 from sqlalchemy import (
     Boolean,
     Column,
+    Date,
     DateTime,
     Enum as SQLEnum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    text,
 )
 from sqlalchemy.orm import relationship
 
 from app.core.db import Base
 
 
+def start_of_today() -> datetime:
+    return datetime.combine(datetime.utcnow().date(), time.min)
+
+
 class TaskPriority(str, Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -56,14 +63,70 @@ class Task(Base):
 
     owner_id = Column(Integer, ForeignKey("users.id"))
 
+    # Series this task is an occurrence of (see app.repositories.recurrence).
+    # No foreign key: occurrences outlive their series
+    recurring_task_id = Column(Integer, nullable=True)
+
     # Relationships
     owner = relationship("User", back_populates="tasks")
     time_tracks = relationship("TimeTrack", back_populates="task")
     recurring_task = relationship("RecurringTask", back_populates="task", uselist=False)
     reminders = relationship("Reminder", back_populates="task")
 
+    __table_args__ = (
+        # Keyset pagination: ORDER BY (due_date | updated_at, id) per owner
+        Index("ix_tasks_owner_id_due_date_id", "owner_id", "due_date", "id"),
+        Index("ix_tasks_owner_id_updated_at_id", "owner_id", "updated_at", "id"),
+        # Owner-scoped filters used by the API and the Telegram bot
+        Index("ix_tasks_owner_id_status", "owner_id", "status"),
+        Index("ix_tasks_owner_id_priority", "owner_id", "priority"),
+        Index("ix_tasks_owner_id_category", "owner_id", "category"),
+        # One task per occurrence: the materializer inserts ON CONFLICT DO NOTHING
+        Index("ix_tasks_recurring_task_id_due_date", "recurring_task_id", "due_date", unique=True),
+    )
+
+
+class TaskTombstone(Base):
+    """
+    Marker left behind by a deleted task, so that delta sync
+    (GET /api/tasks/sync) can tell clients to drop their copy.
+    """
+
+    __tablename__ = "task_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Sync: owner_id = ? AND (deleted_at, task_id) > (?, ?) ORDER BY deleted_at, task_id
+        Index("ix_task_tombstones_owner_id_deleted_at_task_id", "owner_id", "deleted_at", "task_id"),
+    )
+
+
+class CollectionVersion(Base):
+    """
+    Per-user counter of a collection (tasks, reminders, time tracks),
+    bumped in the same transaction as every write to it. List endpoints
+    derive their ETag from it, so a revalidation that finds nothing changed
+    reads one row instead of the list.
+    """
+
+    __tablename__ = "collection_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    name = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 
 class RecurringTask(Base):
+    """
+    A task that repeats. Its occurrences are materialized as tasks copied
+    from `task` (see app.repositories.recurrence): every occurrence before
+    materialized_until has been written, later ones have not.
+    """
+
     __tablename__ = "recurring_tasks"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -74,10 +137,19 @@ class RecurringTask(Base):
     interval = Column(Integer, default=1)  # every X days/weeks/etc.
     start_date = Column(DateTime, default=datetime.utcnow)
     end_date = Column(DateTime, nullable=True)
+    by_weekday = Column(String(32), nullable=True)  # e.g. "MO,WE,FR"
+
+    # Occurrences before the day the series was created are not back-filled
+    materialized_until = Column(DateTime, nullable=False, default=start_of_today)
 
     # Relationships
     task = relationship("Task", back_populates="recurring_task")
 
+    __table_args__ = (
+        # Materializer scan: materialized_until < horizon
+        Index("ix_recurring_tasks_materialized_until", "materialized_until"),
+    )
+
 
 class TimeTrack(Base):
     __tablename__ = "time_tracks"
@@ -92,6 +164,42 @@ class TimeTrack(Base):
     # Relationships
     task = relationship("Task", back_populates="time_tracks")
 
+    __table_args__ = (
+        Index("ix_time_tracks_task_id_start_time", "task_id", "start_time"),
+        # Active tracking lookup: task_id = ? AND end_time IS NULL
+        Index(
+            "ix_time_tracks_active_task_id",
+            "task_id",
+            postgresql_where=text("end_time IS NULL"),
+            sqlite_where=text("end_time IS NULL"),
+        ),
+    )
+
+
+class TimeTrackDaily(Base):
+    """
+    Finished time tracks rolled up per user, task and day (UTC).
+
+    A track that runs past midnight adds its seconds to every day it
+    covers; track_count is only counted on the day the track started, so
+    counts add up across days. Maintained incrementally by the time-tracking
+    endpoints, checked and rebuilt with `python -m app.commands.rollup`.
+    """
+
+    __tablename__ = "time_track_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    total_seconds = Column(Integer, nullable=False, default=0)
+    track_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Reports: user_id = ? AND day BETWEEN ? AND ?
+        Index("ix_time_track_daily_user_id_day", "user_id", "day"),
+    )
+
 
 class Reminder(Base):
     __tablename__ = "reminders"
@@ -101,10 +209,24 @@ class Reminder(Base):
 
     reminder_time = Column(DateTime)
     is_sent = Column(Boolean, default=False)
+    # Why the reminder can never be delivered (no Telegram chat, bot
+    # blocked, ...); such reminders are not tried again until moved
+    delivery_error = Column(String(255), nullable=True)
 
     # Relationships
     task = relationship("Task", back_populates="reminders")
 
+    __table_args__ = (
+        Index("ix_reminders_task_id", "task_id"),
+        # Reminder scheduler scan: unsent, deliverable reminders by reminder_time
+        Index(
+            "ix_reminders_unsent_reminder_time",
+            "reminder_time",
+            postgresql_where=text("is_sent = false AND delivery_error IS NULL"),
+            sqlite_where=text("is_sent = 0 AND delivery_error IS NULL"),
+        ),
+    )
+
 
 class TelegramUser(Base):
     __tablename__ = "telegram_users"
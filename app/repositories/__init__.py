@@ -0,0 +1,27 @@
+from app.repositories.imports import IMPORT_KINDS, import_records, open_text
+from app.repositories.owned import TaskChildRepository, TimeTrackRepository, reminders, time_tracks
+from app.repositories.recurrence import (discard_occurrences, materialize_occurrences, reschedule_occurrences,
+                                         run_materializer)
+from app.repositories.reports import time_report
+from app.repositories.rollup import rebuild_rollup, update_rollup, verify_rollup
+from app.repositories.versions import bump_version, collection_version
+
+__all__ = [
+    "IMPORT_KINDS",
+    "import_records",
+    "open_text",
+    "TaskChildRepository",
+    "TimeTrackRepository",
+    "reminders",
+    "time_tracks",
+    "discard_occurrences",
+    "materialize_occurrences",
+    "reschedule_occurrences",
+    "run_materializer",
+    "time_report",
+    "rebuild_rollup",
+    "update_rollup",
+    "verify_rollup",
+    "bump_version",
+    "collection_version",
+]
@@ -0,0 +1,239 @@
+import csv
+import gzip
+import io
+from collections import Counter, defaultdict
+from datetime import datetime
+from enum import Enum
+from types import SimpleNamespace
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple, TextIO, Type, Union
+
+import asyncpg
+import orjson
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Reminder, Task, TimeTrack
+from app.repositories.rollup import Rollup, add_track, apply_rollup
+from app.repositories.versions import REMINDERS, TASKS, TIME_TRACKS, bump_version
+from app.schemas import ReminderImport, TaskCreate, TimeTrackImport
+from app.utils.metrics import record_task_created
+
+# kind -> (row schema, model, collection version)
+IMPORT_KINDS: Dict[str, Tuple[Type[BaseModel], Any, str]] = {
+    "tasks": (TaskCreate, Task, TASKS),
+    "time_tracks": (TimeTrackImport, TimeTrack, TIME_TRACKS),
+    "reminders": (ReminderImport, Reminder, REMINDERS),
+}
+
+# What a row the database rejects raises: SQLAlchemy wraps the INSERT's
+# driver errors, COPY's come from asyncpg as they are. asyncpg's record
+# encoder raises OverflowError for a value its column type can't hold
+WRITE_ERRORS = (DBAPIError, asyncpg.PostgresError, asyncpg.InterfaceError, OverflowError)
+
+
+def open_text(binary: BinaryIO, compressed: bool = False) -> TextIO:
+    """UTF-8 text over an uploaded or opened file, gunzipped on the fly if `compressed`."""
+    if compressed:
+        binary = gzip.GzipFile(fileobj=binary, mode="rb")
+    return io.TextIOWrapper(binary, encoding="utf-8", newline="")
+
+
+def read_records(stream: TextIO, format: str) -> Iterator[Tuple[int, Union[Dict[str, Any], str]]]:
+    """
+    (line, record) for every row of a CSV (with a header row) or NDJSON
+    stream; the record is an error message instead for a row that can't be
+    parsed. Empty CSV cells are left out, so the schema defaults apply.
+    """
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, "More values than columns"
+                continue
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, record
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _fail(report: Dict[str, Any], line: int, error: str) -> None:
+    report["failed"] += 1
+    if len(report["errors"]) < settings.IMPORT_MAX_ERRORS:
+        report["errors"].append({"line": line, "error": error})
+
+
+def _task_row(item: TaskCreate, owner_id: int, now: datetime) -> Dict[str, Any]:
+    return {**item.model_dump(), "owner_id": owner_id, "created_at": now, "updated_at": now}
+
+
+def _time_track_row(item: TimeTrackImport) -> Dict[str, Any]:
+    row = item.model_dump()
+    # Same rule as POST /tasks/{task_id}/time
+    if row["start_time"] and row["end_time"]:
+        row["duration"] = int((row["end_time"] - row["start_time"]).total_seconds())
+    return row
+
+
+async def _copy(db: AsyncSession, model: Any, rows: List[Dict[str, Any]]) -> None:
+    if db.get_bind().dialect.name != "postgresql":
+        await db.execute(insert(model), rows)
+        return
+
+    # COPY through the asyncpg connection, inside the session's transaction.
+    # Enum columns hold the member names, like SQLAlchemy's Enum type writes.
+    columns = list(rows[0])
+    records = [
+        tuple(value.name if isinstance(value, Enum) else value for value in row.values())
+        for row in rows
+    ]
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        model.__tablename__, columns=columns, records=records,
+    )
+
+
+async def _write_rows(db: AsyncSession, kind: str, owner_id: int, rows: List[Dict[str, Any]]) -> None:
+    _, model, collection = IMPORT_KINDS[kind]
+
+    # The bump also opens the transaction on the driver connection that
+    # COPY then runs in
+    await bump_version(db, collection, [owner_id])
+    await _copy(db, model, rows)
+
+    if kind == "time_tracks":
+        deltas: Rollup = defaultdict(lambda: [0, 0])
+        for row in rows:
+            add_track(deltas, owner_id, row["task_id"], SimpleNamespace(**row))
+        await apply_rollup(db, deltas)
+
+    await db.commit()
+
+
+async def _write(
+        db: AsyncSession, kind: str, owner_id: int, lines: List[int], rows: List[Dict[str, Any]],
+        report: Dict[str, Any],
+) -> None:
+    """
+    Write `rows` in one transaction. When the database rejects it, the
+    rows are written again in halves, down to single rows, so that every
+    row it rejects is reported by line and all others still go in.
+    """
+    try:
+        await _write_rows(db, kind, owner_id, rows)
+    except WRITE_ERRORS as e:
+        await db.rollback()
+        if len(rows) == 1:
+            error = str(getattr(e, "orig", None) or e).strip().splitlines()[0]
+            _fail(report, lines[0], f"Rejected by the database: {error}")
+            return
+        middle = len(rows) // 2
+        await _write(db, kind, owner_id, lines[:middle], rows[:middle], report)
+        await _write(db, kind, owner_id, lines[middle:], rows[middle:], report)
+        return
+
+    report["imported"] += len(rows)
+    if kind == "tasks":
+        created = Counter((row["category"].value, row["priority"].value) for row in rows)
+        for (category, priority), count in created.items():
+            record_task_created(category=category, priority=priority, count=count)
+
+
+async def _load_chunk(
+        db: AsyncSession, kind: str, owner_id: int, chunk: List[Tuple[int, BaseModel]], report: Dict[str, Any],
+) -> None:
+    if kind != "tasks":
+        task_ids = {item.task_id for _, item in chunk}
+        result = await db.execute(
+            select(Task.id).where(Task.id.in_(task_ids), Task.owner_id == owner_id)
+        )
+        owned = set(result.scalars().all())
+        for line, item in chunk:
+            if item.task_id not in owned:
+                _fail(report, line, "Task not found")
+        chunk = [(line, item) for line, item in chunk if item.task_id in owned]
+        if not chunk:
+            return
+
+    if kind == "tasks":
+        now = datetime.utcnow()
+        rows = [_task_row(item, owner_id, now) for _, item in chunk]
+    elif kind == "time_tracks":
+        rows = [_time_track_row(item) for _, item in chunk]
+    else:
+        rows = [item.model_dump() for _, item in chunk]
+
+    await _write(db, kind, owner_id, [line for line, _ in chunk], rows, report)
+
+
+async def import_records(
+        db: AsyncSession, kind: str, owner_id: int, stream: TextIO, format: str,
+) -> Dict[str, Any]:
+    """
+    Import tasks, time tracks or reminders for `owner_id` from a CSV or
+    NDJSON text stream.
+
+    Rows are read and validated with the API's create schemas (plus the
+    task_id of time tracks and reminders, which must be one of the user's
+    tasks) IMPORT_CHUNK_SIZE at a time. Each chunk of valid rows is loaded
+    with COPY on Postgres, or one executemany INSERT elsewhere, and
+    committed on its own. Invalid rows, and rows the database rejects
+    (see _write), are skipped and reported by line; they never stop the
+    import. Returns an ImportResult.
+    """
+    schema, _, _ = IMPORT_KINDS[kind]
+    report: Dict[str, Any] = {"imported": 0, "failed": 0, "errors": []}
+    chunk: List[Tuple[int, BaseModel]] = []
+
+    records = read_records(stream, format)
+    line = 0
+    while True:
+        try:
+            line, record = next(records)
+        except StopIteration:
+            break
+        except (UnicodeDecodeError, EOFError, OSError, csv.Error) as e:
+            # Not text, a broken gzip stream, ...: nothing after this point
+            # can be read. Chunks before it are in already.
+            _fail(report, line + 1, f"Unreadable input: {e}")
+            break
+
+        if isinstance(record, str):
+            _fail(report, line, record)
+            continue
+        try:
+            chunk.append((line, schema.model_validate(record)))
+        except ValidationError as e:
+            _fail(report, line, _validation_message(e))
+            continue
+
+        if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+            await _load_chunk(db, kind, owner_id, chunk, report)
+            chunk = []
+
+    if chunk:
+        await _load_chunk(db, kind, owner_id, chunk, report)
+
+    report["errors"].sort(key=lambda error: error["line"])
+    return report
@@ -0,0 +1,150 @@
+from types import SimpleNamespace
+from typing import Any, Dict, Generic, Optional, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Reminder, Task, TimeTrack
+from app.repositories.rollup import update_rollup
+from app.repositories.versions import REMINDERS, TIME_TRACKS, bump_version
+
+ModelType = TypeVar("ModelType", Reminder, TimeTrack)
+
+
+class TaskChildRepository(Generic[ModelType]):
+    """
+    Rows that belong to a user through their task (reminders, time tracks).
+
+    Every method checks ownership in the same statement that reads or
+    writes the row: reads join the owning task, updates and deletes are
+    scoped with `AND EXISTS (task owned by the user)`. Only a write that
+    matched nothing costs a second query, to tell 404 from 403. Writes bump
+    the owner's version of `collection`.
+
+    Subclasses that maintain derived data list the columns they need from
+    the row as it was before the write in `previous_columns` and get them
+    in `_on_write`, inside the transaction, before the commit. Updates then
+    read and lock the row first: UPDATE ... RETURNING only sees new values.
+    """
+
+    previous_columns: Tuple[str, ...] = ()
+
+    def __init__(self, model: Type[ModelType], name: str, collection: str):
+        self.model = model
+        self.name = name
+        self.collection = collection
+
+    def _owned_by(self, owner_id: int):
+        return exists().where(Task.id == self.model.task_id, Task.owner_id == owner_id)
+
+    async def get(self, db: AsyncSession, row_id: int, owner_id: int) -> ModelType:
+        result = await db.execute(
+            select(self.model, Task.owner_id == owner_id)
+            .outerjoin(Task, Task.id == self.model.task_id)
+            .where(self.model.id == row_id)
+        )
+        row = result.first()
+
+        if row is None:
+            self._raise_not_found()
+
+        instance, owned = row
+        if not owned:
+            self._raise_forbidden()
+
+        return instance
+
+    async def update(
+            self, db: AsyncSession, row_id: int, owner_id: int, values: Dict[str, Any]
+    ) -> ModelType:
+        if not values:
+            return await self.get(db, row_id, owner_id)
+
+        previous = None
+        if self.previous_columns:
+            # Lock the row and read what the hook needs before it changes;
+            # an unknown or foreign row fails here, before the UPDATE
+            result = await db.execute(
+                select(*(getattr(self.model, name) for name in self.previous_columns))
+                .where(self.model.id == row_id, self._owned_by(owner_id))
+                .with_for_update()
+            )
+            previous = result.first()
+            if previous is None:
+                await self._raise_missing(db, row_id)
+
+        result = await db.execute(
+            update(self.model)
+            .where(self.model.id == row_id, self._owned_by(owner_id))
+            .values(**values)
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+        instance = result.scalars().first()
+
+        if instance is None:
+            await self._raise_missing(db, row_id)
+
+        if previous is not None:
+            await self._on_write(db, owner_id, previous._asdict(), instance)
+
+        await bump_version(db, self.collection, [owner_id])
+        await db.commit()
+        return instance
+
+    async def delete(self, db: AsyncSession, row_id: int, owner_id: int) -> None:
+        result = await db.execute(
+            delete(self.model)
+            .where(self.model.id == row_id, self._owned_by(owner_id))
+            .returning(self.model.id, *(getattr(self.model, name) for name in self.previous_columns))
+            .execution_options(synchronize_session=False)
+        )
+        row = result.first()
+
+        if row is None:
+            await self._raise_missing(db, row_id)
+
+        if self.previous_columns:
+            await self._on_write(db, owner_id, row._asdict(), None)
+
+        await bump_version(db, self.collection, [owner_id])
+        await db.commit()
+
+    async def _on_write(
+            self, db: AsyncSession, owner_id: int, previous: Dict[str, Any], instance: Optional[ModelType],
+    ) -> None:
+        """Called after an update (instance is the new row) or delete (instance is None)."""
+
+    async def _raise_missing(self, db: AsyncSession, row_id: int) -> None:
+        result = await db.execute(select(self.model.id).where(self.model.id == row_id))
+        if result.first() is None:
+            self._raise_not_found()
+        self._raise_forbidden()
+
+    def _raise_not_found(self) -> None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{self.name} not found",
+        )
+
+    def _raise_forbidden(self) -> None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+
+class TimeTrackRepository(TaskChildRepository[TimeTrack]):
+    """Time tracks, keeping the time_track_daily rollup in step with writes."""
+
+    previous_columns = ("task_id", "start_time", "duration")
+
+    async def _on_write(
+            self, db: AsyncSession, owner_id: int, previous: Dict[str, Any], instance: Optional[TimeTrack],
+    ) -> None:
+        await update_rollup(db, owner_id, previous["task_id"], before=SimpleNamespace(**previous), after=instance)
+
+
+reminders = TaskChildRepository(Reminder, "Reminder", REMINDERS)
+time_tracks = TimeTrackRepository(TimeTrack, "Time track", TIME_TRACKS)
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, time, timedelta
+from typing import Any, Collection, Dict, List, Optional
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.sql import upsert
+from app.models import RecurringTask, Reminder, Task, TaskStatus, TaskTombstone, TimeTrack
+from app.repositories.versions import TASKS, bump_version
+from app.utils.metrics import record_task_created
+from app.utils.recurrence import occurrences
+
+logger = logging.getLogger(__name__)
+
+
+def horizon(now: datetime, days: int) -> datetime:
+    """Midnight `days` days after `now`. Watermarks move once a day, not every run."""
+    return datetime.combine(now.date() + timedelta(days=days), time.min)
+
+
+def _occurrence_rows(series: Any, until: datetime, now: datetime) -> List[Dict[str, Any]]:
+    try:
+        due_dates = list(occurrences(
+            series.frequency, series.interval, series.start_date,
+            series.materialized_until, until, series.end_date, series.by_weekday,
+        ))
+    except ValueError as e:  # A by_weekday written around the API
+        logger.warning(f"Skipping recurring task {series.id}: {e}")
+        return []
+
+    return [
+        {
+            "title": series.title,
+            "description": series.description,
+            "status": TaskStatus.TODO,
+            "priority": series.priority,
+            "category": series.category,
+            "due_date": due_date,
+            "owner_id": series.owner_id,
+            "recurring_task_id": series.id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for due_date in due_dates
+        # The series' own task already stands for this occurrence
+        if due_date != series.template_due_date
+    ]
+
+
+async def materialize_occurrences(
+        db: AsyncSession,
+        now: Optional[datetime] = None,
+        series_ids: Optional[Collection[int]] = None,
+        horizon_days: Optional[int] = None,
+) -> int:
+    """
+    Write the occurrences of recurring tasks (all of them, or `series_ids`)
+    up to the horizon, midnight RECURRENCE_HORIZON_DAYS ahead, as tasks
+    copied from each series' task. Returns the number of tasks written.
+
+    Only series whose watermark (materialized_until) is behind the horizon
+    are read, RECURRENCE_BATCH_SIZE at a time in id order. Each batch is
+    expanded from its watermarks, inserted with one executemany INSERT ...
+    ON CONFLICT DO NOTHING on (recurring_task_id, due_date), and committed
+    together with the advanced watermarks. A run that dies half way, or two
+    runs at once (series rows are locked FOR UPDATE SKIP LOCKED on
+    Postgres), never writes an occurrence twice.
+    """
+    now = now or datetime.utcnow()
+    until = horizon(now, settings.RECURRENCE_HORIZON_DAYS if horizon_days is None else horizon_days)
+
+    query = (
+        select(
+            RecurringTask.id, RecurringTask.frequency, RecurringTask.interval, RecurringTask.start_date,
+            RecurringTask.end_date, RecurringTask.by_weekday, RecurringTask.materialized_until,
+            Task.title, Task.description, Task.priority, Task.category, Task.owner_id,
+            Task.due_date.label("template_due_date"),
+        )
+        .join(Task, Task.id == RecurringTask.task_id)
+        .where(
+            RecurringTask.materialized_until < until,
+            # A watermark past end_date means the series is finished
+            or_(RecurringTask.end_date.is_(None), RecurringTask.materialized_until <= RecurringTask.end_date),
+        )
+        .order_by(RecurringTask.id)
+        .limit(settings.RECURRENCE_BATCH_SIZE)
+        .with_for_update(of=RecurringTask, skip_locked=True)
+    )
+    if series_ids is not None:
+        query = query.where(RecurringTask.id.in_(series_ids))
+
+    written = 0
+    last_id = 0
+    while True:
+        result = await db.execute(query.where(RecurringTask.id > last_id))
+        batch = result.all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        rows = [row for series in batch for row in _occurrence_rows(series, until, now)]
+        created = []
+        if rows:
+            # Against the table, not the entity: the ORM bulk path adds a
+            # third to the insert time for rows that are never loaded
+            statement = upsert(db, Task.__table__).on_conflict_do_nothing(
+                index_elements=[Task.recurring_task_id, Task.due_date],
+            )
+            result = await db.execute(statement.returning(Task.owner_id, Task.category, Task.priority), rows)
+            created = result.all()
+            await bump_version(db, TASKS, [row.owner_id for row in created])
+
+        await db.execute(
+            update(RecurringTask)
+            .where(RecurringTask.id.in_([series.id for series in batch]))
+            .values(materialized_until=until)
+        )
+        await db.commit()
+        written += len(created)
+
+        counts = Counter((row.category.value, row.priority.value) for row in created)
+        for (category, priority), count in counts.items():
+            record_task_created(category=category, priority=priority, count=count)
+
+        if len(batch) < settings.RECURRENCE_BATCH_SIZE:
+            break
+
+    return written
+
+
+async def discard_occurrences(
+        db: AsyncSession, series_id: int, owner_id: int, since: datetime, keep: Collection[datetime] = (),
+) -> List[int]:
+    """
+    Delete the occurrences of a series due from `since` on that are still
+    to do, except those due at a time in `keep`, in the caller's
+    transaction. Returns the ids of the deleted tasks.
+    """
+    criteria = [
+        Task.recurring_task_id == series_id,
+        Task.owner_id == owner_id,
+        Task.due_date >= since,
+        Task.status == TaskStatus.TODO,
+    ]
+    if keep:
+        criteria.append(Task.due_date.not_in(list(keep)))
+
+    # Detach children the same way a single ORM delete does
+    task_ids = select(Task.id).where(*criteria)
+    for model in (TimeTrack, Reminder):
+        await db.execute(
+            update(model)
+            .where(model.task_id.in_(task_ids))
+            .values(task_id=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    result = await db.execute(
+        delete(Task).where(*criteria).returning(Task.id).execution_options(synchronize_session=False)
+    )
+    deleted_ids = list(result.scalars().all())
+    if deleted_ids:
+        await db.execute(insert(TaskTombstone), [
+            {"task_id": task_id, "owner_id": owner_id} for task_id in deleted_ids
+        ])
+        await bump_version(db, TASKS, [owner_id])
+    return deleted_ids
+
+
+async def reschedule_occurrences(
+        db: AsyncSession, series: RecurringTask, owner_id: int, now: Optional[datetime] = None,
+) -> None:
+    """
+    Bring a series' future occurrences in line with its changed rule, in
+    the caller's transaction: occurrences the rule no longer produces are
+    discarded, and the watermark moves back to now so that the next
+    materialization writes the ones it adds. Occurrences that stay keep
+    their task.
+    """
+    now = now or datetime.utcnow()
+    keep = []
+    if series.materialized_until > now:
+        try:
+            keep = list(occurrences(
+                series.frequency, series.interval, series.start_date,
+                now, series.materialized_until, series.end_date, series.by_weekday,
+            ))
+        except ValueError:
+            pass
+        series.materialized_until = now
+
+    await discard_occurrences(db, series.id, owner_id, now, keep)
+
+
+async def run_materializer(
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        interval: float = settings.RECURRENCE_INTERVAL_SECONDS,
+) -> None:
+    """Materialize occurrences every `interval` seconds, forever; run by the bot process."""
+    while True:
+        try:
+            async with session_factory() as db:
+                written = await materialize_occurrences(db)
+            if written:
+                logger.info(f"Materialized {written} recurring task occurrences")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error materializing recurring tasks: {e}")
+
+        await asyncio.sleep(interval)
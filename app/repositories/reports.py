@@ -0,0 +1,119 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import day_start, int_array_agg, week_start
+from app.models import Task, TimeTrack, TimeTrackDaily
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Days of durations fetched per round trip while streaming
+DAYS_PER_CHUNK = 100
+
+
+async def _totals(db: AsyncSession, owner_id: int, date_from: date, date_to: date, *columns) -> List[Any]:
+    result = await db.execute(
+        select(*columns, func.sum(TimeTrackDaily.total_seconds), func.sum(TimeTrackDaily.track_count))
+        .select_from(TimeTrackDaily)
+        .join(Task, Task.id == TimeTrackDaily.task_id)
+        .where(
+            TimeTrackDaily.user_id == owner_id,
+            TimeTrackDaily.day >= date_from,
+            TimeTrackDaily.day <= date_to,
+        )
+        .group_by(*columns)
+        .order_by(*columns)
+    )
+    return result.all()
+
+
+async def _durations(db: AsyncSession, owner_id: int, date_from: date, date_to: date) -> np.ndarray:
+    # A track counts towards the day it started on; running tracks have no
+    # duration yet and are left out. One row per day carries all of that
+    # day's durations as an array: far fewer rows to convert than one per
+    # track, and the arrays go straight into NumPy.
+    day = day_start(TimeTrack.start_time)
+    result = await db.stream(
+        select(day, int_array_agg(TimeTrack.duration))
+        .join(Task, Task.id == TimeTrack.task_id)
+        .where(
+            Task.owner_id == owner_id,
+            TimeTrack.start_time >= datetime.combine(date_from, time.min),
+            TimeTrack.start_time < datetime.combine(date_to + timedelta(days=1), time.min),
+            TimeTrack.duration.is_not(None),
+        )
+        .group_by(day)
+        .execution_options(yield_per=DAYS_PER_CHUNK)
+    )
+    chunks = [np.asarray(durations, dtype=np.int64) async for _, durations in result]
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+
+async def time_report(
+        db: AsyncSession, owner_id: int, date_from: date, date_to: date, bins: int = 20,
+) -> Dict[str, Any]:
+    """
+    Time tracked by a user from `date_from` to `date_to` (inclusive).
+
+    Totals by day, week, task, category and priority are grouped in SQL
+    from the time_track_daily rollup, so they cost the same however much
+    history the range covers. A track running past midnight adds its
+    seconds to each day it covers and counts once, on the day it started.
+
+    Percentiles and the histogram need the individual durations of the
+    tracks started in the range: those are streamed as one array per day
+    and summarized with NumPy.
+    """
+    by_day = await _totals(db, owner_id, date_from, date_to, TimeTrackDaily.day)
+    by_week = await _totals(db, owner_id, date_from, date_to, week_start(TimeTrackDaily.day))
+    by_task = await _totals(db, owner_id, date_from, date_to, TimeTrackDaily.task_id, Task.title)
+    by_category = await _totals(db, owner_id, date_from, date_to, Task.category)
+    by_priority = await _totals(db, owner_id, date_from, date_to, Task.priority)
+
+    durations = await _durations(db, owner_id, date_from, date_to)
+    if len(durations):
+        percentiles = dict(zip(
+            (f"p{p}" for p in PERCENTILES),
+            np.percentile(durations, PERCENTILES).tolist(),
+        ))
+        counts, bin_edges = np.histogram(durations, bins=bins)
+        histogram = {"bin_edges": bin_edges.tolist(), "counts": counts.tolist()}
+    else:
+        percentiles = {}
+        histogram = {"bin_edges": [], "counts": []}
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "total_seconds": sum(total for _, total, _ in by_day),
+        "count": sum(count for _, _, count in by_day),
+        "by_day": [
+            {"period": day, "total_seconds": total, "count": count}
+            for day, total, count in by_day
+        ],
+        "by_week": [
+            {"period": week, "total_seconds": total, "count": count}
+            for week, total, count in by_week
+        ],
+        "by_task": sorted(
+            (
+                {"task_id": task_id, "title": title, "total_seconds": total, "count": count}
+                for task_id, title, total, count in by_task
+            ),
+            key=lambda row: row["total_seconds"],
+            reverse=True,
+        ),
+        "by_category": {
+            category: {"total_seconds": total, "count": count}
+            for category, total, count in by_category
+        },
+        "by_priority": {
+            priority: {"total_seconds": total, "count": count}
+            for priority, total, count in by_priority
+        },
+        "percentiles": percentiles,
+        "histogram": histogram,
+    }
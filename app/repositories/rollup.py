@@ -0,0 +1,166 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import upsert
+from app.models import Task, TimeTrack, TimeTrackDaily
+
+# (user_id, task_id, day) -> [total_seconds, track_count]
+RollupKey = Tuple[int, int, date]
+Rollup = Dict[RollupKey, List[int]]
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Rows per statement when rebuilding, and tracks per round trip when reading
+REBUILD_CHUNK_SIZE = 5_000
+
+
+def split_by_day(start_time: datetime, duration: int) -> List[Tuple[date, int]]:
+    """
+    Seconds of a track of `duration` seconds starting at `start_time`, per
+    calendar day. The parts always add up to `duration`.
+    """
+    day = start_time.date()
+    until_midnight = int((datetime.combine(day + timedelta(days=1), time.min) - start_time).total_seconds())
+
+    seconds = min(duration, until_midnight)
+    parts = [(day, seconds)]
+    remaining = duration - seconds
+    while remaining > 0:
+        day += timedelta(days=1)
+        seconds = min(remaining, SECONDS_PER_DAY)
+        parts.append((day, seconds))
+        remaining -= seconds
+
+    return parts
+
+
+def add_track(rollup: Rollup, owner_id: int, task_id: int, track: Any, sign: int = 1) -> None:
+    """Add (sign=1) or subtract (sign=-1) a track with start_time and duration."""
+    if track is None or track.duration is None:
+        return
+
+    for i, (day, seconds) in enumerate(split_by_day(track.start_time, track.duration)):
+        totals = rollup[(owner_id, task_id, day)]
+        totals[0] += sign * seconds
+        if i == 0:
+            totals[1] += sign
+
+
+async def update_rollup(
+        db: AsyncSession, owner_id: int, task_id: int, before: Any = None, after: Any = None,
+) -> None:
+    """
+    Move the rollup from a track's `before` state to its `after` state (None
+    for a track that didn't exist or doesn't exist any more), in the caller's
+    transaction: one upsert, plus a cleanup DELETE when totals shrank.
+    """
+    deltas: Rollup = defaultdict(lambda: [0, 0])
+    add_track(deltas, owner_id, task_id, before, sign=-1)
+    add_track(deltas, owner_id, task_id, after)
+    await apply_rollup(db, deltas)
+
+
+async def apply_rollup(db: AsyncSession, deltas: Rollup) -> None:
+    """Add `deltas` (from add_track) to the stored rollup, in the caller's transaction."""
+    deltas = {key: totals for key, totals in deltas.items() if totals != [0, 0]}
+    if not deltas:
+        return
+
+    statement = upsert(db, TimeTrackDaily).values([
+        {"user_id": user_id, "task_id": task_id, "day": day, "total_seconds": seconds, "track_count": count}
+        for (user_id, task_id, day), (seconds, count) in deltas.items()
+    ])
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[TimeTrackDaily.user_id, TimeTrackDaily.task_id, TimeTrackDaily.day],
+        set_={
+            "total_seconds": TimeTrackDaily.total_seconds + statement.excluded.total_seconds,
+            "track_count": TimeTrackDaily.track_count + statement.excluded.track_count,
+        },
+    ))
+
+    if any(seconds < 0 or count < 0 for seconds, count in deltas.values()):
+        await db.execute(
+            delete(TimeTrackDaily)
+            .where(
+                tuple_(TimeTrackDaily.user_id, TimeTrackDaily.task_id, TimeTrackDaily.day).in_(list(deltas)),
+                TimeTrackDaily.total_seconds == 0,
+                TimeTrackDaily.track_count == 0,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def expected_rollup(db: AsyncSession, user_id: Optional[int] = None) -> Rollup:
+    query = (
+        select(Task.owner_id, TimeTrack.task_id, TimeTrack.start_time, TimeTrack.duration)
+        .join(Task, Task.id == TimeTrack.task_id)
+        .where(TimeTrack.duration.is_not(None))
+        .execution_options(yield_per=REBUILD_CHUNK_SIZE)
+    )
+    if user_id is not None:
+        query = query.where(Task.owner_id == user_id)
+
+    rollup: Rollup = defaultdict(lambda: [0, 0])
+    async for track in await db.stream(query):
+        add_track(rollup, track.owner_id, track.task_id, track)
+
+    return {key: totals for key, totals in rollup.items() if totals != [0, 0]}
+
+
+async def stored_rollup(db: AsyncSession, user_id: Optional[int] = None) -> Rollup:
+    query = select(
+        TimeTrackDaily.user_id,
+        TimeTrackDaily.task_id,
+        TimeTrackDaily.day,
+        TimeTrackDaily.total_seconds,
+        TimeTrackDaily.track_count,
+    )
+    if user_id is not None:
+        query = query.where(TimeTrackDaily.user_id == user_id)
+
+    result = await db.execute(query)
+    return {
+        (row_user_id, task_id, day): [seconds, count]
+        for row_user_id, task_id, day, seconds, count in result
+        if (seconds, count) != (0, 0)
+    }
+
+
+async def verify_rollup(
+        db: AsyncSession, user_id: Optional[int] = None,
+) -> List[Tuple[RollupKey, Optional[List[int]], Optional[List[int]]]]:
+    """(key, expected, stored) for every rollup row that is wrong or missing."""
+    expected = await expected_rollup(db, user_id)
+    stored = await stored_rollup(db, user_id)
+    return [
+        (key, expected.get(key), stored.get(key))
+        for key in sorted(expected.keys() | stored.keys())
+        if expected.get(key) != stored.get(key)
+    ]
+
+
+async def rebuild_rollup(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Replace the stored rollup with one computed from the time tracks."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Hold off the endpoints' incremental updates until the new rows are in
+        await db.execute(text("LOCK TABLE time_track_daily IN EXCLUSIVE MODE"))
+
+    rows = [
+        {"user_id": row_user_id, "task_id": task_id, "day": day, "total_seconds": seconds, "track_count": count}
+        for (row_user_id, task_id, day), (seconds, count) in (await expected_rollup(db, user_id)).items()
+    ]
+
+    query = delete(TimeTrackDaily)
+    if user_id is not None:
+        query = query.where(TimeTrackDaily.user_id == user_id)
+    await db.execute(query)
+
+    for start in range(0, len(rows), REBUILD_CHUNK_SIZE):
+        await db.execute(insert(TimeTrackDaily), rows[start:start + REBUILD_CHUNK_SIZE])
+
+    await db.commit()
+    return len(rows)
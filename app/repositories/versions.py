@@ -0,0 +1,43 @@
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sql import upsert
+from app.models import CollectionVersion
+
+# Collection names, one version each per user
+TASKS = "tasks"
+REMINDERS = "reminders"
+TIME_TRACKS = "time_tracks"
+
+
+async def bump_version(db: AsyncSession, name: str, user_ids: Iterable[int]) -> None:
+    """
+    Advance the users' version of collection `name`, in the caller's
+    transaction. Every write to the collection must call this before it
+    commits, or clients keep a stale copy on the strength of a 304.
+    """
+    # Sorted and unique: one upsert may not touch a row twice, and a
+    # consistent lock order keeps concurrent bumps from deadlocking
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+
+    statement = upsert(db, CollectionVersion).values([
+        {"user_id": user_id, "name": name, "version": 1} for user_id in user_ids
+    ])
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[CollectionVersion.user_id, CollectionVersion.name],
+        set_={"version": CollectionVersion.version + 1},
+    ))
+
+
+async def collection_version(db: AsyncSession, user_id: int, name: str) -> int:
+    """The user's current version of collection `name`, 0 before its first write."""
+    result = await db.execute(
+        select(CollectionVersion.version).where(
+            CollectionVersion.user_id == user_id, CollectionVersion.name == name
+        )
+    )
+    return result.scalar() or 0
@@ -11,16 +11,31 @@ from app.schemas.task import (
     TaskCreate,
     TaskUpdate,
     TaskInDB,
+    TaskBulkCreate,
+    TaskBulkUpdateItem,
+    TaskBulkUpdate,
+    TaskBulkDelete,
+    TaskBulkResult,
+    TaskSync,
+    ImportRowError,
+    ImportResult,
     RecurringTask,
     RecurringTaskCreate,
     RecurringTaskUpdate,
     RecurringTaskInDB,
     TimeTrack,
     TimeTrackCreate,
+    TimeTrackImport,
     TimeTrackUpdate,
     TimeTrackInDB,
+    TimeTotal,
+    PeriodTimeTotal,
+    TaskTimeTotal,
+    DurationHistogram,
+    TimeReport,
     Reminder,
     ReminderCreate,
+    ReminderImport,
     ReminderUpdate,
     ReminderInDB,
     TelegramUser,
@@ -40,16 +55,31 @@ __all__ = [
     "TaskCreate",
     "TaskUpdate",
     "TaskInDB",
+    "TaskBulkCreate",
+    "TaskBulkUpdateItem",
+    "TaskBulkUpdate",
+    "TaskBulkDelete",
+    "TaskBulkResult",
+    "TaskSync",
+    "ImportRowError",
+    "ImportResult",
     "RecurringTask",
     "RecurringTaskCreate",
     "RecurringTaskUpdate",
     "RecurringTaskInDB",
     "TimeTrack",
     "TimeTrackCreate",
+    "TimeTrackImport",
     "TimeTrackUpdate",
     "TimeTrackInDB",
+    "TimeTotal",
+    "PeriodTimeTotal",
+    "TaskTimeTotal",
+    "DurationHistogram",
+    "TimeReport",
     "Reminder",
     "ReminderCreate",
+    "ReminderImport",
     "ReminderUpdate",
     "ReminderInDB",
     "TelegramUser",
@@ -1,18 +1,34 @@
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime, timezone
+from typing import Annotated, Dict, List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
 
+from app.core.config import settings
 from app.models.task import TaskCategory, TaskPriority, TaskStatus
 
 
+def to_naive_utc(value: datetime) -> datetime:
+    # Columns are naive UTC (DateTime without time zone); asyncpg refuses
+    # aware values for them, so offsets are applied here
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Timestamp input: with an offset or "Z", converted to naive UTC
+UTCDatetime = Annotated[datetime, AfterValidator(to_naive_utc)]
+
+# Integer input for INTEGER columns, which hold 32 bits
+Int32 = Annotated[int, Field(ge=-2**31, le=2**31 - 1)]
+
+
 class TaskBase(BaseModel):
-    title: str
+    title: str = Field(..., max_length=255)
     description: Optional[str] = None
     status: TaskStatus = TaskStatus.TODO
     priority: TaskPriority = TaskPriority.MEDIUM
     category: TaskCategory = TaskCategory.OTHER
-    due_date: Optional[datetime] = None
+    due_date: Optional[UTCDatetime] = None
 
 
 class TaskCreate(TaskBase):
@@ -20,12 +36,12 @@ class TaskCreate(TaskBase):
 
 
 class TaskUpdate(BaseModel):
-    title: Optional[str] = None
+    title: Optional[str] = Field(None, max_length=255)
     description: Optional[str] = None
     status: Optional[TaskStatus] = None
     priority: Optional[TaskPriority] = None
     category: Optional[TaskCategory] = None
-    due_date: Optional[datetime] = None
+    due_date: Optional[UTCDatetime] = None
 
 
 class TaskInDB(TaskBase):
@@ -35,39 +51,90 @@ class TaskInDB(TaskBase):
     updated_at: datetime
     completed_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Task(TaskInDB):
     pass
 
 
+# Bulk task schemas
+class TaskBulkCreate(BaseModel):
+    items: List[TaskCreate] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+
+class TaskBulkUpdate(BaseModel):
+    items: List[TaskBulkUpdateItem] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class TaskBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class TaskBulkResult(BaseModel):
+    id: Optional[int] = None
+    status: str  # created, updated, deleted, not_found
+    task: Optional[Task] = None
+
+
+# Delta sync schemas
+class TaskSync(BaseModel):
+    tasks: List[Task]  # created or updated since the watermark
+    deleted: List[int]  # ids of tasks deleted since the watermark
+    watermark: str  # pass back as `since` on the next sync
+    has_more: bool  # another page is ready right away
+
+
+# Bulk import schemas
+class ImportRowError(BaseModel):
+    line: int  # line of the input file the row ends on
+    error: str
+
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]  # the first IMPORT_MAX_ERRORS failures
+
+
 # RecurringTask schemas
+# Frequencies and BYDAY lists app.utils.recurrence can expand
+RecurrenceFrequency = Literal["daily", "weekly", "monthly"]
+WEEKDAY_LIST_PATTERN = r"^(MO|TU|WE|TH|FR|SA|SU)(,(MO|TU|WE|TH|FR|SA|SU))*$"
+
+
 class RecurringTaskBase(BaseModel):
     frequency: str
     interval: int = 1
-    start_date: datetime
-    end_date: Optional[datetime] = None
+    start_date: UTCDatetime
+    end_date: Optional[UTCDatetime] = None
+    by_weekday: Optional[str] = None  # e.g. "MO,WE,FR"
 
 
 class RecurringTaskCreate(RecurringTaskBase):
-    pass
+    frequency: RecurrenceFrequency
+    interval: int = Field(1, ge=1)
+    by_weekday: Optional[str] = Field(None, pattern=WEEKDAY_LIST_PATTERN)
 
 
 class RecurringTaskUpdate(BaseModel):
-    frequency: Optional[str] = None
-    interval: Optional[int] = None
-    start_date: Optional[datetime] = None
-    end_date: Optional[datetime] = None
+    frequency: Optional[RecurrenceFrequency] = None
+    interval: Optional[int] = Field(None, ge=1)
+    start_date: Optional[UTCDatetime] = None
+    end_date: Optional[UTCDatetime] = None
+    by_weekday: Optional[str] = Field(None, pattern=WEEKDAY_LIST_PATTERN)
 
 
 class RecurringTaskInDB(RecurringTaskBase):
     id: int
     task_id: int
+    materialized_until: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class RecurringTask(RecurringTaskInDB):
@@ -76,35 +143,70 @@ class RecurringTask(RecurringTaskInDB):
 
 # TimeTrack schemas
 class TimeTrackBase(BaseModel):
-    start_time: datetime
-    end_time: Optional[datetime] = None
-    duration: Optional[int] = None  # in seconds
+    start_time: UTCDatetime
+    end_time: Optional[UTCDatetime] = None
+    duration: Optional[Int32] = None  # in seconds
 
 
 class TimeTrackCreate(TimeTrackBase):
     pass
 
 
+class TimeTrackImport(TimeTrackCreate):
+    task_id: Int32
+
+
 class TimeTrackUpdate(BaseModel):
-    end_time: Optional[datetime] = None
-    duration: Optional[int] = None
+    end_time: Optional[UTCDatetime] = None
+    duration: Optional[Int32] = None
 
 
 class TimeTrackInDB(TimeTrackBase):
     id: int
     task_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TimeTrack(TimeTrackInDB):
     pass
 
 
+# Time report schemas
+class TimeTotal(BaseModel):
+    total_seconds: int
+    count: int  # finished time tracks, counted on the day they started
+
+
+class PeriodTimeTotal(TimeTotal):
+    period: date  # the day, or the Monday of the week
+
+
+class TaskTimeTotal(TimeTotal):
+    task_id: int
+    title: str
+
+
+class DurationHistogram(BaseModel):
+    bin_edges: List[float]  # len(counts) + 1 edges, in seconds
+    counts: List[int]
+
+
+class TimeReport(TimeTotal):
+    date_from: date
+    date_to: date
+    by_day: List[PeriodTimeTotal]
+    by_week: List[PeriodTimeTotal]
+    by_task: List[TaskTimeTotal]
+    by_category: Dict[TaskCategory, TimeTotal]
+    by_priority: Dict[TaskPriority, TimeTotal]
+    percentiles: Dict[str, float]  # p50, p90, p95, p99 of the durations
+    histogram: DurationHistogram
+
+
 # Reminder schemas
 class ReminderBase(BaseModel):
-    reminder_time: datetime
+    reminder_time: UTCDatetime
     is_sent: bool = False
 
 
@@ -112,17 +214,21 @@ class ReminderCreate(ReminderBase):
     pass
 
 
+class ReminderImport(ReminderCreate):
+    task_id: Int32
+
+
 class ReminderUpdate(BaseModel):
-    reminder_time: Optional[datetime] = None
+    reminder_time: Optional[UTCDatetime] = None
     is_sent: Optional[bool] = None
 
 
 class ReminderInDB(ReminderBase):
     id: int
     task_id: int
+    delivery_error: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Reminder(ReminderInDB):
@@ -150,8 +256,7 @@ class TelegramUserInDB(TelegramUserBase):
     id: int
     user_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TelegramUser(TelegramUserInDB):
@@ -1,11 +1,11 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from aiogram import Bot, Dispatcher, F, Router
 from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from prometheus_client import start_http_server
 from sqlalchemy import and_, or_
@@ -13,7 +13,17 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.db import SessionLocal
-from app.models import Reminder, Task, TelegramUser, User
+from app.models import Task, TelegramUser, User
+from app.repositories import run_materializer
+from app.telegram.delivery import ReminderSender
+from app.telegram.formatting import (
+    CATEGORY_EMOJI,
+    PRIORITY_EMOJI,
+    STATUS_EMOJI,
+    format_task_message,
+)
+from app.telegram.queries import task_page, tasks_by_group
+from app.telegram.scheduler import ReminderScheduler
 from app.utils.metrics import record_telegram_notification
 
 # Configure logging
@@ -48,46 +58,6 @@ def get_user_by_telegram_id(telegram_id: int, db: Session) -> Optional[User]:
     return user
 
 
-# Function to format task message
-def format_task_message(task: Task) -> str:
-    status_emoji = {
-        "todo": "🔲",
-        "in_progress": "🔄",
-        "done": "✅",
-        "canceled": "❌",
-    }
-
-    priority_emoji = {
-        "low": "⬇️",
-        "medium": "➡️",
-        "high": "⬆️",
-        "urgent": "🔥",
-    }
-
-    category_emoji = {
-        "personal": "👤",
-        "work": "💼",
-        "health": "🏥",
-        "education": "📚",
-        "other": "📋",
-    }
-
-    due_date_str = f"Due: {task.due_date.strftime('%Y-%m-%d %H:%M')}" if task.due_date else "No due date"
-
-    message = (
-        f"{status_emoji.get(task.status.value, '🔲')} "
-        f"{priority_emoji.get(task.priority.value, '➡️')} "
-        f"{category_emoji.get(task.category.value, '📋')} "
-        f"<b>{task.title}</b>\n"
-        f"{due_date_str}\n"
-    )
-
-    if task.description:
-        message += f"\n{task.description}\n"
-
-    return message
-
-
 # Command handlers
 @router.message(Command("start"))
 async def cmd_start(message: Message):
@@ -112,8 +82,56 @@ async def cmd_help(message: Message):
     await message.answer(help_text)
 
 
-@router.message(Command("tasks"))
-async def cmd_tasks(message: Message):
+# Paginated task lists: name -> (heading, empty message, page size).
+# Page buttons carry "<name>:<page>" as callback data
+TASK_LISTS = {
+    "tasks": ("Your tasks", "You don't have any tasks.", 10),
+    "week": ("Tasks due this week", "You don't have any tasks due this week.", 15),
+}
+
+
+def build_task_list_page(
+        db: Session, user: User, name: str, page: int
+) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    heading, empty_message, page_size = TASK_LISTS[name]
+
+    due_from = due_until = None
+    if name == "week":
+        due_from = datetime.utcnow().date()
+        due_until = due_from + timedelta(days=7)
+
+    page = max(page, 0)
+    tasks, total = task_page(db, user.id, page * page_size, page_size, due_from, due_until)
+
+    if total == 0:
+        return empty_message, None
+
+    if not tasks:
+        # Tasks were removed since the keyboard was sent: show the last page
+        page = (total - 1) // page_size
+        tasks, total = task_page(db, user.id, page * page_size, page_size, due_from, due_until)
+
+    response = f"{heading}:\n\n"
+    for task in tasks:
+        response += format_task_message(task) + "\n"
+
+    if total <= page_size:
+        return response, None
+
+    first = page * page_size + 1
+    last = page * page_size + len(tasks)
+    response += f"\nShowing {first}-{last} of {total} tasks."
+
+    builder = InlineKeyboardBuilder()
+    if page > 0:
+        builder.button(text="« Previous", callback_data=f"{name}:{page - 1}")
+    if last < total:
+        builder.button(text="Next »", callback_data=f"{name}:{page + 1}")
+
+    return response, builder.as_markup()
+
+
+async def answer_task_list(message: Message, name: str):
     db = get_db()
     try:
         user = get_user_by_telegram_id(message.from_user.id, db)
@@ -125,26 +143,45 @@ async def cmd_tasks(message: Message):
             )
             return
 
-        tasks = db.query(Task).filter(Task.owner_id == user.id).all()
+        response, reply_markup = build_task_list_page(db, user, name, 0)
+        await message.answer(response, parse_mode="HTML", reply_markup=reply_markup)
 
-        if not tasks:
-            await message.answer("You don't have any tasks.")
-            return
+        # Record metric
+        record_telegram_notification("success")
+    except Exception as e:
+        logger.error(f"Error in cmd_{name}: {e}")
+        await message.answer("An error occurred while fetching your tasks.")
+        record_telegram_notification("error")
+    finally:
+        db.close()
 
-        response = "Your tasks:\n\n"
-        for task in tasks[:10]:  # Limit to 10 tasks
-            response += format_task_message(task) + "\n"
 
-        if len(tasks) > 10:
-            response += f"\nShowing 10 of {len(tasks)} tasks. Use web interface to see all tasks."
+@router.message(Command("tasks"))
+async def cmd_tasks(message: Message):
+    await answer_task_list(message, "tasks")
 
-        await message.answer(response, parse_mode="HTML")
+
+@router.callback_query(F.data.regexp(r"^(tasks|week):\d+$"))
+async def paginate_task_list(callback: CallbackQuery):
+    name, page = callback.data.split(":")
+
+    db = get_db()
+    try:
+        user = get_user_by_telegram_id(callback.from_user.id, db)
+
+        if not user:
+            await callback.answer("Your Telegram account is no longer connected.", show_alert=True)
+            return
+
+        response, reply_markup = build_task_list_page(db, user, name, int(page))
+        await callback.message.edit_text(response, parse_mode="HTML", reply_markup=reply_markup)
+        await callback.answer()
 
         # Record metric
         record_telegram_notification("success")
     except Exception as e:
-        logger.error(f"Error in cmd_tasks: {e}")
-        await message.answer("An error occurred while fetching your tasks.")
+        logger.error(f"Error in paginate_task_list: {e}")
+        await callback.answer("An error occurred while fetching your tasks.")
         record_telegram_notification("error")
     finally:
         db.close()
@@ -198,6 +235,13 @@ async def cmd_today(message: Message):
 
 @router.message(Command("week"))
 async def cmd_week(message: Message):
+    await answer_task_list(message, "week")
+
+
+# Shared body of /status, /priority and /category
+async def answer_tasks_by_group(
+        message: Message, column, groups: List[str], emoji: Dict[str, str], heading: str, command: str,
+):
     db = get_db()
     try:
         user = get_user_by_telegram_id(message.from_user.id, db)
@@ -209,36 +253,30 @@ async def cmd_week(message: Message):
             )
             return
 
-        today = datetime.utcnow().date()
-        week_later = today + timedelta(days=7)
+        grouped = tasks_by_group(db, user.id, column, limit=5)  # Limit to 5 tasks per group
 
-        tasks = (
-            db.query(Task)
-            .filter(
-                Task.owner_id == user.id,
-                Task.due_date >= today,
-                Task.due_date < week_later,
-            )
-            .all()
-        )
+        response = f"{heading}:\n\n"
+        for group in groups:
+            if group not in grouped:
+                continue
 
-        if not tasks:
-            await message.answer("You don't have any tasks due this week.")
-            return
+            titles, total = grouped[group]
+            response += f"\n{emoji.get(group, '')} <b>{group.upper()}</b>:\n"
+            for title in titles:
+                response += f"- {title}\n"
 
-        response = "Tasks due this week:\n\n"
-        for task in tasks[:15]:  # Limit to 15 tasks
-            response += format_task_message(task) + "\n"
+            if total > len(titles):
+                response += f"  ... and {total - len(titles)} more\n"
 
-        if len(tasks) > 15:
-            response += f"\nShowing 15 of {len(tasks)} tasks. Use web interface to see all tasks."
+        if not grouped:
+            response = "You don't have any tasks."
 
         await message.answer(response, parse_mode="HTML")
 
         # Record metric
         record_telegram_notification("success")
     except Exception as e:
-        logger.error(f"Error in cmd_week: {e}")
+        logger.error(f"Error in {command}: {e}")
         await message.answer("An error occurred while fetching your tasks.")
         record_telegram_notification("error")
     finally:
@@ -247,219 +285,38 @@ async def cmd_week(message: Message):
 
 @router.message(Command("status"))
 async def cmd_status(message: Message):
-    db = get_db()
-    try:
-        user = get_user_by_telegram_id(message.from_user.id, db)
-
-        if not user:
-            await message.answer(
-                "You need to connect your Telegram account with the Task Manager. "
-                "Please use the web interface to connect your account."
-            )
-            return
-
-        statuses = ["todo", "in_progress", "done", "canceled"]
-
-        response = "Tasks by status:\n\n"
-        for status in statuses:
-            tasks = (
-                db.query(Task)
-                .filter(Task.owner_id == user.id, Task.status == status)
-                .all()
-            )
-
-            if tasks:
-                status_emoji = {
-                    "todo": "🔲",
-                    "in_progress": "🔄",
-                    "done": "✅",
-                    "canceled": "❌",
-                }
-                response += f"\n{status_emoji.get(status, '')} <b>{status.upper()}</b>:\n"
-                for task in tasks[:5]:  # Limit to 5 tasks per status
-                    response += f"- {task.title}\n"
-
-                if len(tasks) > 5:
-                    response += f"  ... and {len(tasks) - 5} more\n"
-
-        if response == "Tasks by status:\n\n":
-            response = "You don't have any tasks."
-
-        await message.answer(response, parse_mode="HTML")
-
-        # Record metric
-        record_telegram_notification("success")
-    except Exception as e:
-        logger.error(f"Error in cmd_status: {e}")
-        await message.answer("An error occurred while fetching your tasks.")
-        record_telegram_notification("error")
-    finally:
-        db.close()
+    await answer_tasks_by_group(
+        message,
+        Task.status,
+        ["todo", "in_progress", "done", "canceled"],
+        STATUS_EMOJI,
+        "Tasks by status",
+        "cmd_status",
+    )
 
 
 @router.message(Command("priority"))
 async def cmd_priority(message: Message):
-    db = get_db()
-    try:
-        user = get_user_by_telegram_id(message.from_user.id, db)
-
-        if not user:
-            await message.answer(
-                "You need to connect your Telegram account with the Task Manager. "
-                "Please use the web interface to connect your account."
-            )
-            return
-
-        priorities = ["urgent", "high", "medium", "low"]
-
-        response = "Tasks by priority:\n\n"
-        for priority in priorities:
-            tasks = (
-                db.query(Task)
-                .filter(Task.owner_id == user.id, Task.priority == priority)
-                .all()
-            )
-
-            if tasks:
-                priority_emoji = {
-                    "low": "⬇️",
-                    "medium": "➡️",
-                    "high": "⬆️",
-                    "urgent": "🔥",
-                }
-                response += f"\n{priority_emoji.get(priority, '')} <b>{priority.upper()}</b>:\n"
-                for task in tasks[:5]:  # Limit to 5 tasks per priority
-                    response += f"- {task.title}\n"
-
-                if len(tasks) > 5:
-                    response += f"  ... and {len(tasks) - 5} more\n"
-
-        if response == "Tasks by priority:\n\n":
-            response = "You don't have any tasks."
-
-        await message.answer(response, parse_mode="HTML")
-
-        # Record metric
-        record_telegram_notification("success")
-    except Exception as e:
-        logger.error(f"Error in cmd_priority: {e}")
-        await message.answer("An error occurred while fetching your tasks.")
-        record_telegram_notification("error")
-    finally:
-        db.close()
+    await answer_tasks_by_group(
+        message,
+        Task.priority,
+        ["urgent", "high", "medium", "low"],
+        PRIORITY_EMOJI,
+        "Tasks by priority",
+        "cmd_priority",
+    )
 
 
 @router.message(Command("category"))
 async def cmd_category(message: Message):
-    db = get_db()
-    try:
-        user = get_user_by_telegram_id(message.from_user.id, db)
-
-        if not user:
-            await message.answer(
-                "You need to connect your Telegram account with the Task Manager. "
-                "Please use the web interface to connect your account."
-            )
-            return
-
-        categories = ["work", "personal", "health", "education", "other"]
-
-        response = "Tasks by category:\n\n"
-        for category in categories:
-            tasks = (
-                db.query(Task)
-                .filter(Task.owner_id == user.id, Task.category == category)
-                .all()
-            )
-
-            if tasks:
-                category_emoji = {
-                    "personal": "👤",
-                    "work": "💼",
-                    "health": "🏥",
-                    "education": "📚",
-                    "other": "📋",
-                }
-                response += f"\n{category_emoji.get(category, '')} <b>{category.upper()}</b>:\n"
-                for task in tasks[:5]:  # Limit to 5 tasks per category
-                    response += f"- {task.title}\n"
-
-                if len(tasks) > 5:
-                    response += f"  ... and {len(tasks) - 5} more\n"
-
-        if response == "Tasks by category:\n\n":
-            response = "You don't have any tasks."
-
-        await message.answer(response, parse_mode="HTML")
-
-        # Record metric
-        record_telegram_notification("success")
-    except Exception as e:
-        logger.error(f"Error in cmd_category: {e}")
-        await message.answer("An error occurred while fetching your tasks.")
-        record_telegram_notification("error")
-    finally:
-        db.close()
-
-
-# Function to check and send reminders
-async def check_reminders(bot: Bot):
-    while True:
-        try:
-            db = get_db()
-            now = datetime.utcnow()
-            five_minutes_ago = now - timedelta(minutes=5)
-
-            # Find reminders that need to be sent
-            reminders = (
-                db.query(Reminder)
-                .filter(
-                    Reminder.is_sent == False,
-                    Reminder.reminder_time <= now,
-                    Reminder.reminder_time >= five_minutes_ago,
-                )
-                .all()
-            )
-
-            for reminder in reminders:
-                task = db.query(Task).filter(Task.id == reminder.task_id).first()
-
-                if task:
-                    # Get user's Telegram info
-                    telegram_user = (
-                        db.query(TelegramUser)
-                        .filter(TelegramUser.user_id == task.owner_id)
-                        .first()
-                    )
-
-                    if telegram_user and telegram_user.is_active:
-                        # Send reminder
-                        message = f"🔔 <b>Reminder</b> 🔔\n\n{format_task_message(task)}"
-
-                        try:
-                            await bot.send_message(
-                                chat_id=telegram_user.chat_id,
-                                text=message,
-                                parse_mode="HTML",
-                            )
-
-                            # Mark reminder as sent
-                            reminder.is_sent = True
-                            db.add(reminder)
-                            db.commit()
-
-                            # Record metric
-                            record_telegram_notification("success")
-                        except Exception as e:
-                            logger.error(f"Error sending reminder: {e}")
-                            record_telegram_notification("error")
-
-            db.close()
-        except Exception as e:
-            logger.error(f"Error in check_reminders: {e}")
-
-        # Check every minute
-        await asyncio.sleep(60)
+    await answer_tasks_by_group(
+        message,
+        Task.category,
+        ["work", "personal", "health", "education", "other"],
+        CATEGORY_EMOJI,
+        "Tasks by category",
+        "cmd_category",
+    )
 
 
 async def main():
@@ -471,8 +328,13 @@ async def main():
     dp = Dispatcher()
     dp.include_router(router)
 
-    # Start reminder checker
-    asyncio.create_task(check_reminders(bot))
+    # Start reminder scheduler
+    sender = ReminderSender(bot)
+    scheduler = ReminderScheduler(deliver=sender.deliver)
+    asyncio.create_task(scheduler.run())
+
+    # Materialize recurring task occurrences
+    asyncio.create_task(run_materializer())
 
     # Start polling
     await dp.start_polling(bot)
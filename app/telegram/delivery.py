@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.models import Reminder, Task, TelegramUser
+from app.repositories import bump_version
+from app.repositories.versions import REMINDERS
+from app.telegram.formatting import format_task_message
+from app.utils.metrics import record_telegram_notification
+
+logger = logging.getLogger(__name__)
+
+# Errors that sending again will not fix: the chat blocked the bot or is
+# gone, or Telegram refuses the message itself
+UNDELIVERABLE_ERRORS = (TelegramForbiddenError, TelegramBadRequest, TelegramNotFound)
+
+
+class TokenBucket:
+    """
+    Asyncio token bucket: `rate` tokens per second, bursts of up to
+    `capacity`. Waiters are served one at a time in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self._tokens >= self.capacity
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next `seconds` (Telegram flood control)."""
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class ReminderSender:
+    """
+    Delivers due reminders through a bounded pool of concurrent senders.
+
+    Reminders are loaded together with their task and chat id in one joined
+    query, grouped by chat and sent by `workers` concurrent workers. Every
+    message takes a token from the chat's bucket and from the bot-wide
+    bucket, so delivery stays inside Telegram's rate limits. RetryAfter
+    pauses the bot-wide bucket for the requested time before the message is
+    retried. Reminders are processed in batches of `batch_size` and every
+    batch is marked sent with a single UPDATE.
+
+    Reminders that can never be delivered (the owner has no active Telegram
+    chat, the chat blocked the bot, UNDELIVERABLE_ERRORS) get their
+    delivery_error set instead and are not loaded again. deliver() returns
+    the ids of reminders that failed otherwise, for the caller to retry.
+    """
+
+    def __init__(
+            self,
+            bot: Bot,
+            session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+            workers: int = settings.REMINDER_DELIVERY_WORKERS,
+            batch_size: int = settings.REMINDER_DELIVERY_BATCH_SIZE,
+            global_rate: float = settings.TELEGRAM_GLOBAL_RATE_PER_SECOND,
+            chat_rate: float = settings.TELEGRAM_CHAT_RATE_PER_SECOND,
+            max_retries: int = settings.TELEGRAM_MAX_RETRIES,
+    ):
+        self._bot = bot
+        self._session_factory = session_factory
+        self._workers = workers
+        self._batch_size = batch_size
+        self._chat_rate = chat_rate
+        self._max_retries = max_retries
+
+        self._global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+
+    async def deliver(self, reminder_ids: List[int]) -> List[int]:
+        failed: List[int] = []
+        for start in range(0, len(reminder_ids), self._batch_size):
+            failed.extend(await self._deliver_batch(reminder_ids[start:start + self._batch_size]))
+        return failed
+
+    async def _load(self, reminder_ids: List[int]) -> Tuple[Dict[int, List[Tuple[int, str]]], Dict[int, str]]:
+        # Re-check is_sent: the reminder may have been sent or deleted since
+        # it was scheduled
+        query = (
+            select(Reminder.id, Task, TelegramUser.chat_id)
+            .outerjoin(Task, Task.id == Reminder.task_id)
+            .outerjoin(
+                TelegramUser, and_(TelegramUser.user_id == Task.owner_id, TelegramUser.is_active.is_(True)),
+            )
+            .where(
+                Reminder.id.in_(reminder_ids),
+                Reminder.is_sent.is_(False),
+                Reminder.delivery_error.is_(None),
+            )
+            .order_by(Reminder.reminder_time, Reminder.id)
+        )
+
+        by_chat: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+        undeliverable: Dict[int, str] = {}
+        async with self._session_factory() as db:
+            result = await db.execute(query)
+            for reminder_id, task, chat_id in result:
+                if task is None:
+                    undeliverable[reminder_id] = "Task deleted"
+                elif chat_id is None:
+                    undeliverable[reminder_id] = "No active Telegram chat"
+                else:
+                    message = f"🔔 <b>Reminder</b> 🔔\n\n{format_task_message(task)}"
+                    by_chat[chat_id].append((reminder_id, message))
+
+        return by_chat, undeliverable
+
+    async def _deliver_batch(self, reminder_ids: List[int]) -> List[int]:
+        by_chat, undeliverable = await self._load(reminder_ids)
+        if not by_chat:
+            await self._mark_undeliverable(undeliverable)
+            return []
+
+        # One queue entry per chat: a chat's reminders go out in order from a
+        # single worker, so no two workers wait on the same chat bucket
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in by_chat.items():
+            queue.put_nowait(item)
+
+        sent: List[int] = []
+        failed: List[int] = []
+
+        async def worker() -> None:
+            while not queue.empty():
+                chat_id, messages = queue.get_nowait()
+                for index, (reminder_id, message) in enumerate(messages):
+                    try:
+                        if await self._send(chat_id, message):
+                            sent.append(reminder_id)
+                        else:
+                            failed.append(reminder_id)
+                    except TelegramForbiddenError as e:
+                        # Blocked or removed: the rest of the chat's
+                        # reminders fail the same way
+                        for pending_id, _ in messages[index:]:
+                            undeliverable[pending_id] = e.message
+                        break
+                    except UNDELIVERABLE_ERRORS as e:
+                        undeliverable[reminder_id] = e.message
+
+        await asyncio.gather(*(worker() for _ in range(min(self._workers, len(by_chat)))))
+
+        await self._mark(sent, is_sent=True)
+        await self._mark_undeliverable(undeliverable)
+
+        # Idle chats are back at full capacity and need no bucket
+        for chat_id in [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.full]:
+            del self._chat_buckets[chat_id]
+
+        return failed
+
+    async def _send(self, chat_id: int, message: str) -> bool:
+        chat_bucket = self._chat_buckets.get(chat_id)
+        if chat_bucket is None:
+            chat_bucket = self._chat_buckets[chat_id] = TokenBucket(self._chat_rate, capacity=1)
+
+        for attempt in range(self._max_retries + 1):
+            await chat_bucket.acquire()
+            await self._global_bucket.acquire()
+            try:
+                await self._bot.send_message(chat_id=chat_id, text=message, parse_mode="HTML")
+                record_telegram_notification("success")
+                return True
+            except TelegramRetryAfter as e:
+                logger.warning(f"Telegram flood control, retrying in {e.retry_after}s")
+                record_telegram_notification("retry_after")
+                self._global_bucket.pause(e.retry_after)
+            except UNDELIVERABLE_ERRORS as e:
+                logger.warning(f"Reminder for chat {chat_id} cannot be delivered: {e.message}")
+                record_telegram_notification("undeliverable")
+                raise
+            except Exception as e:
+                logger.error(f"Error sending reminder: {e}")
+                record_telegram_notification("error")
+                return False
+
+        logger.error(f"Giving up on reminder for chat {chat_id} after {self._max_retries} retries")
+        record_telegram_notification("error")
+        return False
+
+    async def _mark_undeliverable(self, errors: Dict[int, str]) -> None:
+        by_error: Dict[str, List[int]] = defaultdict(list)
+        for reminder_id, error in errors.items():
+            by_error[error[:255]].append(reminder_id)
+        for error, reminder_ids in by_error.items():
+            await self._mark(reminder_ids, delivery_error=error)
+
+    async def _mark(self, reminder_ids: List[int], **values: Any) -> None:
+        if not reminder_ids:
+            return
+
+        owner_id = select(Task.owner_id).where(Task.id == Reminder.task_id).scalar_subquery()
+        async with self._session_factory() as db:
+            result = await db.execute(
+                update(Reminder)
+                .where(Reminder.id.in_(reminder_ids))
+                .values(**values)
+                .returning(owner_id)
+                .execution_options(synchronize_session=False)
+            )
+            # A reminder whose task was deleted is in nobody's collection
+            owner_ids = [owner_id for owner_id in result.scalars().all() if owner_id is not None]
+            await bump_version(db, REMINDERS, owner_ids)
+            await db.commit()
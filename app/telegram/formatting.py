@@ -0,0 +1,41 @@
+from app.models import Task
+
+STATUS_EMOJI = {
+    "todo": "🔲",
+    "in_progress": "🔄",
+    "done": "✅",
+    "canceled": "❌",
+}
+
+PRIORITY_EMOJI = {
+    "low": "⬇️",
+    "medium": "➡️",
+    "high": "⬆️",
+    "urgent": "🔥",
+}
+
+CATEGORY_EMOJI = {
+    "personal": "👤",
+    "work": "💼",
+    "health": "🏥",
+    "education": "📚",
+    "other": "📋",
+}
+
+
+# Function to format task message
+def format_task_message(task: Task) -> str:
+    due_date_str = f"Due: {task.due_date.strftime('%Y-%m-%d %H:%M')}" if task.due_date else "No due date"
+
+    message = (
+        f"{STATUS_EMOJI.get(task.status.value, '🔲')} "
+        f"{PRIORITY_EMOJI.get(task.priority.value, '➡️')} "
+        f"{CATEGORY_EMOJI.get(task.category.value, '📋')} "
+        f"<b>{task.title}</b>\n"
+        f"{due_date_str}\n"
+    )
+
+    if task.description:
+        message += f"\n{task.description}\n"
+
+    return message
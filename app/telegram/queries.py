@@ -0,0 +1,80 @@
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from app.models import Task
+
+
+def tasks_by_group(
+        db: Session, owner_id: int, column: InstrumentedAttribute, limit: int = 5,
+) -> Dict[str, Tuple[List[str], int]]:
+    """
+    First `limit` task titles and the total task count for every value of
+    `column` (status, priority or category) the user has tasks in, in a
+    single round trip.
+
+    Returns {enum value: (titles, total)}.
+    """
+    ranked = (
+        select(
+            column.label("group"),
+            Task.title,
+            func.row_number().over(partition_by=column, order_by=Task.id).label("position"),
+            func.count().over(partition_by=column).label("total"),
+        )
+        .where(Task.owner_id == owner_id)
+        .subquery()
+    )
+
+    rows = db.execute(
+        select(ranked.c.group, ranked.c.title, ranked.c.total)
+        .where(ranked.c.position <= limit)
+        .order_by(ranked.c.group, ranked.c.position)
+    )
+
+    groups: Dict[str, Tuple[List[str], int]] = {}
+    for group, title, total in rows:
+        if group is None:
+            continue
+        titles, _ = groups.setdefault(group.value, ([], total))
+        titles.append(title)
+    return groups
+
+
+def task_page(
+        db: Session,
+        owner_id: int,
+        offset: int,
+        limit: int,
+        due_from: Optional[date] = None,
+        due_until: Optional[date] = None,
+) -> Tuple[List[Task], int]:
+    """
+    One page of the user's tasks ordered by due date (NULLS LAST) and id,
+    plus the total number of matching tasks from a windowed count in the
+    same statement. Past the last page there is no row to carry the
+    windowed count, so the total falls back to a separate COUNT.
+    """
+    filters = [Task.owner_id == owner_id]
+    if due_from is not None:
+        filters.append(Task.due_date >= due_from)
+    if due_until is not None:
+        filters.append(Task.due_date < due_until)
+
+    rows = db.execute(
+        select(Task, func.count().over().label("total"))
+        .where(*filters)
+        .order_by(Task.due_date.asc().nulls_last(), Task.id)
+        .offset(offset)
+        .limit(limit)
+    ).all()
+
+    if rows:
+        return [task for task, _ in rows], rows[0].total
+    if offset == 0:
+        return [], 0
+
+    total = db.scalar(select(func.count()).select_from(Task).where(*filters))
+    return [], total
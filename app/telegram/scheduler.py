@@ -0,0 +1,302 @@
+import asyncio
+import heapq
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Collection, Dict, List, Optional, Tuple
+
+from sqlalchemy import false, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, db_uri
+from app.models import Reminder
+
+logger = logging.getLogger(__name__)
+
+# Channel the reminders trigger (migration 0003) publishes row changes on
+REMINDERS_CHANNEL = "reminders_changed"
+
+
+class ReminderScheduler:
+    """
+    Fires reminders at their due time instead of polling on a fixed interval.
+
+    Unsent reminders due before `loaded_until` are kept in a min-heap keyed by
+    reminder_time. The heap is filled one lookahead window at a time, the
+    loop sleeps exactly until the earliest entry, and Postgres
+    LISTEN/NOTIFY wakes it up when reminders are added, moved, sent or
+    deleted. A periodic re-scan of the loaded window, and of one lookahead
+    window before now, covers missed notifications and databases without
+    LISTEN support.
+
+    On start-up every unsent reminder already in the past is loaded too, so
+    reminders that fell due while the bot was down are delivered late
+    rather than dropped.
+
+    Due reminders are handed to `deliver` by a task of its own, so the loop
+    keeps time while a large batch waits on Telegram's rate limits;
+    reminders falling due meanwhile go out together with the next call.
+    `deliver` returns the ids it failed to deliver, if any. Those are
+    retried after `retry_delay`, doubled with every further failure, until
+    `max_attempts` deliveries have failed.
+    """
+
+    def __init__(
+            self,
+            deliver: Callable[[List[int]], Awaitable[Optional[List[int]]]],
+            session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+            lookahead: timedelta = timedelta(minutes=settings.REMINDER_LOOKAHEAD_MINUTES),
+            poll_interval: float = settings.REMINDER_POLL_INTERVAL_SECONDS,
+            listen_dsn: Optional[str] = db_uri,
+            retry_delay: timedelta = timedelta(seconds=settings.REMINDER_RETRY_SECONDS),
+            max_attempts: int = settings.REMINDER_MAX_ATTEMPTS,
+    ):
+        self._deliver = deliver
+        self._session_factory = session_factory
+        self._lookahead = lookahead
+        self._poll_interval = poll_interval
+        self._listen_dsn = listen_dsn
+        self._retry_delay = retry_delay
+        self._max_attempts = max_attempts
+
+        self._heap: List[Tuple[datetime, int]] = []
+        # reminder_id -> reminder_time of its live heap entry; heap entries
+        # that no longer match are stale and skipped when popped
+        self._scheduled: Dict[int, datetime] = {}
+        # reminder_id -> reminder_time already handed to deliver; a rescan
+        # does not hand the same reminder over again unless it was moved
+        self._dispatched: Dict[int, datetime] = {}
+        # reminder_id -> when to retry its failed delivery, and the number
+        # of failed deliveries so far; both only for dispatched reminders
+        self._retries: Dict[int, datetime] = {}
+        self._attempts: Dict[int, int] = {}
+        self._loaded_until: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
+        self._deliveries: asyncio.Queue = asyncio.Queue()
+
+    # Heap bookkeeping
+    def schedule(self, reminder_id: int, reminder_time: datetime) -> None:
+        if self._loaded_until is None or reminder_time >= self._loaded_until:
+            # Beyond the loaded window: picked up by a later window load
+            self.unschedule(reminder_id)
+            return
+
+        if reminder_time in (self._scheduled.get(reminder_id), self._dispatched.get(reminder_id)):
+            return
+
+        # New or moved: a fresh reminder as far as delivery goes
+        self.unschedule(reminder_id)
+        self._scheduled[reminder_id] = reminder_time
+        heapq.heappush(self._heap, (reminder_time, reminder_id))
+        self._wakeup.set()
+
+    def unschedule(self, reminder_id: int) -> None:
+        self._scheduled.pop(reminder_id, None)
+        self._dispatched.pop(reminder_id, None)
+        self._retries.pop(reminder_id, None)
+        self._attempts.pop(reminder_id, None)
+
+    def pop_due(self, now: datetime) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            reminder_time, reminder_id = heapq.heappop(self._heap)
+            if self._scheduled.get(reminder_id) == reminder_time:
+                del self._scheduled[reminder_id]
+                self._dispatched[reminder_id] = reminder_time
+                due.append(reminder_id)
+
+        for reminder_id, retry_at in list(self._retries.items()):
+            if retry_at <= now:
+                del self._retries[reminder_id]
+                due.append(reminder_id)
+        return due
+
+    def next_due(self) -> Optional[datetime]:
+        while self._heap and self._scheduled.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        candidates = list(self._retries.values())
+        if self._heap:
+            candidates.append(self._heap[0][0])
+        return min(candidates, default=None)
+
+    def settle(self, reminder_ids: Collection[int], failed: Collection[int], now: datetime) -> None:
+        """Record the outcome of a delivery; failed reminders are retried with backoff."""
+        failed = set(failed)
+        for reminder_id in reminder_ids:
+            if reminder_id not in failed:
+                self._attempts.pop(reminder_id, None)
+                continue
+            if reminder_id not in self._dispatched:
+                # Sent, moved, deleted or dropped by a rescan in the meantime
+                continue
+
+            attempts = self._attempts.get(reminder_id, 0) + 1
+            if attempts >= self._max_attempts:
+                logger.error(f"Giving up on reminder {reminder_id} after {attempts} failed deliveries")
+                self._attempts.pop(reminder_id, None)
+                continue
+            self._attempts[reminder_id] = attempts
+            self._retries[reminder_id] = now + self._retry_delay * 2 ** (attempts - 1)
+
+        if failed:
+            self._wakeup.set()
+
+    # Loading from the database
+    async def _fetch(self, since: Optional[datetime], until: datetime) -> List[Tuple[int, datetime]]:
+        # The partial index's exact predicate: Postgres does not match
+        # "is_sent IS false" against "is_sent = false"
+        query = select(Reminder.id, Reminder.reminder_time).where(
+            Reminder.is_sent == false(),
+            Reminder.delivery_error.is_(None),
+            Reminder.reminder_time < until,
+        )
+        if since is not None:
+            query = query.where(Reminder.reminder_time >= since)
+
+        async with self._session_factory() as db:
+            result = await db.execute(query)
+            return list(result.all())
+
+    async def load_next_window(self) -> None:
+        # The first load has no lower bound: that is the catch-up after downtime
+        since = self._loaded_until
+        until = datetime.utcnow() + self._lookahead
+        if since is not None and until <= since:
+            return
+
+        rows = await self._fetch(since, until)
+        self._loaded_until = until
+        for reminder_id, reminder_time in rows:
+            self.schedule(reminder_id, reminder_time)
+
+    async def rescan(self) -> None:
+        if self._loaded_until is None:
+            return
+
+        # Only the start-up load goes back further: older reminders that
+        # are still unsent have been dispatched or given up on by now
+        rows = await self._fetch(datetime.utcnow() - self._lookahead, self._loaded_until)
+
+        # Forget dispatched reminders that have since been sent or deleted,
+        # or that fell behind the rescanned range, unless their delivery is
+        # being retried
+        unsent = {reminder_id for reminder_id, _ in rows}
+        self._dispatched = {
+            reminder_id: reminder_time
+            for reminder_id, reminder_time in self._dispatched.items()
+            if reminder_id in unsent or reminder_id in self._attempts
+        }
+        self._attempts = {
+            reminder_id: attempts
+            for reminder_id, attempts in self._attempts.items()
+            if reminder_id in self._dispatched
+        }
+
+        for reminder_id, reminder_time in rows:
+            self.schedule(reminder_id, reminder_time)
+
+    # Change notifications
+    def handle_notification(self, payload: str) -> None:
+        try:
+            change = json.loads(payload)
+            reminder_id = int(change["id"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed reminder notification: {payload!r}")
+            return
+
+        if change.get("op") == "DELETE" or change.get("is_sent") or not change.get("reminder_time"):
+            self.unschedule(reminder_id)
+            return
+
+        self.schedule(reminder_id, datetime.fromisoformat(change["reminder_time"]))
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        def on_notify(connection, pid, channel, payload):
+            self.handle_notification(payload)
+
+        retry_delay = 1
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self._listen_dsn)
+                await connection.add_listener(REMINDERS_CHANNEL, on_notify)
+                retry_delay = 1
+                # Changes made while we were not listening
+                await self.rescan()
+
+                while not connection.is_closed():
+                    await asyncio.sleep(self._poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reminder listener error, falling back to polling: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 60)
+
+    async def _deliver_loop(self) -> None:
+        while True:
+            due = await self._deliveries.get()
+            while not self._deliveries.empty():
+                due.extend(self._deliveries.get_nowait())
+
+            try:
+                failed = await self._deliver(due)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error delivering reminders: {e}")
+                failed = due
+            self.settle(due, failed or [], datetime.utcnow())
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            try:
+                await self.rescan()
+            except Exception as e:
+                logger.error(f"Error rescanning reminders: {e}")
+
+    # Main loop
+    async def run(self) -> None:
+        await self.load_next_window()
+
+        background = [asyncio.create_task(self._deliver_loop()), asyncio.create_task(self._poll())]
+        if self._listen_dsn and self._listen_dsn.startswith("postgresql"):
+            background.append(asyncio.create_task(self._listen()))
+
+        try:
+            while True:
+                try:
+                    await self.tick()
+                except Exception as e:
+                    logger.error(f"Error in reminder scheduler: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            for task in background:
+                task.cancel()
+
+    async def tick(self) -> None:
+        now = datetime.utcnow()
+
+        due = self.pop_due(now)
+        if due:
+            self._deliveries.put_nowait(due)
+
+        if now >= self._loaded_until:
+            await self.load_next_window()
+
+        wake_at = min(filter(None, (self.next_due(), self._loaded_until)))
+        timeout = max(0.0, (wake_at - datetime.utcnow()).total_seconds())
+
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,268 @@
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.utils.metrics import record_response_compression
+
+try:
+    import brotli
+except ImportError:  # Optional: without it "br" is never offered
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: without it "zstd" is never offered
+    zstandard = None
+
+# Content types that are compressed already (or compress too poorly to
+# be worth the CPU), e.g. the gzipped exports
+INCOMPRESSIBLE_TYPES = (
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/zstd",
+    "application/octet-stream",
+    "image/",
+    "audio/",
+    "video/",
+)
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31: gzip container, as Content-Encoding: gzip requires
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> Dict[str, Callable[[], object]]:
+    """Supported encodings, in server preference order, with their factories."""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = lambda: ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL)
+    if brotli is not None:
+        encodings["br"] = lambda: BrotliCompressor(settings.COMPRESSION_BROTLI_LEVEL)
+    encodings["gzip"] = lambda: GzipCompressor(settings.COMPRESSION_GZIP_LEVEL)
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """
+    Pick the encoding for an Accept-Encoding header: the highest q-value
+    wins, ties go to the first in `supported`. q=0 and unlisted encodings
+    are refused unless "*" allows them. None means send it uncompressed.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of the `encoding`-compressed representation: the bytes differ from
+    the identity ones, so a strong tag may not be shared (RFC 9110 8.8.1).
+    """
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def decode_if_none_match(if_none_match: str, encoding: str) -> Tuple[str, Set[str]]:
+    """
+    If-None-Match with the `encoding` suffix taken off its tags, so the
+    endpoint compares them against its own ETags, and the tags it was
+    taken off. Tags of other encodings are left as they are: they do not
+    match the representation this request would get.
+    """
+    suffix = f'-{encoding}"'
+    tags, decoded = [], set()
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.endswith(suffix):
+            tag = tag[:-len(suffix)] + '"'
+            decoded.add(tag.removeprefix("W/"))
+        tags.append(tag)
+    return ", ".join(tags), decoded
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing response bodies with gzip, brotli or
+    zstd, whichever the client accepts with the highest q-value.
+
+    Bodies sent in one piece below `minimum_size` bytes (default
+    COMPRESSION_MIN_SIZE) go out as they are, as do responses that already
+    have a Content-Encoding or whose content type is compressed already
+    (INCOMPRESSIBLE_TYPES). Streamed bodies (exports) are compressed chunk
+    by chunk and flushed after each one, so the client still receives rows
+    as they are produced.
+
+    A compressed response's strong ETag gets the encoding as a suffix
+    ("<tag>-gzip"), which is taken off again in If-None-Match before the
+    request reaches the endpoint; a 304 repeats the tag the client sent.
+
+    The CPU time spent compressing and the compressed/original size ratio
+    of every compressed response are recorded per encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), list(self.encodings))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        revalidated: Set[str] = set()
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match:
+            if_none_match, revalidated = decode_if_none_match(if_none_match, encoding)
+            headers = [(name, value) for name, value in scope["headers"] if name != b"if-none-match"]
+            headers.append((b"if-none-match", if_none_match.encode("latin-1")))
+            scope = {**scope, "headers": headers}
+
+        minimum_size = settings.COMPRESSION_MIN_SIZE if self.minimum_size is None else self.minimum_size
+        start_message: Optional[Message] = None
+        compressor = None
+        original_size = compressed_size = 0
+        cpu_time = 0.0
+
+        def compress(body: bytes, more_body: bool) -> bytes:
+            nonlocal original_size, compressed_size, cpu_time
+            started = time.thread_time()
+            data = compressor.compress(body) + (compressor.flush() if more_body else compressor.finish())
+            cpu_time += time.thread_time() - started
+            original_size += len(body)
+            compressed_size += len(data)
+            return data
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, compressor
+
+            if message["type"] == "http.response.start":
+                # Starlette's Headers only find lowercase names, which not
+                # every app sends (prometheus_client's Content-Encoding)
+                message = {
+                    **message,
+                    "headers": [(name.lower(), value) for name, value in message.get("headers", [])],
+                }
+                if message["status"] == 304:
+                    # Nothing to compress; the ETag is the one the client holds
+                    headers = MutableHeaders(raw=message["headers"])
+                    headers.add_vary_header("Accept-Encoding")
+                    if headers.get("etag") in revalidated:
+                        headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                    await send(message)
+                    return
+                # Held back until the first body chunk shows whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                content_type = headers.get("content-type", "")
+                skip = (
+                    "content-encoding" in headers
+                    or content_type.startswith(INCOMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < minimum_size)
+                )
+                if not skip:
+                    compressor = self.encodings[encoding]()
+                    headers["Content-Encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    etag = headers.get("etag")
+                    if etag is not None and not etag.startswith("W/"):
+                        headers["ETag"] = encoded_etag(etag, encoding)
+                    if more_body:
+                        del headers["Content-Length"]
+                    else:
+                        body = compress(body, more_body)
+                        headers["Content-Length"] = str(len(body))
+                        message = {**message, "body": body}
+                await send(start_message)
+                start_message = None
+                if compressor is None or not more_body:
+                    await send(message)
+                    if compressor is not None:
+                        record_response_compression(encoding, cpu_time, original_size, compressed_size)
+                    return
+
+            if compressor is None:
+                await send(message)
+                return
+
+            await send({"type": "http.response.body", "body": compress(body, more_body), "more_body": more_body})
+            if not more_body:
+                record_response_compression(encoding, cpu_time, original_size, compressed_size)
+
+        await self.app(scope, receive, send_wrapper)
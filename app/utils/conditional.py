@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Response, status
+
+# Responses are per user: shared caches must not keep them, private ones
+# must revalidate before reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def task_etag(task_id: int, updated_at: Optional[datetime]) -> str:
+    """Strong ETag of a single task: its id and last modification time."""
+    modified = updated_at.strftime("%Y%m%d%H%M%S%f") if updated_at is not None else "0"
+    return f'"task-{task_id}-{modified}"'
+
+
+def collection_etag(name: str, user_id: int, version: int) -> str:
+    """
+    Strong ETag of a list over one of the user's collections. The URL
+    (filters, cursor, limit) is the cache key already, so the collection
+    version is all that has to change when any item does.
+    """
+    return f'"{name}-{user_id}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check; uses the weak comparison RFC 9110 asks for."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,33 @@
+# Gunicorn settings for serving the API with several uvicorn workers:
+#
+#     gunicorn -c app/utils/gunicorn_config.py main:app
+#
+# Set PROMETHEUS_MULTIPROC_DIR in the environment so /metrics aggregates the
+# samples of all workers instead of the one that happens to serve the scrape.
+import os
+
+# Importing the metrics module already opens sample files in
+# PROMETHEUS_MULTIPROC_DIR, so the directory has to exist first. Old samples
+# are cleared in on_starting, not here: gunicorn re-reads this file on HUP,
+# while the workers whose samples these are keep running.
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from app.core.config import settings  # noqa: E402
+from app.utils.metrics import clear_multiprocess_dir, mark_worker_dead  # noqa: E402
+from app.utils.uvicorn_config import UVICORN_CONFIG  # noqa: E402
+
+bind = f"{settings.API_HOST}:{settings.API_PORT}"
+workers = settings.API_WORKERS
+worker_class = "uvicorn_worker.UvicornWorker"
+backlog = UVICORN_CONFIG["backlog"]
+keepalive = UVICORN_CONFIG["timeout_keep_alive"]
+
+
+def on_starting(server):
+    # Runs once in the master, before any worker is forked
+    clear_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    mark_worker_dead(worker.pid)
@@ -1,9 +1,20 @@
+import os
 import time
-from typing import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
 
-from fastapi import Request, Response
-from prometheus_client import Counter, Histogram
-from starlette.middleware.base import BaseHTTPMiddleware
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from fastapi.routing import iter_route_contexts
+except ImportError:  # Older FastAPI copies included routes with their full path
+    iter_route_contexts = None
+
+# Endpoint label for requests that matched no route (404s, scanners)
+UNMATCHED_ENDPOINT = "<unmatched>"
 
 # Define metrics
 REQUEST_COUNT = Counter(
@@ -18,6 +29,61 @@ REQUEST_LATENCY = Histogram(
     ["app_name", "method", "endpoint"],
 )
 
+# SQL metrics, per request
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "app_db_statements_per_request",
+    "SQL statements executed while serving a request",
+    ["method", "endpoint"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 100),
+)
+
+DB_TIME_PER_REQUEST = Histogram(
+    "app_db_time_per_request_seconds",
+    "Time spent executing SQL statements while serving a request",
+    ["method", "endpoint"],
+)
+
+DB_ROWS_PER_REQUEST = Histogram(
+    "app_db_rows_per_request",
+    "Rows returned or affected by SQL statements while serving a request",
+    ["method", "endpoint"],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+
+# Connection pool metrics, per engine ("sync" or "async")
+DB_POOL_CHECKED_OUT = Gauge(
+    "app_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "app_db_pool_overflow",
+    "Connections open beyond pool_size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_WAIT_TIME = Histogram(
+    "app_db_pool_wait_seconds",
+    "Time taken to get a connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+DB_POOL_TIMEOUT_COUNT = Counter(
+    "app_db_pool_timeouts_total",
+    "Total number of checkouts that gave up waiting for a free connection",
+    ["pool"],
+)
+
+DB_POOL_PRE_PING_FAILURE_COUNT = Counter(
+    "app_db_pool_pre_ping_failures_total",
+    "Total number of pooled connections found dead by the checkout ping",
+    ["pool"],
+)
+
 # Task metrics
 TASK_CREATED_COUNT = Counter(
     "app_task_created_total",
@@ -44,34 +110,193 @@ TELEGRAM_NOTIFICATION_COUNT = Counter(
     ["status"],
 )
 
+# Cache metrics
+CACHE_HIT_COUNT = Counter(
+    "app_cache_hits_total",
+    "Total number of in-process cache hits",
+    ["cache"],
+)
+
+CACHE_MISS_COUNT = Counter(
+    "app_cache_misses_total",
+    "Total number of in-process cache misses",
+    ["cache"],
+)
+
+# Password hashing metrics
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "app_password_hash_queue_depth",
+    "Password hashing jobs waiting for a free executor worker",
+    multiprocess_mode="livesum",
+)
+
+PASSWORD_HASH_REJECTED_COUNT = Counter(
+    "app_password_hash_rejected_total",
+    "Total number of password hashing jobs rejected because the executor was saturated",
+)
+
+# Response compression metrics, per encoding
+RESPONSE_COMPRESSION_TIME = Histogram(
+    "app_response_compression_cpu_seconds",
+    "CPU time spent compressing a response body",
+    ["encoding"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+RESPONSE_COMPRESSION_RATIO = Histogram(
+    "app_response_compression_ratio",
+    "Compressed size of a response body divided by its original size",
+    ["encoding"],
+    buckets=(0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1, 1.5),
+)
+
+
+# Per-request SQL accounting. The engine event hooks in app.core.db call
+# record_query for every statement; it is added to the innermost
+# track_queries block of the current context.
+@dataclass
+class QueryStats:
+    statements: int = 0
+    duration: float = 0.0
+    rows: int = 0
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the SQL statements, DB time and rows of the code in the block."""
+    parent = _query_stats.get()
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+        # Nested blocks also count towards the enclosing one
+        if parent is not None:
+            parent.statements += stats.statements
+            parent.duration += stats.duration
+            parent.rows += stats.rows
+
+
+def record_query(duration: float, rows: int) -> None:
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.duration += duration
+        stats.rows += rows
+
+
+# Multiprocess mode. With PROMETHEUS_MULTIPROC_DIR set (it must be in the
+# environment before prometheus_client is imported) every worker process
+# writes its samples to files in that directory and /metrics merges them.
+def metrics_registry() -> CollectorRegistry:
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def clear_multiprocess_dir() -> None:
+    """Remove sample files left behind by a previous run; call before workers start."""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop the live gauge samples of a worker process that exited."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
 
 # Middleware for HTTP request metrics
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware recording request count and latency, and the
+    number of SQL statements, DB time and rows of every request.
+
+    Requests are labelled with the matched route template (e.g.
+    `/api/tasks/{task_id}`) instead of the raw path, so the number of time
+    series stays bounded by the number of routes. Requests that match no
+    route share a single label.
+    """
+
+    def __init__(self, app: ASGIApp, app_name: str = "task_manager"):
+        self.app = app
+        self.app_name = app_name
+        # id(route) -> full path template, built on the first request
+        self._templates: Optional[Dict[int, str]] = None
+
+    def route_template(self, scope: Scope) -> str:
+        # The router stores the matched route in the (shared) scope
+        route = scope.get("route")
+        if route is None:
+            return UNMATCHED_ENDPOINT
+
+        if self._templates is None:
+            self._templates = {}
+            if iter_route_contexts is not None:
+                # Routes of included routers keep their own relative path;
+                # the route context knows the path with all prefixes applied
+                for context in iter_route_contexts(scope["app"].routes):
+                    self._templates.setdefault(id(context.original_route), context.path)
+
+        return self._templates.get(id(route), route.path)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            with track_queries() as query_stats:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            request_latency = time.perf_counter() - start_time
 
-        response = await call_next(request)
+            endpoint = self.route_template(scope)
+            method = scope["method"]
 
-        request_latency = time.time() - start_time
-        REQUEST_LATENCY.labels(
-            app_name="task_manager",
-            method=request.method,
-            endpoint=request.url.path,
-        ).observe(request_latency)
+            REQUEST_LATENCY.labels(
+                app_name=self.app_name,
+                method=method,
+                endpoint=endpoint,
+            ).observe(request_latency)
 
-        REQUEST_COUNT.labels(
-            app_name="task_manager",
-            method=request.method,
-            endpoint=request.url.path,
-            http_status=response.status_code,
-        ).inc()
+            REQUEST_COUNT.labels(
+                app_name=self.app_name,
+                method=method,
+                endpoint=endpoint,
+                http_status=status_code,
+            ).inc()
 
-        return response
+            DB_STATEMENTS_PER_REQUEST.labels(method=method, endpoint=endpoint).observe(query_stats.statements)
+            DB_TIME_PER_REQUEST.labels(method=method, endpoint=endpoint).observe(query_stats.duration)
+            DB_ROWS_PER_REQUEST.labels(method=method, endpoint=endpoint).observe(query_stats.rows)
 
 
 # Helper functions for task metrics
-def record_task_created(category: str, priority: str) -> None:
-    TASK_CREATED_COUNT.labels(category=category, priority=priority).inc()
+def record_task_created(category: str, priority: str, count: int = 1) -> None:
+    TASK_CREATED_COUNT.labels(category=category, priority=priority).inc(count)
 
 
 def record_task_completed(category: str, priority: str, duration_seconds: float) -> None:
@@ -81,4 +306,47 @@ def record_task_completed(category: str, priority: str, duration_seconds: float)
 
 # Helper functions for Telegram metrics
 def record_telegram_notification(status: str) -> None:
-    TELEGRAM_NOTIFICATION_COUNT.labels(status=status).inc()
\ No newline at end of file
+    TELEGRAM_NOTIFICATION_COUNT.labels(status=status).inc()
+
+
+# Helper functions for connection pool metrics
+def set_db_pool_usage(pool: str, checked_out: int, overflow: int) -> None:
+    DB_POOL_CHECKED_OUT.labels(pool=pool).set(checked_out)
+    DB_POOL_OVERFLOW.labels(pool=pool).set(overflow)
+
+
+def record_db_pool_wait(pool: str, seconds: float) -> None:
+    DB_POOL_WAIT_TIME.labels(pool=pool).observe(seconds)
+
+
+def record_db_pool_timeout(pool: str) -> None:
+    DB_POOL_TIMEOUT_COUNT.labels(pool=pool).inc()
+
+
+def record_db_pool_pre_ping_failure(pool: str) -> None:
+    DB_POOL_PRE_PING_FAILURE_COUNT.labels(pool=pool).inc()
+
+
+# Helper functions for cache metrics
+def record_cache_hit(cache: str) -> None:
+    CACHE_HIT_COUNT.labels(cache=cache).inc()
+
+
+def record_cache_miss(cache: str) -> None:
+    CACHE_MISS_COUNT.labels(cache=cache).inc()
+
+
+# Helper functions for password hashing metrics
+def set_password_hash_queue_depth(depth: int) -> None:
+    PASSWORD_HASH_QUEUE_DEPTH.set(depth)
+
+
+def record_password_hash_rejected() -> None:
+    PASSWORD_HASH_REJECTED_COUNT.inc()
+
+
+# Helper functions for response compression metrics
+def record_response_compression(encoding: str, cpu_seconds: float, original_size: int, compressed_size: int) -> None:
+    RESPONSE_COMPRESSION_TIME.labels(encoding=encoding).observe(cpu_seconds)
+    if original_size:
+        RESPONSE_COMPRESSION_RATIO.labels(encoding=encoding).observe(compressed_size / original_size)
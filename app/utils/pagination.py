@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def encode_cursor(key: str, value: Optional[datetime], row_id: int) -> str:
+    """Encode a (sort value, id) position as an opaque URL-safe token."""
+    payload = {
+        "k": key,
+        "v": value.isoformat() if value is not None else None,
+        "id": row_id,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str) -> Tuple[Optional[datetime], int]:
+    """Decode a token produced by encode_cursor for the given sort key."""
+    invalid_cursor = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor",
+    )
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = payload["v"]
+        row_id = int(payload["id"])
+        if payload["k"] != key:
+            raise invalid_cursor
+        return (datetime.fromisoformat(value) if value is not None else None), row_id
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise invalid_cursor
+
+
+def keyset_after(
+        column: ColumnElement, id_column: ColumnElement,
+        value: Optional[datetime], row_id: int,
+) -> ColumnElement:
+    """
+    Filter for rows strictly after (value, row_id) in
+    ORDER BY column ASC NULLS LAST, id ASC.
+    """
+    if value is None:
+        return and_(column.is_(None), id_column > row_id)
+
+    return or_(
+        tuple_(column, id_column) > tuple_(value, row_id),
+        column.is_(None),
+    )
@@ -0,0 +1,98 @@
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+# RFC 5545 BYDAY codes, in datetime.weekday() order
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+def parse_weekdays(by_weekday: Optional[str]) -> List[int]:
+    """"MO,WE,FR" -> [0, 2, 4]; empty or None -> []."""
+    if not by_weekday:
+        return []
+    return sorted({WEEKDAYS.index(day.strip().upper()) for day in by_weekday.split(",")})
+
+
+def occurrences(
+        frequency: str,
+        interval: int,
+        start: datetime,
+        since: datetime,
+        until: datetime,
+        end: Optional[datetime] = None,
+        by_weekday: Optional[str] = None,
+) -> Iterator[datetime]:
+    """
+    Occurrences of a recurrence rule from `since` (inclusive) to `until`
+    (exclusive), in order. The rule reads like an RRULE with DTSTART=start,
+    FREQ=frequency, INTERVAL=interval, UNTIL=end (inclusive) and
+    BYDAY=by_weekday:
+
+        daily    every `interval` days from start, only on by_weekday days
+                 if given
+        weekly   every `interval`-th week (weeks start on Monday), on the
+                 by_weekday days or start's weekday
+        monthly  every `interval`-th month, on start's day of the month
+                 (months without that day are skipped) or on every
+                 by_weekday day of the month
+
+    Every occurrence has start's time of day and none comes before start.
+    Expansion starts at the period containing `since`, not at start, so
+    old series cost no more than new ones. Unknown frequencies yield none.
+    """
+    interval = max(interval or 1, 1)
+    since = max(since, start)
+    if end is not None:
+        until = min(until, end + timedelta(microseconds=1))
+    if since >= until:
+        return
+
+    weekdays = parse_weekdays(by_weekday)
+    at = start.time()
+
+    if frequency == "daily":
+        step = timedelta(days=interval)
+        occurrence = start + step * ((since.date() - start.date()).days // interval)
+        while occurrence < until:
+            if occurrence >= since and (not weekdays or occurrence.weekday() in weekdays):
+                yield occurrence
+            occurrence += step
+
+    elif frequency == "weekly":
+        weekdays = weekdays or [start.weekday()]
+        first_monday = start.date() - timedelta(days=start.weekday())
+        period = (since.date() - first_monday).days // 7 // interval
+        while True:
+            monday = first_monday + timedelta(weeks=period * interval)
+            if datetime.combine(monday, at) >= until:
+                return
+            for weekday in weekdays:
+                occurrence = datetime.combine(monday + timedelta(days=weekday), at)
+                if occurrence >= until:
+                    return
+                if occurrence >= since:
+                    yield occurrence
+            period += 1
+
+    elif frequency == "monthly":
+        first_month = start.year * 12 + start.month - 1
+        period = (since.year * 12 + since.month - 1 - first_month) // interval
+        while True:
+            year, month = divmod(first_month + period * interval, 12)
+            month += 1
+            if datetime(year, month, 1) >= until:
+                return
+            days_in_month = calendar.monthrange(year, month)[1]
+            if weekdays:
+                days = [day for day in range(1, days_in_month + 1) if date(year, month, day).weekday() in weekdays]
+            else:
+                days = [start.day] if start.day <= days_in_month else []
+            for day in days:
+                occurrence = datetime.combine(date(year, month, day), at)
+                if occurrence >= until:
+                    return
+                if occurrence >= since:
+                    yield occurrence
+            period += 1
@@ -0,0 +1,41 @@
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Optional, Sequence, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for List[schema], built once per schema."""
+    return TypeAdapter(List[schema])
+
+
+@lru_cache(maxsize=None)
+def field_names(schema: Type[BaseModel]) -> FrozenSet[str]:
+    return frozenset(schema.model_fields)
+
+
+def list_response(schema: Type[BaseModel], items: Sequence[Any], response: Optional[Response] = None) -> Response:
+    """
+    JSON array of ORM objects as `schema`, for list endpoints.
+
+    FastAPI validates a response_model with from_attributes, one descriptor
+    lookup per field and object. Validating the objects' loaded column
+    values (their __dict__) as plain dicts instead roughly halves the cost;
+    Pydantic still checks every field and writes the JSON bytes itself.
+    An object missing a field in its __dict__ (a deferred or expired
+    column) is validated from its attributes instead, so the field is
+    loaded, or fails loudly, rather than coming out as its default.
+    Headers set on `response` (the endpoint's injected Response) are
+    carried over.
+    """
+    adapter = list_adapter(schema)
+    fields = field_names(schema)
+    values = [item.__dict__ if fields <= item.__dict__.keys() else item for item in items]
+    content = adapter.dump_json(adapter.validate_python(values, from_attributes=True))
+
+    result = Response(content=content, media_type="application/json")
+    if response is not None:
+        result.raw_headers.extend(response.raw_headers)
+    return result
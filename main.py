@@ -4,8 +4,9 @@ from prometheus_client import make_asgi_app
 
 from app.api.router import api_router
 from app.core.config import settings
-from app.core.db import create_db_and_tables, wait_for_db
-from app.utils.metrics import PrometheusMiddleware
+from app.core.db import run_migrations, wait_for_db
+from app.utils.compression import CompressionMiddleware
+from app.utils.metrics import PrometheusMiddleware, metrics_registry
 
 app = FastAPI(
     title="Task Manager API",
@@ -22,11 +23,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress response bodies (inside the Prometheus middleware, so request
+# latency includes compression time)
+app.add_middleware(CompressionMiddleware)
+
 # Add Prometheus middleware
 app.add_middleware(PrometheusMiddleware)
 
 # Set up metrics endpoint for Prometheus
-metrics_app = make_asgi_app()
+metrics_app = make_asgi_app(registry=metrics_registry())
 app.mount("/metrics", metrics_app)
 
 # Include API router
@@ -36,7 +41,7 @@ app.include_router(api_router, prefix="/api")
 @app.on_event("startup")
 async def startup_event():
     wait_for_db()
-    create_db_and_tables()
+    run_migrations()
 
 
 @app.get("/")
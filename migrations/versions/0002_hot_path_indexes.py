@@ -0,0 +1,65 @@
+"""composite and partial indexes for the hot query shapes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every task query is scoped by owner_id, then filtered or ordered
+    op.create_index(
+        "ix_tasks_owner_id_due_date_id", "tasks", ["owner_id", "due_date", "id"]
+    )
+    op.create_index(
+        "ix_tasks_owner_id_updated_at_id", "tasks", ["owner_id", "updated_at", "id"]
+    )
+    op.create_index("ix_tasks_owner_id_status", "tasks", ["owner_id", "status"])
+    op.create_index("ix_tasks_owner_id_priority", "tasks", ["owner_id", "priority"])
+    op.create_index("ix_tasks_owner_id_category", "tasks", ["owner_id", "category"])
+
+    # Reminder listing per task and the bot's scan for due, unsent reminders
+    op.create_index("ix_reminders_task_id", "reminders", ["task_id"])
+    op.create_index(
+        "ix_reminders_unsent_reminder_time",
+        "reminders",
+        ["reminder_time"],
+        postgresql_where=sa.text("is_sent = false"),
+        sqlite_where=sa.text("is_sent = 0"),
+    )
+
+    # Time track listing per task and the active (end_time IS NULL) lookup
+    op.create_index(
+        "ix_time_tracks_task_id_start_time", "time_tracks", ["task_id", "start_time"]
+    )
+    op.create_index(
+        "ix_time_tracks_active_task_id",
+        "time_tracks",
+        ["task_id"],
+        postgresql_where=sa.text("end_time IS NULL"),
+        sqlite_where=sa.text("end_time IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_time_tracks_active_task_id", table_name="time_tracks")
+    op.drop_index("ix_time_tracks_task_id_start_time", table_name="time_tracks")
+    op.drop_index("ix_reminders_unsent_reminder_time", table_name="reminders")
+    op.drop_index("ix_reminders_task_id", table_name="reminders")
+    op.drop_index("ix_tasks_owner_id_category", table_name="tasks")
+    op.drop_index("ix_tasks_owner_id_priority", table_name="tasks")
+    op.drop_index("ix_tasks_owner_id_status", table_name="tasks")
+    op.drop_index("ix_tasks_owner_id_updated_at_id", table_name="tasks")
+    op.drop_index("ix_tasks_owner_id_due_date_id", table_name="tasks")
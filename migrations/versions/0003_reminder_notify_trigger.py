@@ -0,0 +1,67 @@
+"""notify the reminder scheduler about reminder changes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # LISTEN/NOTIFY is Postgres only; other databases rely on the
+    # scheduler's polling fallback
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_reminders_changed() RETURNS trigger AS $$
+        DECLARE
+            changed reminders%ROWTYPE;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed := OLD;
+            ELSE
+                changed := NEW;
+            END IF;
+
+            PERFORM pg_notify(
+                'reminders_changed',
+                json_build_object(
+                    'op', TG_OP,
+                    'id', changed.id,
+                    'reminder_time', changed.reminder_time,
+                    'is_sent', changed.is_sent
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER reminders_changed
+        AFTER INSERT OR UPDATE OF reminder_time, is_sent OR DELETE ON reminders
+        FOR EACH ROW EXECUTE FUNCTION notify_reminders_changed()
+        """
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS reminders_changed ON reminders")
+    op.execute("DROP FUNCTION IF EXISTS notify_reminders_changed()")
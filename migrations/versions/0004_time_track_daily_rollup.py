@@ -0,0 +1,92 @@
+"""daily time-tracking rollup per user and task
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "time_track_daily",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column(
+            "task_id", sa.Integer(), sa.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total_seconds", sa.Integer(), nullable=False),
+        sa.Column("track_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "task_id", "day"),
+    )
+    op.create_index("ix_time_track_daily_user_id_day", "time_track_daily", ["user_id", "day"])
+
+    # Backfill from the existing tracks, split at midnight the same way the
+    # endpoints and `python -m app.commands.rollup rebuild` do: the first day
+    # gets the whole seconds until midnight, each later day up to 86400.
+    # Kept in SQL here rather than importing the app's helpers, which move on
+    # while this revision must not
+    if op.get_bind().dialect.name == "postgresql":
+        day = "CAST(time_tracks.start_time AS date)"
+        next_day = "parts.day + 1"
+        until_midnight = (
+            "CAST(FLOOR(EXTRACT(EPOCH FROM "
+            "(CAST(time_tracks.start_time AS date) + 1) - time_tracks.start_time)) AS integer)"
+        )
+    else:
+        # SQLite's date functions round to milliseconds, so the fraction
+        # (stored as "YYYY-MM-DD HH:MM:SS.ffffff") is handled separately
+        whole = "substr(time_tracks.start_time, 1, 19)"
+        day = f"date({whole})"
+        next_day = "date(parts.day, '+1 day')"
+        until_midnight = (
+            f"strftime('%s', date({whole}, '+1 day')) - strftime('%s', {whole})"
+            " - (CAST(substr(time_tracks.start_time, 21) AS INTEGER) > 0)"
+        )
+
+    op.execute(
+        f"""
+        INSERT INTO time_track_daily (user_id, task_id, day, total_seconds, track_count)
+        WITH RECURSIVE parts (user_id, task_id, day, n, until_midnight, duration) AS (
+            SELECT tasks.owner_id, time_tracks.task_id, {day}, 0, {until_midnight}, time_tracks.duration
+            FROM time_tracks JOIN tasks ON tasks.id = time_tracks.task_id
+            WHERE time_tracks.duration IS NOT NULL
+            UNION ALL
+            SELECT parts.user_id, parts.task_id, {next_day}, parts.n + 1, parts.until_midnight, parts.duration
+            FROM parts
+            WHERE parts.until_midnight + parts.n * 86400 < parts.duration
+        )
+        SELECT user_id, task_id, day, total_seconds, track_count
+        FROM (
+            SELECT
+                user_id,
+                task_id,
+                day,
+                SUM(
+                    CASE WHEN duration < until_midnight + n * 86400
+                        THEN duration ELSE until_midnight + n * 86400 END
+                    - CASE WHEN n = 0 THEN 0 ELSE until_midnight + (n - 1) * 86400 END
+                ) AS total_seconds,
+                SUM(CASE WHEN n = 0 THEN 1 ELSE 0 END) AS track_count
+            FROM parts
+            GROUP BY user_id, task_id, day
+        ) AS totals
+        WHERE total_seconds <> 0 OR track_count <> 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_time_track_daily_user_id_day", table_name="time_track_daily")
+    op.drop_table("time_track_daily")
@@ -0,0 +1,46 @@
+"""task tombstones for delta sync
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_task_tombstones_owner_id_deleted_at_task_id",
+        "task_tombstones",
+        ["owner_id", "deleted_at", "task_id"],
+    )
+
+    # Sync walks tasks by (updated_at, id); give rows that predate the
+    # updated_at default a position on that axis
+    op.execute(
+        "UPDATE tasks SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) "
+        "WHERE updated_at IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_tombstones_owner_id_deleted_at_task_id", table_name="task_tombstones")
+    op.drop_table("task_tombstones")
@@ -0,0 +1,46 @@
+"""materialized occurrences of recurring tasks
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:06
+
+"""
+from datetime import datetime, time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("recurring_task_id", sa.Integer(), nullable=True))
+    op.create_index(
+        "ix_tasks_recurring_task_id_due_date", "tasks", ["recurring_task_id", "due_date"], unique=True,
+    )
+
+    op.add_column("recurring_tasks", sa.Column("by_weekday", sa.String(length=32), nullable=True))
+    op.add_column("recurring_tasks", sa.Column("materialized_until", sa.DateTime(), nullable=True))
+    # Existing series start materializing today (midnight UTC), like new
+    # ones; nothing is back-filled
+    today = datetime.combine(datetime.utcnow().date(), time.min)
+    op.execute(sa.text("UPDATE recurring_tasks SET materialized_until = :today").bindparams(today=today))
+    # Batch mode: SQLite can't ALTER a column, the table is copied instead
+    with op.batch_alter_table("recurring_tasks") as batch:
+        batch.alter_column("materialized_until", existing_type=sa.DateTime(), nullable=False)
+    op.create_index("ix_recurring_tasks_materialized_until", "recurring_tasks", ["materialized_until"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recurring_tasks_materialized_until", table_name="recurring_tasks")
+    op.drop_column("recurring_tasks", "materialized_until")
+    op.drop_column("recurring_tasks", "by_weekday")
+
+    op.drop_index("ix_tasks_recurring_task_id_due_date", table_name="tasks")
+    op.drop_column("tasks", "recurring_task_id")
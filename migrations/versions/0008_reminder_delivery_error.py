@@ -0,0 +1,45 @@
+"""reminders that cannot be delivered
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _unsent_index(where: str) -> None:
+    op.create_index(
+        "ix_reminders_unsent_reminder_time",
+        "reminders",
+        ["reminder_time"],
+        postgresql_where=sa.text(where.format(false="false")),
+        sqlite_where=sa.text(where.format(false="0")),
+    )
+
+
+def upgrade() -> None:
+    # No backfill: reminders that could not be delivered so far are marked
+    # when the bot's start-up catch-up tries them again
+    op.add_column("reminders", sa.Column("delivery_error", sa.String(length=255), nullable=True))
+
+    # The scheduler's scan skips undeliverable reminders as well
+    op.drop_index("ix_reminders_unsent_reminder_time", table_name="reminders")
+    _unsent_index("is_sent = {false} AND delivery_error IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reminders_unsent_reminder_time", table_name="reminders")
+    _unsent_index("is_sent = {false}")
+
+    op.drop_column("reminders", "delivery_error")
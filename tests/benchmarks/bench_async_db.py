@@ -0,0 +1,91 @@
+"""
+Latency benchmark: sync Session vs AsyncSession inside async handlers.
+
+Both routes run the same query with a simulated slow Postgres round trip
+(pg_sleep). The "sync" route reproduces the old behaviour (blocking Session
+inside an `async def` handler), the "async" route uses the async engine the
+API endpoints run on now. Requests are fired concurrently against the
+in-process ASGI app and p50/p95/p99 latencies are reported.
+
+Usage:
+    python -m tests.benchmarks.bench_async_db --requests 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.db import get_async_db, get_db
+
+QUERY = text("SELECT pg_sleep(:delay)")
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/sync")
+async def sync_route(delay: float, db: Session = Depends(get_db)) -> Dict[str, str]:
+    db.execute(QUERY, {"delay": delay})
+    return {"status": "ok"}
+
+
+@bench_app.get("/async")
+async def async_route(
+        delay: float, db: AsyncSession = Depends(get_async_db)
+) -> Dict[str, str]:
+    await db.execute(QUERY, {"delay": delay})
+    return {"status": "ok"}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(path: str, requests: int, concurrency: int, delay: float) -> None:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=bench_app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one() -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, params={"delay": delay})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{path:<7} requests={requests} concurrency={concurrency} "
+        f"rps={requests / elapsed:8.1f} "
+        f"p50={percentile(latencies, 50) * 1000:8.1f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:8.1f}ms "
+        f"mean={statistics.mean(latencies) * 1000:8.1f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.01, help="simulated DB round trip, seconds")
+    args = parser.parse_args()
+
+    for path in ("/sync", "/async"):
+        await run(path, args.requests, args.concurrency, args.delay)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+Latency benchmark: create_task with and without refresh() after commit.
+
+Runs the body of the create_task endpoint `--tasks` times against the
+configured database, once the old way (INSERT, COMMIT, then a SELECT from
+refresh() to read back the generated id and defaults) and once the current
+way (INSERT ... RETURNING through the models' eager defaults, no refresh).
+Reports the mean and p95 latency per created task and the number of SQL
+statements each variant issues.
+
+Usage:
+    python -m tests.benchmarks.bench_create_task --tasks 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from sqlalchemy import delete, event, select
+
+from app.core.db import AsyncSessionLocal, async_engine
+from app.models import Task, User
+from app.schemas import Task as TaskSchema, TaskCreate
+
+BENCH_USERNAME = "bench_create_task"
+
+
+async def seed_user() -> int:
+    async with AsyncSessionLocal() as db:
+        user = User(
+            email=f"{BENCH_USERNAME}@example.com",
+            username=BENCH_USERNAME,
+            hashed_password="-",
+        )
+        db.add(user)
+        await db.commit()
+        return user.id
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        user_ids = select(User.id).where(User.username == BENCH_USERNAME)
+        await db.execute(delete(Task).where(Task.owner_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.username == BENCH_USERNAME))
+        await db.commit()
+
+
+async def create_task(owner_id: int, task_in: TaskCreate, refresh: bool) -> TaskSchema:
+    async with AsyncSessionLocal() as db:
+        task = Task(**task_in.model_dump(), owner_id=owner_id)
+        db.add(task)
+        await db.commit()
+        if refresh:
+            await db.refresh(task)
+        return TaskSchema.model_validate(task, from_attributes=True)
+
+
+async def run(name: str, owner_id: int, tasks: int, warmup: int, refresh: bool) -> None:
+    task_in = TaskCreate(title="Benchmark task", description="Created by bench_create_task")
+    for _ in range(warmup):
+        await create_task(owner_id, task_in, refresh)
+
+    statements = 0
+
+    def count(*args) -> None:
+        nonlocal statements
+        statements += 1
+
+    timings: List[float] = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        for _ in range(tasks):
+            started = time.perf_counter()
+            await create_task(owner_id, task_in, refresh)
+            timings.append(time.perf_counter() - started)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(
+        f"{name:<10} tasks={tasks:<6} mean={statistics.mean(timings) * 1e3:7.3f}ms "
+        f"p95={p95 * 1e3:7.3f}ms statements/task={statements / tasks:.1f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    args = parser.parse_args()
+
+    await cleanup()
+    owner_id = await seed_user()
+    try:
+        await run("refresh", owner_id, args.tasks, args.warmup, refresh=True)
+        await run("returning", owner_id, args.tasks, args.warmup, refresh=False)
+    finally:
+        await cleanup()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
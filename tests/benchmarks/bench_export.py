@@ -0,0 +1,147 @@
+"""
+Throughput and memory benchmark: streaming task export vs paging the list.
+
+Seeds `--tasks` tasks for one user in the configured database, then reads
+them all back the old way (GET /api/tasks pages of `--page-size` rows:
+keyset on id, ORM objects, Task schema, one JSON array per page) and
+through the export stream in NDJSON, CSV and gzipped NDJSON. Reports
+rows per second, output size and the peak Python memory of each variant
+(a second pass under tracemalloc), which stays flat for the stream.
+
+Usage:
+    python -m tests.benchmarks.bench_export --tasks 1000000
+    python -m tests.benchmarks.bench_export --tasks 1000000 --keep  # reuse the seeded rows next run
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, func, insert, select
+
+from app.core.db import AsyncSessionLocal, async_engine
+from app.models import Task, TaskCategory, TaskPriority, TaskStatus, User
+from app.schemas import Task as TaskSchema
+from app.utils.export import stream_export
+
+BENCH_USERNAME = "bench_export"
+SEED_CHUNK_SIZE = 10_000
+
+
+async def seed(tasks: int) -> int:
+    async with AsyncSessionLocal() as db:
+        user_id = await db.scalar(select(User.id).where(User.username == BENCH_USERNAME))
+        if user_id is not None:
+            existing = await db.scalar(select(func.count()).select_from(Task).where(Task.owner_id == user_id))
+            if existing == tasks:
+                return user_id
+            await cleanup()
+
+        user = User(email=f"{BENCH_USERNAME}@example.com", username=BENCH_USERNAME, hashed_password="-")
+        db.add(user)
+        await db.commit()
+
+        now = datetime.utcnow()
+        statuses, priorities, categories = list(TaskStatus), list(TaskPriority), list(TaskCategory)
+        for start in range(0, tasks, SEED_CHUNK_SIZE):
+            await db.execute(insert(Task), [
+                {
+                    "title": f"Exported task {i}",
+                    "description": f"Seeded by bench_export, row {i}, with a comma, and a \"quote\"",
+                    "status": statuses[i % len(statuses)],
+                    "priority": priorities[i % len(priorities)],
+                    "category": categories[i % len(categories)],
+                    "due_date": now + timedelta(minutes=i),
+                    "owner_id": user.id,
+                }
+                for i in range(start, min(start + SEED_CHUNK_SIZE, tasks))
+            ])
+            await db.commit()
+        return user.id
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        user_ids = select(User.id).where(User.username == BENCH_USERNAME)
+        await db.execute(delete(Task).where(Task.owner_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.username == BENCH_USERNAME))
+        await db.commit()
+
+
+def export_query(owner_id: int):
+    return (
+        select(
+            Task.id, Task.title, Task.description, Task.status, Task.priority, Task.category,
+            Task.due_date, Task.created_at, Task.updated_at, Task.completed_at,
+        )
+        .where(Task.owner_id == owner_id)
+        .order_by(Task.id)
+    )
+
+
+async def paged(owner_id: int, page_size: int) -> int:
+    size = 0
+    last_id = None
+    async with AsyncSessionLocal() as db:
+        while True:
+            query = select(Task).where(Task.owner_id == owner_id)
+            if last_id is not None:
+                query = query.where(Task.id > last_id)
+            result = await db.execute(query.order_by(Task.id).limit(page_size))
+            tasks = result.scalars().all()
+            if not tasks:
+                return size
+            page = [TaskSchema.model_validate(task, from_attributes=True).model_dump(mode="json") for task in tasks]
+            size += len(json.dumps(page))
+            last_id = tasks[-1].id
+            # Every page is its own request and session
+            db.expunge_all()
+
+
+async def streamed(owner_id: int, format: str, compress: bool) -> int:
+    size = 0
+    async for chunk in stream_export(async_engine, export_query(owner_id), format, compress):
+        size += len(chunk)
+    return size
+
+
+async def run(name: str, tasks: int, variant: Callable[[], Awaitable[int]]) -> None:
+    started = time.perf_counter()
+    size = await variant()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    await variant()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<14} rows={tasks:<8} {elapsed:7.2f}s {tasks / elapsed:9.0f} rows/s "
+        f"size={size / 2**20:8.1f}MiB peak={peak / 2**20:7.1f}MiB"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--keep", action="store_true", help="leave the seeded tasks for the next run")
+    args = parser.parse_args()
+
+    owner_id = await seed(args.tasks)
+    try:
+        await run("paged", args.tasks, lambda: paged(owner_id, args.page_size))
+        await run("ndjson", args.tasks, lambda: streamed(owner_id, "ndjson", False))
+        await run("csv", args.tasks, lambda: streamed(owner_id, "csv", False))
+        await run("ndjson+gzip", args.tasks, lambda: streamed(owner_id, "ndjson", True))
+    finally:
+        if not args.keep:
+            await cleanup()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
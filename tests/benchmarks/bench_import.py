@@ -0,0 +1,117 @@
+"""
+Throughput benchmark: bulk task import vs creating tasks one by one.
+
+Generates an NDJSON and a CSV file of `--tasks` tasks and loads them into
+the configured database for one user through import_records (validation
+in chunks, COPY on Postgres), then creates `--per-row` tasks the way
+POST /api/tasks does (one INSERT and COMMIT per task) for comparison.
+Reports rows per second of each.
+
+Usage:
+    python -m tests.benchmarks.bench_import --tasks 1000000 --per-row 5000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+
+from sqlalchemy import delete, select
+
+from app.core.db import AsyncSessionLocal, async_engine
+from app.models import CollectionVersion, Task, TaskCategory, TaskPriority, TaskStatus, User
+from app.repositories import import_records
+from app.schemas import TaskCreate
+
+BENCH_USERNAME = "bench_import"
+
+
+def generate(tasks: int) -> list:
+    statuses, priorities, categories = list(TaskStatus), list(TaskPriority), list(TaskCategory)
+    return [
+        {
+            "title": f"Imported task {i}",
+            "description": f"Generated by bench_import, row {i}",
+            "status": statuses[i % len(statuses)].value,
+            "priority": priorities[i % len(priorities)].value,
+            "category": categories[i % len(categories)].value,
+            "due_date": f"2027-01-{i % 28 + 1:02d}T09:00:00",
+        }
+        for i in range(tasks)
+    ]
+
+
+def as_ndjson(rows: list) -> str:
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def as_csv(rows: list) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+async def seed_user() -> int:
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"{BENCH_USERNAME}@example.com", username=BENCH_USERNAME, hashed_password="-")
+        db.add(user)
+        await db.commit()
+        return user.id
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        user_ids = select(User.id).where(User.username == BENCH_USERNAME)
+        await db.execute(delete(Task).where(Task.owner_id.in_(user_ids)))
+        await db.execute(delete(CollectionVersion).where(CollectionVersion.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.username == BENCH_USERNAME))
+        await db.commit()
+
+
+async def bulk(owner_id: int, content: str, format: str) -> int:
+    async with AsyncSessionLocal() as db:
+        result = await import_records(db, "tasks", owner_id, io.StringIO(content), format)
+    assert result["failed"] == 0, result["errors"][:5]
+    return result["imported"]
+
+
+async def per_row(owner_id: int, rows: list) -> int:
+    for row in rows:
+        async with AsyncSessionLocal() as db:
+            db.add(Task(**TaskCreate.model_validate(row).model_dump(), owner_id=owner_id))
+            await db.commit()
+    return len(rows)
+
+
+def report(name: str, rows: int, elapsed: float) -> None:
+    print(f"{name:<8} rows={rows:<8} {elapsed:8.2f}s {rows / elapsed:9.0f} rows/s")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--per-row", type=int, default=5000)
+    args = parser.parse_args()
+
+    rows = generate(args.tasks)
+    await cleanup()
+    owner_id = await seed_user()
+    try:
+        for format, content in (("ndjson", as_ndjson(rows)), ("csv", as_csv(rows))):
+            started = time.perf_counter()
+            imported = await bulk(owner_id, content, format)
+            report(format, imported, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        created = await per_row(owner_id, rows[:args.per_row])
+        report("per-row", created, time.perf_counter() - started)
+    finally:
+        await cleanup()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""
+Overhead benchmark: per-request cost of the Prometheus middleware.
+
+Three copies of a minimal FastAPI app with a `/api/items/{item_id}` route
+are driven directly through the ASGI interface (no HTTP client or server in
+the way): without middleware, with the previous BaseHTTPMiddleware
+implementation labelled by the raw path, and with the pure ASGI
+PrometheusMiddleware labelled by route template. Every request hits a
+different item id; the number of endpoint label values each variant leaves
+behind is reported next to the mean time per request.
+
+Usage:
+    python -m tests.benchmarks.bench_metrics_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, Dict
+
+from fastapi import APIRouter, FastAPI, Request, Response
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.utils import metrics
+from app.utils.metrics import PrometheusMiddleware
+
+
+class LegacyPrometheusMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark compares against."""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        start_time = time.time()
+
+        response = await call_next(request)
+
+        request_latency = time.time() - start_time
+        metrics.REQUEST_LATENCY.labels(
+            app_name="task_manager",
+            method=request.method,
+            endpoint=request.url.path,
+        ).observe(request_latency)
+
+        metrics.REQUEST_COUNT.labels(
+            app_name="task_manager",
+            method=request.method,
+            endpoint=request.url.path,
+            http_status=response.status_code,
+        ).inc()
+
+        return response
+
+
+def build_app(middleware=None) -> FastAPI:
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    async def read_item(item_id: int) -> Dict[str, int]:
+        return {"id": item_id}
+
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+    app.include_router(router, prefix="/api")
+    return app
+
+
+def use_fresh_metrics() -> CollectorRegistry:
+    # Each variant records into its own registry so label counts don't mix
+    registry = CollectorRegistry()
+    metrics.REQUEST_COUNT = Counter(
+        "app_request_count",
+        "Application Request Count",
+        ["app_name", "method", "endpoint", "http_status"],
+        registry=registry,
+    )
+    metrics.REQUEST_LATENCY = Histogram(
+        "app_request_latency_seconds",
+        "Application Request Latency",
+        ["app_name", "method", "endpoint"],
+        registry=registry,
+    )
+    return registry
+
+
+async def call(app: FastAPI, path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def run(name: str, middleware, requests: int, warmup: int) -> float:
+    registry = use_fresh_metrics()
+    app = build_app(middleware)
+
+    for i in range(warmup):
+        await call(app, f"/api/items/{i}")
+
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(app, f"/api/items/{warmup + i}")
+    per_request = (time.perf_counter() - started) / requests
+
+    endpoints = {
+        sample.labels["endpoint"]
+        for family in registry.collect()
+        if family.name == "app_request_count"
+        for sample in family.samples
+    }
+    print(f"{name:<10} mean={per_request * 1e6:8.1f}us/request endpoint_labels={len(endpoints)}")
+    return per_request
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    args = parser.parse_args()
+
+    bare = await run("none", None, args.requests, args.warmup)
+    legacy = await run("legacy", LegacyPrometheusMiddleware, args.requests, args.warmup)
+    asgi = await run("asgi", PrometheusMiddleware, args.requests, args.warmup)
+
+    print(f"overhead   legacy={(legacy - bare) * 1e6:6.1f}us asgi={(asgi - bare) * 1e6:6.1f}us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,203 @@
+"""
+Throughput benchmark: sequential reminder loop vs batched concurrent delivery.
+
+Seeds `--reminders` due reminders spread over `--chats` connected Telegram
+users, then delivers them to a fake Bot that sleeps `--latency` per
+send_message call and raises TelegramRetryAfter once more than
+`--flood-limit` messages were sent within the last second. The "sequential"
+run reproduces the old check_reminders loop (task query, TelegramUser query,
+send and commit per reminder) on the first `--baseline` reminders; the
+"batched" run hands every reminder to ReminderSender. The real Telegram limit
+is ~30 messages/s, the defaults scale both the limit and the sender's global
+rate up so the run finishes in seconds.
+
+Usage:
+    python -m tests.benchmarks.bench_reminder_delivery --reminders 10000 --chats 2000
+"""
+import argparse
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import List
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from sqlalchemy import delete, event, insert, select, update
+
+from app.core.db import AsyncSessionLocal, async_engine
+from app.models import CollectionVersion, Reminder, Task, TelegramUser, User
+from app.telegram.delivery import ReminderSender
+from app.telegram.formatting import format_task_message
+
+BENCH_PREFIX = "bench_reminder_"
+BENCH_CHAT_ID_BASE = 1_900_000_000
+
+
+class FakeBot:
+    """Stand-in for aiogram's Bot with send latency and flood control."""
+
+    def __init__(self, latency: float, flood_limit: int):
+        self.latency = latency
+        self.flood_limit = flood_limit
+        self.sent = 0
+        self.flooded = 0
+        self._recent: deque = deque()
+
+    async def send_message(self, chat_id: int, text: str, parse_mode: str = None) -> None:
+        now = time.monotonic()
+        while self._recent and self._recent[0] <= now - 1:
+            self._recent.popleft()
+        if len(self._recent) >= self.flood_limit:
+            self.flooded += 1
+            raise TelegramRetryAfter(
+                method=SendMessage(chat_id=chat_id, text=text),
+                message="Flood control exceeded",
+                retry_after=1,
+            )
+
+        self._recent.append(now)
+        await asyncio.sleep(self.latency)
+        self.sent += 1
+
+
+async def seed(reminders: int, chats: int) -> List[int]:
+    async with AsyncSessionLocal() as db:
+        user_ids = (await db.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [
+                {
+                    "email": f"{BENCH_PREFIX}{i}@example.com",
+                    "username": f"{BENCH_PREFIX}{i}",
+                    "hashed_password": "-",
+                }
+                for i in range(chats)
+            ],
+        )).all()
+        await db.execute(insert(TelegramUser), [
+            {
+                "user_id": user_id,
+                "telegram_id": BENCH_CHAT_ID_BASE + i,
+                "chat_id": BENCH_CHAT_ID_BASE + i,
+                "is_active": True,
+            }
+            for i, user_id in enumerate(user_ids)
+        ])
+        task_ids = (await db.scalars(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True),
+            [
+                {"title": f"Benchmark task {i}", "owner_id": user_ids[i % chats]}
+                for i in range(reminders)
+            ],
+        )).all()
+        reminder_ids = (await db.scalars(
+            insert(Reminder).returning(Reminder.id, sort_by_parameter_order=True),
+            [
+                {"task_id": task_id, "reminder_time": datetime.utcnow(), "is_sent": False}
+                for task_id in task_ids
+            ],
+        )).all()
+        await db.commit()
+
+    return list(reminder_ids)
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        user_ids = select(User.id).where(User.username.startswith(BENCH_PREFIX))
+        task_ids = select(Task.id).where(Task.owner_id.in_(user_ids))
+        await db.execute(delete(Reminder).where(Reminder.task_id.in_(task_ids)))
+        await db.execute(delete(Task).where(Task.owner_id.in_(user_ids)))
+        await db.execute(delete(TelegramUser).where(TelegramUser.user_id.in_(user_ids)))
+        await db.execute(delete(CollectionVersion).where(CollectionVersion.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.username.startswith(BENCH_PREFIX)))
+        await db.commit()
+
+
+async def reset(reminder_ids: List[int]) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Reminder).where(Reminder.id.in_(reminder_ids)).values(is_sent=False))
+        await db.commit()
+
+
+async def sequential_deliver(bot: FakeBot, reminder_ids: List[int]) -> None:
+    # The pre-batching loop: three queries, a send and a commit per reminder
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Reminder).where(Reminder.id.in_(reminder_ids), Reminder.is_sent == False)
+        )
+        for reminder in result.scalars().all():
+            task = (await db.execute(select(Task).where(Task.id == reminder.task_id))).scalars().first()
+            telegram_user = (await db.execute(
+                select(TelegramUser).where(TelegramUser.user_id == task.owner_id)
+            )).scalars().first()
+            try:
+                await bot.send_message(
+                    chat_id=telegram_user.chat_id,
+                    text=f"🔔 <b>Reminder</b> 🔔\n\n{format_task_message(task)}",
+                    parse_mode="HTML",
+                )
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            reminder.is_sent = True
+            await db.commit()
+
+
+async def run(name: str, deliver, bot: FakeBot, reminder_ids: List[int]) -> None:
+    queries = 0
+
+    def count(*args) -> None:
+        nonlocal queries
+        queries += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    started = time.perf_counter()
+    try:
+        await deliver(reminder_ids)
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    print(
+        f"{name:<10} reminders={len(reminder_ids):<6} sent={bot.sent:<6} "
+        f"elapsed={elapsed:8.2f}s rate={bot.sent / elapsed:8.1f}/s "
+        f"queries={queries:<6} retry_after={bot.flooded}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--reminders", type=int, default=10000)
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.03, help="fake send_message latency, seconds")
+    parser.add_argument("--flood-limit", type=int, default=1000, help="fake Bot messages per second")
+    parser.add_argument("--global-rate", type=float, default=1000, help="sender messages per second")
+    parser.add_argument("--chat-rate", type=float, default=1, help="sender messages per second per chat")
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--baseline", type=int, default=500, help="reminders for the sequential run")
+    args = parser.parse_args()
+
+    await cleanup()
+    reminder_ids = await seed(args.reminders, args.chats)
+    try:
+        if args.baseline:
+            bot = FakeBot(args.latency, args.flood_limit)
+            await run("sequential", lambda ids: sequential_deliver(bot, ids), bot, reminder_ids[:args.baseline])
+            await reset(reminder_ids)
+
+        bot = FakeBot(args.latency, args.flood_limit)
+        sender = ReminderSender(
+            bot,
+            workers=args.workers,
+            global_rate=args.global_rate,
+            chat_rate=args.chat_rate,
+        )
+        await run("batched", sender.deliver, bot, reminder_ids)
+    finally:
+        await cleanup()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
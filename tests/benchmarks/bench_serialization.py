@@ -0,0 +1,112 @@
+"""
+Serialization benchmark: list responses of 100, 1k and 10k tasks.
+
+Builds loaded Task objects in memory and times turning them into the
+JSON body of GET /api/tasks three ways:
+
+    encoder         jsonable_encoder + json.dumps, what a custom response
+                    class (JSONResponse, ORJSONResponse) gets to render
+    response_model  FastAPI's response_model path: validate with
+                    from_attributes, then Pydantic's dump_json
+    list_response   app.utils.serialization.list_response: cached
+                    TypeAdapter, validated from the loaded column values
+
+and the NDJSON export encoding of the same rows with the standard json
+module and with orjson (app.utils.export.encode_ndjson). Reports the best
+of `--repeat` runs, in milliseconds and microseconds per task.
+
+Usage:
+    python -m tests.benchmarks.bench_serialization --sizes 100 1000 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models import Task, TaskCategory, TaskPriority, TaskStatus
+from app.schemas import Task as TaskSchema
+from app.utils.export import encode_ndjson
+from app.utils.serialization import list_adapter, list_response
+
+EXPORT_COLUMNS = [
+    "id", "title", "description", "status", "priority", "category",
+    "due_date", "created_at", "updated_at", "completed_at",
+]
+
+
+def make_tasks(count: int) -> List[Task]:
+    now = datetime.utcnow()
+    statuses, priorities, categories = list(TaskStatus), list(TaskPriority), list(TaskCategory)
+    return [
+        Task(
+            id=i,
+            title=f"Task {i}",
+            description=f"Description of task {i}, long enough to look like a real one",
+            status=statuses[i % len(statuses)],
+            priority=priorities[i % len(priorities)],
+            category=categories[i % len(categories)],
+            due_date=now + timedelta(days=i % 30),
+            created_at=now,
+            updated_at=now,
+            completed_at=None,
+            owner_id=1,
+        )
+        for i in range(count)
+    ]
+
+
+def best_of(repeat: int, function: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def json_ndjson(rows: List[tuple]) -> bytes:
+    def default(value):
+        return value.isoformat()
+
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=default) + "\n" for row in rows
+    ).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # What FastAPI builds per route for response_model=List[TaskSchema]
+    route_adapter = TypeAdapter(List[TaskSchema])
+    list_adapter(TaskSchema)
+
+    for size in args.sizes:
+        tasks = make_tasks(size)
+        rows = [tuple(getattr(task, column) for column in EXPORT_COLUMNS) for task in tasks]
+        variants = {
+            "encoder": lambda: json.dumps(
+                jsonable_encoder(route_adapter.validate_python(tasks, from_attributes=True))
+            ).encode(),
+            "response_model": lambda: route_adapter.dump_json(
+                route_adapter.validate_python(tasks, from_attributes=True)
+            ),
+            "list_response": lambda: list_response(TaskSchema, tasks),
+            "ndjson json": lambda: json_ndjson(rows),
+            "ndjson orjson": lambda: encode_ndjson(EXPORT_COLUMNS, rows),
+        }
+
+        for name, function in variants.items():
+            elapsed = best_of(args.repeat, function)
+            print(f"tasks={size:<6} {name:<15} {elapsed * 1e3:9.3f}ms {elapsed / size * 1e6:7.2f}us/task")
+        print()
+
+
+if __name__ == "__main__":
+    main()
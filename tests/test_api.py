@@ -1,13 +1,33 @@
-from datetime import datetime, timedelta
+import asyncio
+import csv
+import gzip
+import io
+import json
+import re
+import subprocess
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from typing import Dict, Generator, List
 
 import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import SendMessage
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, event, exc, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-
-from app.core.db import Base, get_db
-from app.core.security import create_access_token, get_password_hash
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.db import Base, InstrumentedQueuePool, get_async_db, get_db, instrument_pool, pool_options
+from app.core.security import clear_auth_cache, create_access_token, get_password_hash
+from app.repositories import imports, materialize_occurrences, rebuild_rollup, verify_rollup
+from app.repositories.rollup import split_by_day
+from app.telegram.bot import build_task_list_page
+from app.telegram.delivery import ReminderSender
+from app.telegram.queries import task_page, tasks_by_group
+from app.telegram.scheduler import ReminderScheduler
 
 import sys
 import os
@@ -15,8 +35,14 @@ sys.path.append("/app")
 from main import app
 
 from app.models import (Reminder, Task, TaskCategory, TaskPriority, TaskStatus,
-                        TimeTrack, User, RecurringTask, TelegramUser)
-from app.utils.metrics import record_task_created, record_task_completed
+                        TimeTrack, TimeTrackDaily, User, RecurringTask, TelegramUser)
+from app.models.task import start_of_today
+from app.schemas import Task as TaskSchema
+from app.utils.metrics import (UNMATCHED_ENDPOINT, QueryStats, record_task_created, record_task_completed,
+                               track_queries)
+from app.utils.compression import CompressionMiddleware
+from app.utils.recurrence import occurrences
+from app.utils.serialization import list_response
 
 # Setup test database
 TEST_SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -25,6 +51,14 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the API endpoints, pointing at the same test database.
+# NullPool keeps aiosqlite connections from leaking between TestClient loops.
+TEST_ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+async_engine = create_async_engine(TEST_ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 
 # Override the dependency to use test db
 def override_get_db() -> Generator[Session, None, None]:
@@ -35,13 +69,20 @@ def override_get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 
 @pytest.fixture
 def client() -> Generator:
     # Create the test database and tables
     Base.metadata.create_all(bind=engine)
+    clear_auth_cache()
 
     with TestClient(app) as test_client:
         yield test_client
@@ -101,7 +142,7 @@ def test_tasks(db_session: Session, test_user: User) -> List[Task]:
     db_session.commit()
 
     # Получаем все задачи пользователя
-    tasks = db_session.query(Task).filter(Task.owner_id == test_user.id).all()
+    tasks = db_session.query(Task).filter(Task.owner_id == test_user.id).order_by(Task.id).all()
     return tasks
 
 
@@ -214,6 +255,23 @@ def test_login(client: TestClient, test_user: User):
     assert data["token_type"] == "bearer"
 
 
+def test_login_rejected_when_hash_pool_saturated(
+        client: TestClient, test_user: User, monkeypatch: pytest.MonkeyPatch
+):
+    from app.core import security
+
+    monkeypatch.setattr(
+        security, "_password_jobs",
+        settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE,
+    )
+    response = client.post(
+        "/api/auth/token",
+        data={"username": test_user.username, "password": "password"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
 def test_read_users_me(client: TestClient, user_token_headers: Dict[str, str]):
     response = client.get("/api/auth/me", headers=user_token_headers)
     assert response.status_code == 200
@@ -222,6 +280,30 @@ def test_read_users_me(client: TestClient, user_token_headers: Dict[str, str]):
     assert data["username"] == "testuser"
 
 
+def test_read_users_me_cached(
+        client: TestClient, user_token_headers: Dict[str, str], captured_statements: List
+):
+    assert client.get("/api/auth/me", headers=user_token_headers).status_code == 200
+    assert len(captured_statements) == 1  # user lookup
+
+    assert client.get("/api/auth/me", headers=user_token_headers).status_code == 200
+    assert len(captured_statements) == 1  # served from the auth cache
+
+
+def test_deactivated_user_cache_invalidated(
+        client: TestClient, user_token_headers: Dict[str, str], test_user: User,
+        db_session: Session
+):
+    assert client.get("/api/auth/me", headers=user_token_headers).status_code == 200
+
+    test_user.is_active = False
+    db_session.commit()
+
+    response = client.get("/api/auth/me", headers=user_token_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
 def test_create_task(client: TestClient, user_token_headers: Dict[str, str]):
     response = client.post(
         "/api/tasks/",
@@ -244,6 +326,22 @@ def test_create_task(client: TestClient, user_token_headers: Dict[str, str]):
     assert data["category"] == "personal"
 
 
+def test_create_task_with_offset_timestamp(client: TestClient, user_token_headers: Dict[str, str]):
+    # Stored naive in UTC: the offset is applied, not dropped
+    for due_date in ("2026-10-20T10:00:00+02:00", "2026-10-20T08:00:00Z"):
+        response = client.post(
+            "/api/tasks/",
+            headers=user_token_headers,
+            json={"title": "Offset Task", "due_date": due_date},
+        )
+        assert response.status_code == 200
+        task_id = response.json()["id"]
+        assert response.json()["due_date"] == "2026-10-20T08:00:00"
+
+        response = client.get(f"/api/tasks/{task_id}", headers=user_token_headers)
+        assert response.json()["due_date"] == "2026-10-20T08:00:00"
+
+
 def test_read_tasks(
         client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
 ):
@@ -270,6 +368,115 @@ def test_read_task(
     assert data["description"] == task.description
 
 
+def test_list_response_loads_expired_columns(
+        client: TestClient, db_session: Session, test_tasks: List[Task]
+):
+    # An expired column is loaded, not serialized as its default
+    db_session.expire(test_tasks[0], ["description"])
+    db_session.expire(test_tasks[1])
+    data = json.loads(list_response(TaskSchema, test_tasks).body)
+    assert [task["description"] for task in data] == [task.description for task in test_tasks]
+    assert data[1]["title"] == "Test Task 2"
+def test_conditional_get(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task],
+        test_reminder: Reminder, test_time_track: TimeTrack,
+):
+    task = test_tasks[0]
+    urls = [
+        f"/api/tasks/{task.id}",
+        "/api/tasks/",
+        "/api/tasks/?status=todo&limit=2",
+        f"/api/reminders/tasks/{task.id}",
+        f"/api/time-tracking/tasks/{task.id}/time",
+    ]
+    etags = {}
+    for url in urls:
+        response = client.get(url, headers=user_token_headers)
+        assert response.status_code == 200
+        etags[url] = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+        # Nothing changed: 304 without a body, also for a weak or listed tag.
+        # Revalidating reads neither the task nor the list.
+        for if_none_match in (etags[url], f'W/{etags[url]}', f'"other", {etags[url]}'):
+            clear_auth_cache()
+            with assert_max_queries(3):
+                response = client.get(url, headers={**user_token_headers, "If-None-Match": if_none_match})
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["ETag"] == etags[url]
+            assert "Accept-Encoding" in response.headers["Vary"]
+
+    # Every write moves the ETags of what it touched, and only those
+    client.put(f"/api/tasks/{task.id}", headers=user_token_headers, json={"title": "Changed"})
+    client.put(
+        f"/api/reminders/update/{test_reminder.id}", headers=user_token_headers, json={"is_sent": True},
+    )
+    for url in urls:
+        response = client.get(url, headers={**user_token_headers, "If-None-Match": etags[url]})
+        expected = 304 if "time-tracking" in url else 200
+        assert response.status_code == expected, url
+
+    client.delete(f"/api/time-tracking/time/{test_time_track.id}", headers=user_token_headers)
+    url = f"/api/time-tracking/tasks/{task.id}/time"
+    response = client.get(url, headers={**user_token_headers, "If-None-Match": etags[url]})
+    assert response.status_code == 200
+    assert response.json() == []
+
+    # Deleting a task changes the list, a stale tag on a missing task is a 404
+    etag = client.get("/api/tasks/", headers=user_token_headers).headers["ETag"]
+    client.delete(f"/api/tasks/{test_tasks[1].id}", headers=user_token_headers)
+    response = client.get("/api/tasks/", headers={**user_token_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert test_tasks[1].id not in [item["id"] for item in response.json()]
+    response = client.get(
+        f"/api/tasks/{test_tasks[1].id}", headers={**user_token_headers, "If-None-Match": "*"},
+    )
+    assert response.status_code == 404
+
+
+def test_request_metrics_labelled_by_route_template(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
+):
+    def request_count(endpoint: str, status: str) -> float:
+        return REGISTRY.get_sample_value(
+            "app_request_count_total",
+            {"app_name": "task_manager", "method": "GET", "endpoint": endpoint, "http_status": status},
+        ) or 0
+
+    before = request_count("/api/tasks/{task_id}", "200")
+    unmatched_before = request_count(UNMATCHED_ENDPOINT, "404")
+
+    for task in test_tasks:
+        client.get(f"/api/tasks/{task.id}", headers=user_token_headers)
+    client.get("/no/such/path/12345")
+
+    assert request_count("/api/tasks/{task_id}", "200") == before + len(test_tasks)
+    assert request_count(f"/api/tasks/{test_tasks[0].id}", "200") == 0
+    assert request_count(UNMATCHED_ENDPOINT, "404") == unmatched_before + 1
+
+
+def test_metrics_aggregated_across_worker_processes(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def run(code: str) -> str:
+        return subprocess.run(
+            [sys.executable, "-c", code], env=env, cwd=root, check=True, capture_output=True, text=True
+        ).stdout
+
+    worker = "from app.utils.metrics import record_task_created; record_task_created('work', 'high')"
+    run(worker)
+    run(worker)
+
+    scrape = run(
+        "from prometheus_client import generate_latest\n"
+        "from app.utils.metrics import metrics_registry\n"
+        "print(generate_latest(metrics_registry()).decode())"
+    )
+    assert 'app_task_created_total{category="work",priority="high"} 2.0' in scrape
+
+
 def test_update_task(
         client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
 ):
@@ -340,6 +547,327 @@ def test_filter_tasks_by_category(
         assert task["category"] == "work"
 
 
+def test_read_tasks_cursor_pagination(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
+):
+    for order_by in ("due_date", "updated_at"):
+        seen_ids = []
+        cursor = None
+        while True:
+            params = {"limit": 2, "order_by": order_by}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/tasks/", headers=user_token_headers, params=params)
+            assert response.status_code == 200
+            seen_ids.extend(task["id"] for task in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        # Every task is returned exactly once
+        assert sorted(seen_ids) == sorted(task.id for task in test_tasks)
+        assert len(seen_ids) == len(set(seen_ids))
+
+
+def test_read_tasks_invalid_cursor(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
+):
+    response = client.get(
+        "/api/tasks/?cursor=not-a-cursor",
+        headers=user_token_headers
+    )
+    assert response.status_code == 400
+
+
+def test_sync_tasks(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task], monkeypatch
+):
+    monkeypatch.setattr(settings, "SYNC_SETTLE_SECONDS", 0)
+
+    def sync(since: str = None, limit: int = 500) -> dict:
+        params = {"limit": limit, **({"since": since} if since else {})}
+        response = client.get("/api/tasks/sync", headers=user_token_headers, params=params)
+        assert response.status_code == 200
+        return response.json()
+
+    # Initial sync, paged
+    first = sync(limit=3)
+    assert len(first["tasks"]) == 3 and first["has_more"]
+    second = sync(first["watermark"], limit=3)
+    assert len(second["tasks"]) == 1 and not second["has_more"]
+    assert {t["id"] for t in first["tasks"] + second["tasks"]} == {t.id for t in test_tasks}
+
+    watermark = second["watermark"]
+    unchanged = sync(watermark)
+    assert unchanged["tasks"] == [] and unchanged["deleted"] == [] and not unchanged["has_more"]
+
+    client.put(f"/api/tasks/{test_tasks[0].id}", headers=user_token_headers, json={"title": "Renamed"})
+    client.delete(f"/api/tasks/{test_tasks[1].id}", headers=user_token_headers)
+    client.post("/api/tasks/bulk/delete", headers=user_token_headers, json={"ids": [test_tasks[2].id]})
+
+    changes = sync(watermark)
+    assert [t["title"] for t in changes["tasks"]] == ["Renamed"]
+    assert changes["deleted"] == [test_tasks[1].id, test_tasks[2].id]
+    assert sync(changes["watermark"])["tasks"] == []
+
+    # Changes inside the settle window are sent, but the watermark stays
+    # put so they are sent again next time
+    monkeypatch.setattr(settings, "SYNC_SETTLE_SECONDS", 60)
+    recent = sync(watermark, limit=1)
+    assert recent["watermark"] == watermark and not recent["has_more"]
+    assert len(recent["tasks"]) == 1
+
+    response = client.get("/api/tasks/sync?since=not-a-cursor", headers=user_token_headers)
+    assert response.status_code == 400
+
+
+def test_export(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task],
+        test_time_track: TimeTrack, monkeypatch,
+):
+    # Several cursor chunks per export
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 3)
+
+    response = client.get("/api/tasks/export", headers=user_token_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="tasks.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(task.id for task in test_tasks)
+    assert rows[0]["title"] == test_tasks[0].title
+    assert rows[0]["status"] == test_tasks[0].status.value
+    assert rows[0]["created_at"] == test_tasks[0].created_at.isoformat()
+
+    response = client.get("/api/tasks/export?format=csv", headers=user_token_headers)
+    assert response.status_code == 200
+    table = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in table] == [row["id"] for row in rows]
+    assert [row["priority"] for row in table] == [row["priority"] for row in rows]
+
+    response = client.get("/api/tasks/export?format=csv&gzip=true", headers=user_token_headers)
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"] == 'attachment; filename="tasks.csv.gz"'
+    assert gzip.decompress(response.content).decode() == "\n".join(
+        ",".join(row) for row in [list(table[0])] + [list(row.values()) for row in table]
+    ) + "\n"
+
+    response = client.get("/api/time-tracking/export", headers=user_token_headers)
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.text.splitlines()] == [{
+        "id": test_time_track.id,
+        "task_id": test_time_track.task_id,
+        "start_time": test_time_track.start_time.isoformat(),
+        "end_time": test_time_track.end_time.isoformat(),
+        "duration": test_time_track.duration,
+    }]
+
+    response = client.get("/api/tasks/export?format=xml", headers=user_token_headers)
+    assert response.status_code == 422
+
+
+def test_response_compression(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task], monkeypatch,
+):
+    def compressed(encoding: str) -> float:
+        return REGISTRY.get_sample_value(
+            "app_response_compression_ratio_count", {"encoding": encoding},
+        ) or 0
+
+    plain = client.get("/api/tasks/", headers={**user_token_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    # Below the threshold the body goes out as it is
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", len(plain.content) + 1)
+    response = client.get("/api/tasks/", headers={**user_token_headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 100)
+    for accept_encoding, expected in [
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("gzip, br", "br"),
+        ("zstd, br, gzip", "zstd"),
+        ("*", "zstd"),
+        ("gzip;q=0, deflate", None),
+    ]:
+        before = compressed(expected)
+        response = client.get("/api/tasks/", headers={**user_token_headers, "Accept-Encoding": accept_encoding})
+        assert response.headers.get("content-encoding") == expected, accept_encoding
+        assert response.json() == plain.json()
+        if expected is not None:
+            assert "Accept-Encoding" in response.headers["Vary"]
+            assert int(response.headers["content-length"]) < len(plain.content)
+            assert compressed(expected) == before + 1
+            # Each encoding is a representation of its own, with its own ETag
+            assert response.headers["ETag"] == plain.headers["ETag"][:-1] + f'-{expected}"'
+        else:
+            assert response.headers["ETag"] == plain.headers["ETag"]
+
+    # Revalidating the compressed list: the 304 repeats the client's tag;
+    # another encoding's tag does not match
+    etag = plain.headers["ETag"][:-1] + '-gzip"'
+    for accept_encoding, expected in [("gzip", 304), ("br", 200), ("identity", 200)]:
+        response = client.get(
+            "/api/tasks/",
+            headers={**user_token_headers, "Accept-Encoding": accept_encoding, "If-None-Match": etag},
+        )
+        assert response.status_code == expected, accept_encoding
+    response = client.get(
+        "/api/tasks/", headers={**user_token_headers, "Accept-Encoding": "gzip", "If-None-Match": f"W/{etag}"},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    # Streamed exports are compressed chunk by chunk, gzipped files are not again
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 2)
+    response = client.get("/api/tasks/export", headers={**user_token_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.text.splitlines()) == len(test_tasks)
+
+    response = client.get("/api/tasks/export?gzip=true", headers={**user_token_headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert len(gzip.decompress(response.content).splitlines()) == len(test_tasks)
+
+
+def test_response_compression_keeps_encoded_responses():
+    body = gzip.compress(b"x" * 4096)
+
+    async def encoded_app(scope, receive, send):
+        # Header names as prometheus_client's /metrics app sends them
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"Content-Type", b"text/plain"), (b"Content-Encoding", b"gzip")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    encoded_client = TestClient(CompressionMiddleware(encoded_app, minimum_size=0))
+    response = encoded_client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get_list("content-encoding") == ["gzip"]
+    assert response.content == b"x" * 4096
+
+
+def test_metrics_not_compressed_twice(client: TestClient):
+    response = client.get("/metrics/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers.get_list("content-encoding") == ["gzip"]
+    assert "app_request_count" in response.text
+
+
+def test_import(
+        client: TestClient, user_token_headers: Dict[str, str], db_session: Session,
+        test_tasks: List[Task], monkeypatch,
+):
+    # Several chunks per import
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+
+    def upload(url: str, content: bytes, name: str) -> dict:
+        response = client.post(url, headers=user_token_headers, files={"file": (name, content)})
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    tasks_csv = (
+        "title,description,status,priority,category,due_date\n"
+        "Imported 1,\"Comma, and \"\"quotes\"\"\",done,high,work,2026-01-05T09:00:00\n"
+        "Imported 2,,,,,\n"
+        ",Missing title,todo,low,work,\n"
+        "Imported 3,,bogus,low,work,\n"
+        "Imported 4,,todo,low,work,\n"
+    )
+    result = upload("/api/tasks/import?format=csv", tasks_csv.encode(), "tasks.csv")
+    assert result["imported"] == 3
+    assert result["failed"] == 2
+    assert [error["line"] for error in result["errors"]] == [4, 5]
+    assert result["errors"][0]["error"].startswith("title:")
+    assert result["errors"][1]["error"].startswith("status:")
+
+    imported = db_session.query(Task).filter(Task.title.like("Imported %")).order_by(Task.id).all()
+    assert [task.title for task in imported] == ["Imported 1", "Imported 2", "Imported 4"]
+    assert imported[0].description == 'Comma, and "quotes"'
+    assert imported[0].status == TaskStatus.DONE and imported[0].priority == TaskPriority.HIGH
+    assert imported[1].status == TaskStatus.TODO and imported[1].description is None
+    assert all(task.owner_id == test_tasks[0].owner_id and task.created_at for task in imported)
+
+    # The export reads back in
+    export = client.get("/api/tasks/export?gzip=true", headers=user_token_headers).content
+    result = upload("/api/tasks/import?gzip=true", export, "tasks.ndjson.gz")
+    assert result == {"imported": len(test_tasks) + 3, "failed": 0, "errors": []}
+
+    task = test_tasks[0]
+    tracks = "\n".join([
+        json.dumps({"task_id": task.id, "start_time": "2026-01-05T23:00:00", "end_time": "2026-01-06T01:00:00"}),
+        "not json",
+        json.dumps({"task_id": 999999, "start_time": "2026-01-05T10:00:00"}),
+        json.dumps({"task_id": task.id, "start_time": "2026-01-07T10:00:00"}),
+    ])
+    result = upload("/api/time-tracking/import", tracks.encode(), "time-tracks.ndjson")
+    assert result["imported"] == 2
+    assert [(error["line"], error["error"].split(":")[0]) for error in result["errors"]] == [
+        (2, "Invalid JSON"), (3, "Task not found"),
+    ]
+    stored = db_session.query(TimeTrack).filter(TimeTrack.task_id == task.id).order_by(TimeTrack.id).all()
+    assert [track.duration for track in stored] == [7200, None]
+
+    async def check() -> None:
+        async with TestingAsyncSessionLocal() as db:
+            assert await verify_rollup(db) == []
+
+    asyncio.run(check())
+
+    reminders = f"task_id,reminder_time\n{task.id},2030-01-01T09:00:00\n{task.id},tomorrow\n"
+    result = upload("/api/reminders/import?format=csv", reminders.encode(), "reminders.csv")
+    assert result["imported"] == 1 and result["errors"][0]["line"] == 3
+    assert db_session.query(Reminder).filter(Reminder.task_id == task.id).count() == 1
+
+    result = upload("/api/tasks/import?gzip=true", b"not gzip", "tasks.ndjson.gz")
+    assert result["imported"] == 0
+    assert result["errors"][0]["error"].startswith("Unreadable input")
+
+    # Rows the database rejects are found and reported, the rest go in
+    copy = imports._copy
+
+    async def rejecting_copy(db, model, rows):
+        if any(row["title"].startswith("Rejected") for row in rows):
+            raise exc.IntegrityError("INSERT", {}, Exception("CHECK constraint failed: title"))
+        await copy(db, model, rows)
+
+    monkeypatch.setattr(imports, "_copy", rejecting_copy)
+    titles = ["Batch 1", "Rejected 2", "Batch 3", "Batch 4", "Rejected 5", "x" * 256]
+    tasks_ndjson = "\n".join(json.dumps({"title": title}) for title in titles)
+    result = upload("/api/tasks/import", tasks_ndjson.encode(), "tasks.ndjson")
+    assert result["imported"] == 3
+    assert [(error["line"], error["error"]) for error in result["errors"]] == [
+        (2, "Rejected by the database: CHECK constraint failed: title"),
+        (5, "Rejected by the database: CHECK constraint failed: title"),
+        (6, "title: String should have at most 255 characters"),
+    ]
+    imported = db_session.query(Task).filter(Task.title.like("Batch %")).order_by(Task.id).all()
+    assert [task.title for task in imported] == ["Batch 1", "Batch 3", "Batch 4"]
+
+    # Integers the INTEGER columns can't hold: out of range in the row, or
+    # computed from it, where COPY's record encoder raises OverflowError
+    async def overflowing_copy(db, model, rows):
+        if any((row.get("duration") or 0) > 2**31 - 1 for row in rows):
+            raise OverflowError("value out of int32 range")
+        await copy(db, model, rows)
+
+    monkeypatch.setattr(imports, "_copy", overflowing_copy)
+    tracks = "\n".join(json.dumps(track) for track in [
+        {"task_id": task.id, "start_time": "2026-02-01T10:00:00", "duration": 2**31},
+        {"task_id": 2**40, "start_time": "2026-02-01T10:00:00"},
+        {"task_id": task.id, "start_time": "1900-01-01T00:00:00", "end_time": "2100-01-01T00:00:00"},
+        {"task_id": task.id, "start_time": "2026-02-01T10:00:00", "end_time": "2026-02-01T11:00:00"},
+    ])
+    result = upload("/api/time-tracking/import", tracks.encode(), "time-tracks.ndjson")
+    assert result["imported"] == 1
+    assert [(error["line"], error["error"]) for error in result["errors"]] == [
+        (1, "duration: Input should be less than or equal to 2147483647"),
+        (2, "task_id: Input should be less than or equal to 2147483647"),
+        (3, "Rejected by the database: value out of int32 range"),
+    ]
+
+
 def test_delete_task(
         client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
 ):
@@ -356,6 +884,75 @@ def test_delete_task(
     assert response.status_code == 404
 
 
+def test_bulk_create_tasks(client: TestClient, user_token_headers: Dict[str, str]):
+    response = client.post(
+        "/api/tasks/bulk",
+        headers=user_token_headers,
+        json={
+            "items": [
+                {"title": f"Bulk Task {i}", "priority": "high", "category": "work"}
+                for i in range(3)
+            ]
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status"] for item in data] == ["created"] * 3
+    assert [item["task"]["title"] for item in data] == [f"Bulk Task {i}" for i in range(3)]
+    assert all(item["id"] == item["task"]["id"] for item in data)
+
+
+def test_bulk_create_tasks_limit(client: TestClient, user_token_headers: Dict[str, str]):
+    response = client.post(
+        "/api/tasks/bulk",
+        headers=user_token_headers,
+        json={"items": [{"title": "Too many"}] * (settings.BULK_MAX_ITEMS + 1)},
+    )
+    assert response.status_code == 422
+
+
+def test_bulk_update_tasks(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
+):
+    response = client.patch(
+        "/api/tasks/bulk",
+        headers=user_token_headers,
+        json={
+            "items": [
+                {"id": test_tasks[0].id, "status": "done"},
+                {"id": test_tasks[1].id, "title": "Renamed"},
+                {"id": 999999, "title": "Missing"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status"] for item in data] == ["updated", "updated", "not_found"]
+    assert data[0]["task"]["status"] == "done"
+    assert data[0]["task"]["completed_at"] is not None
+    assert data[1]["task"]["title"] == "Renamed"
+    assert data[1]["task"]["description"] == test_tasks[1].description  # unchanged
+
+
+def test_bulk_delete_tasks(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task],
+        test_time_track: TimeTrack
+):
+    response = client.post(
+        "/api/tasks/bulk/delete",
+        headers=user_token_headers,
+        json={"ids": [test_tasks[0].id, test_tasks[1].id, 999999]},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status"] for item in data] == ["deleted", "deleted", "not_found"]
+
+    response = client.get(f"/api/tasks/{test_tasks[0].id}", headers=user_token_headers)
+    assert response.status_code == 404
+    response = client.get(f"/api/tasks/{test_tasks[2].id}", headers=user_token_headers)
+    assert response.status_code == 200
+
+
 def test_create_time_track(
         client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
 ):
@@ -419,6 +1016,29 @@ def test_stop_time_tracking(
     assert data["duration"] > 0
 
 
+def test_stop_time_tracking_with_duration_keeps_rollup(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
+):
+    task = test_tasks[2]
+    start_time = datetime.utcnow() - timedelta(minutes=30)
+    response = client.post(
+        f"/api/time-tracking/tasks/{task.id}/time",
+        headers=user_token_headers,
+        json={"task_id": task.id, "start_time": start_time.isoformat(), "duration": 600},
+    )
+    assert response.status_code == 200
+    assert response.json()["end_time"] is None
+
+    response = client.post(f"/api/time-tracking/tasks/{task.id}/time/stop", headers=user_token_headers)
+    assert response.status_code == 200
+
+    async def check() -> None:
+        async with TestingAsyncSessionLocal() as db:
+            assert await verify_rollup(db) == []
+
+    asyncio.run(check())
+
+
 def test_get_time_tracks(
         client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task], test_time_track: TimeTrack
 ):
@@ -435,6 +1055,182 @@ def test_get_time_tracks(
     assert data[0]["task_id"] == task.id
 
 
+def test_update_time_track_recalculates_duration(
+        client: TestClient, user_token_headers: Dict[str, str], test_time_track: TimeTrack
+):
+    end_time = test_time_track.start_time + timedelta(minutes=90, seconds=30)
+
+    response = client.put(
+        f"/api/time-tracking/time/{test_time_track.id}",
+        headers=user_token_headers,
+        json={"end_time": end_time.isoformat()},
+    )
+    assert response.status_code == 200
+    assert response.json()["duration"] == 5430
+
+
+def test_delete_time_track(
+        client: TestClient, user_token_headers: Dict[str, str], test_time_track: TimeTrack
+):
+    url = f"/api/time-tracking/time/{test_time_track.id}"
+    assert client.delete(url, headers=user_token_headers).status_code == 204
+    assert client.get(url, headers=user_token_headers).status_code == 404
+
+
+def test_time_report(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
+):
+    work, personal = test_tasks[0], test_tasks[1]
+    for task, start, end in [
+        (work, datetime(2026, 3, 2, 9), datetime(2026, 3, 2, 10)),
+        (personal, datetime(2026, 3, 2, 14), datetime(2026, 3, 2, 14, 30)),
+        (work, datetime(2026, 3, 8, 10), datetime(2026, 3, 8, 12)),
+        (personal, datetime(2026, 3, 9, 8), datetime(2026, 3, 9, 8, 15)),
+        # Still running, and outside the range: both left out
+        (work, datetime(2026, 3, 2, 18), None),
+        (work, datetime(2026, 2, 20, 9), datetime(2026, 2, 20, 9, 10)),
+    ]:
+        response = client.post(
+            f"/api/time-tracking/tasks/{task.id}/time",
+            headers=user_token_headers,
+            json={"start_time": start.isoformat(), "end_time": end and end.isoformat()},
+        )
+        assert response.status_code == 200
+
+    response = client.get(
+        "/api/time-tracking/reports",
+        headers=user_token_headers,
+        params={"date_from": "2026-03-01", "date_to": "2026-03-09", "bins": 4},
+    )
+    assert response.status_code == 200
+    report = response.json()
+
+    assert report["total_seconds"] == 13500
+    assert report["count"] == 4
+    assert report["by_day"] == [
+        {"period": "2026-03-02", "total_seconds": 5400, "count": 2},
+        {"period": "2026-03-08", "total_seconds": 7200, "count": 1},
+        {"period": "2026-03-09", "total_seconds": 900, "count": 1},
+    ]
+    assert report["by_week"] == [
+        {"period": "2026-03-02", "total_seconds": 12600, "count": 3},
+        {"period": "2026-03-09", "total_seconds": 900, "count": 1},
+    ]
+    assert [row["task_id"] for row in report["by_task"]] == [work.id, personal.id]
+    assert report["by_category"] == {
+        "work": {"total_seconds": 10800, "count": 2},
+        "personal": {"total_seconds": 2700, "count": 2},
+    }
+    assert report["by_priority"]["low"] == {"total_seconds": 10800, "count": 2}
+    assert report["percentiles"]["p50"] == 2700
+    assert report["histogram"]["bin_edges"][0] == 900
+    assert report["histogram"]["bin_edges"][-1] == 7200
+    assert sum(report["histogram"]["counts"]) == 4
+
+    response = client.get(
+        "/api/time-tracking/reports",
+        headers=user_token_headers,
+        params={"date_from": "2026-03-10", "date_to": "2026-03-01"},
+    )
+    assert response.status_code == 400
+
+
+def test_split_by_day():
+    assert split_by_day(datetime(2026, 3, 2, 9), 3600) == [(date(2026, 3, 2), 3600)]
+    assert split_by_day(datetime(2026, 3, 2, 23, 30), 2 * 86400) == [
+        (date(2026, 3, 2), 1800),
+        (date(2026, 3, 3), 86400),
+        (date(2026, 3, 4), 84600),
+    ]
+    assert split_by_day(datetime(2026, 3, 2, 23, 59, 59, 500000), 10) == [
+        (date(2026, 3, 2), 0),
+        (date(2026, 3, 3), 10),
+    ]
+
+
+def test_time_track_rollup_follows_writes(
+        client: TestClient, user_token_headers: Dict[str, str], db_session: Session, test_tasks: List[Task]
+):
+    task = test_tasks[0]
+
+    def rollup() -> Dict[date, tuple]:
+        db_session.expire_all()
+        return {
+            row.day: (row.total_seconds, row.track_count)
+            for row in db_session.query(TimeTrackDaily).filter(TimeTrackDaily.task_id == task.id)
+        }
+
+    # 23:00 to 01:30 the next day: split at midnight, counted on the first day
+    response = client.post(
+        f"/api/time-tracking/tasks/{task.id}/time",
+        headers=user_token_headers,
+        json={"start_time": "2026-03-02T23:00:00", "end_time": "2026-03-03T01:30:00"},
+    )
+    track_id = response.json()["id"]
+    assert rollup() == {date(2026, 3, 2): (3600, 1), date(2026, 3, 3): (5400, 0)}
+
+    response = client.put(
+        f"/api/time-tracking/time/{track_id}",
+        headers=user_token_headers,
+        json={"end_time": "2026-03-02T23:45:00"},
+    )
+    assert response.json()["duration"] == 2700
+    assert rollup() == {date(2026, 3, 2): (2700, 1)}
+
+    client.post(f"/api/time-tracking/tasks/{task.id}/time/start", headers=user_token_headers)
+    assert len(rollup()) == 1
+    client.post(f"/api/time-tracking/tasks/{task.id}/time/stop", headers=user_token_headers)
+    today = datetime.utcnow().date()
+    assert rollup()[today][1] == 1
+
+    assert client.delete(f"/api/time-tracking/time/{track_id}", headers=user_token_headers).status_code == 204
+    assert date(2026, 3, 2) not in rollup()
+
+    async def check() -> None:
+        async with TestingAsyncSessionLocal() as db:
+            assert await verify_rollup(db) == []
+
+            # Drift (e.g. tracks written around the API) shows up and is repaired
+            db.add(TimeTrack(task_id=task.id, start_time=datetime(2026, 1, 5, 9), duration=60))
+            await db.commit()
+            assert await verify_rollup(db) == [((task.owner_id, task.id, date(2026, 1, 5)), [60, 1], None)]
+            await rebuild_rollup(db)
+            assert await verify_rollup(db) == []
+
+    asyncio.run(check())
+    assert rollup()[date(2026, 1, 5)] == (60, 1)
+
+
+def test_task_children_owner_scoped(
+        client: TestClient, db_session: Session, test_reminder: Reminder, test_time_track: TimeTrack
+):
+    other_user = User(
+        email="other@example.com", username="otheruser", hashed_password="-", is_active=True
+    )
+    db_session.add(other_user)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(other_user.id)})}"}
+
+    for url in (
+            f"/api/reminders/reminders/{test_reminder.id}",
+            f"/api/time-tracking/time/{test_time_track.id}",
+    ):
+        assert client.get(url, headers=headers).status_code == 403
+
+    assert client.put(
+        f"/api/reminders/update/{test_reminder.id}", headers=headers, json={"is_sent": True}
+    ).status_code == 403
+    assert client.delete(f"/api/reminders/delete/{test_reminder.id}", headers=headers).status_code == 403
+    assert client.delete(
+        f"/api/time-tracking/time/{test_time_track.id}", headers=headers
+    ).status_code == 403
+    assert client.delete("/api/reminders/delete/999999", headers=headers).status_code == 404
+
+    db_session.expire_all()
+    assert db_session.get(Reminder, test_reminder.id).is_sent is False
+    assert db_session.get(TimeTrack, test_time_track.id) is not None
+
+
 def test_create_reminder(
         client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
 ):
@@ -500,6 +1296,342 @@ def test_delete_reminder(
     assert response.status_code == 204
 
 
+def test_reminder_scheduler_catches_up_and_fires_on_time(
+        client: TestClient, db_session: Session, test_tasks: List[Task]
+):
+    missed = Reminder(
+        task_id=test_tasks[0].id,
+        reminder_time=datetime.utcnow() - timedelta(hours=2),
+        is_sent=False,
+    )
+    upcoming = Reminder(
+        task_id=test_tasks[1].id,
+        reminder_time=datetime.utcnow() + timedelta(seconds=0.5),
+        is_sent=False,
+    )
+    db_session.add_all([missed, upcoming])
+    db_session.commit()
+
+    delivered = []
+
+    async def deliver(reminder_ids):
+        delivered.append((datetime.utcnow(), reminder_ids))
+
+    async def run_scheduler():
+        scheduler = ReminderScheduler(
+            deliver=deliver,
+            session_factory=TestingAsyncSessionLocal,
+            listen_dsn=None,
+        )
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(1.5)
+        task.cancel()
+
+    asyncio.run(run_scheduler())
+
+    assert [ids for _, ids in delivered] == [[missed.id], [upcoming.id]]
+    assert delivered[1][0] >= upcoming.reminder_time
+
+
+def test_reminder_scheduler_retries_failed_deliveries(
+        client: TestClient, db_session: Session, test_tasks: List[Task]
+):
+    failing, flaky = [
+        Reminder(task_id=task.id, reminder_time=datetime.utcnow() - timedelta(seconds=1), is_sent=False)
+        for task in test_tasks[:2]
+    ]
+    db_session.add_all([failing, flaky])
+    db_session.commit()
+
+    delivered = []
+
+    async def deliver(reminder_ids):
+        delivered.append(sorted(reminder_ids))
+        # flaky fails once, failing every time
+        return [reminder_id for reminder_id in reminder_ids if reminder_id == failing.id or len(delivered) == 1]
+
+    async def run_scheduler():
+        scheduler = ReminderScheduler(
+            deliver=deliver,
+            session_factory=TestingAsyncSessionLocal,
+            listen_dsn=None,
+            retry_delay=timedelta(seconds=0.1),
+            max_attempts=3,
+        )
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(1)
+        task.cancel()
+
+    asyncio.run(run_scheduler())
+
+    # Retried after 0.1s, then 0.2s, then given up on
+    both = sorted([failing.id, flaky.id])
+    assert delivered == [both, both, [failing.id]]
+
+
+def test_reminder_scheduler_rescan_looks_back_one_window(
+        client: TestClient, db_session: Session, test_tasks: List[Task]
+):
+    delivered = []
+
+    async def deliver(reminder_ids):
+        delivered.extend(reminder_ids)
+
+    async def run_scheduler():
+        scheduler = ReminderScheduler(
+            deliver=deliver,
+            session_factory=TestingAsyncSessionLocal,
+            listen_dsn=None,
+            poll_interval=0.1,
+        )
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.2)
+
+        # Written behind the scheduler's back: found by the next rescan if
+        # due within the last lookahead window
+        reminders = [
+            Reminder(task_id=test_tasks[0].id, reminder_time=datetime.utcnow() - timedelta(minutes=10)),
+            Reminder(task_id=test_tasks[1].id, reminder_time=datetime.utcnow() - timedelta(hours=2)),
+        ]
+        db_session.add_all(reminders)
+        db_session.commit()
+        await asyncio.sleep(0.5)
+        task.cancel()
+        return [reminder.id for reminder in reminders]
+
+    recent_id, _ = asyncio.run(run_scheduler())
+
+    assert delivered == [recent_id]
+
+
+def test_reminder_scheduler_skips_undeliverable_reminders(
+        client: TestClient, db_session: Session, test_tasks: List[Task]
+):
+    due = datetime.utcnow() - timedelta(minutes=1)
+    undeliverable = Reminder(task_id=test_tasks[0].id, reminder_time=due, delivery_error="No active Telegram chat")
+    deliverable = Reminder(task_id=test_tasks[1].id, reminder_time=due)
+    db_session.add_all([undeliverable, deliverable])
+    db_session.commit()
+
+    delivered = []
+
+    async def deliver(reminder_ids):
+        delivered.extend(reminder_ids)
+
+    async def run_scheduler():
+        scheduler = ReminderScheduler(
+            deliver=deliver,
+            session_factory=TestingAsyncSessionLocal,
+            listen_dsn=None,
+            poll_interval=0.1,
+        )
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.5)
+        task.cancel()
+
+    asyncio.run(run_scheduler())
+
+    # Neither the start-up catch-up nor the rescans hand it over
+    assert delivered == [deliverable.id]
+
+
+def test_reminder_sender_batches_and_retries_after_flood_control(
+        client: TestClient,
+        db_session: Session,
+        test_tasks: List[Task],
+        test_telegram_user: TelegramUser,
+        captured_statements: List,
+):
+    reminders = [
+        Reminder(task_id=task.id, reminder_time=datetime.utcnow(), is_sent=False)
+        for task in test_tasks
+    ]
+    db_session.add_all(reminders)
+    db_session.commit()
+
+    class FakeBot:
+        def __init__(self):
+            self.sent = []
+            self.flooded = False
+
+        async def send_message(self, chat_id, text, parse_mode=None):
+            if not self.flooded:
+                self.flooded = True
+                raise TelegramRetryAfter(
+                    method=SendMessage(chat_id=chat_id, text=text),
+                    message="Flood control exceeded",
+                    retry_after=0,
+                )
+            self.sent.append((chat_id, text))
+
+    bot = FakeBot()
+    sender = ReminderSender(
+        bot,
+        session_factory=TestingAsyncSessionLocal,
+        batch_size=2,
+        chat_rate=1000,
+    )
+
+    asyncio.run(sender.deliver([reminder.id for reminder in reminders]))
+
+    assert len(bot.sent) == len(reminders)
+    assert all(chat_id == test_telegram_user.chat_id for chat_id, _ in bot.sent)
+    assert "Test Task 1" in bot.sent[0][1]
+
+    # One joined SELECT and one bulk UPDATE per batch of 2
+    batches = (len(reminders) + 1) // 2
+    verbs = [statement.split()[0] for statement, _ in captured_statements]
+    assert verbs.count("SELECT") == batches
+    assert verbs.count("UPDATE") == batches
+
+    db_session.expire_all()
+    assert all(reminder.is_sent for reminder in db_session.query(Reminder).all())
+
+
+def test_reminder_sender_marks_undeliverable_and_reports_failures(
+        client: TestClient,
+        db_session: Session,
+        user_token_headers: Dict[str, str],
+        test_tasks: List[Task],
+        test_telegram_user: TelegramUser,
+):
+    other = User(email="other@example.com", username="other", hashed_password="-", is_active=True)
+    db_session.add(other)
+    db_session.commit()
+    other_task = Task(title="No chat", owner_id=other.id)
+    db_session.add(other_task)
+    db_session.commit()
+
+    now = datetime.utcnow()
+    blocked, flaky, no_chat = [
+        Reminder(task_id=task.id, reminder_time=now, is_sent=False)
+        for task in (test_tasks[0], test_tasks[1], other_task)
+    ]
+    db_session.add_all([blocked, flaky, no_chat])
+    db_session.commit()
+
+    class FakeBot:
+        async def send_message(self, chat_id, text, parse_mode=None):
+            if "Test Task 1" in text:
+                raise TelegramBadRequest(
+                    method=SendMessage(chat_id=chat_id, text=text), message="Bad Request: chat not found",
+                )
+            raise TelegramNetworkError(method=SendMessage(chat_id=chat_id, text=text), message="Timeout")
+
+    sender = ReminderSender(FakeBot(), session_factory=TestingAsyncSessionLocal, chat_rate=1000)
+    failed = asyncio.run(sender.deliver([blocked.id, flaky.id, no_chat.id]))
+
+    # Only the network error is the caller's to retry
+    assert failed == [flaky.id]
+    db_session.expire_all()
+    assert db_session.get(Reminder, blocked.id).delivery_error == "Bad Request: chat not found"
+    assert db_session.get(Reminder, no_chat.id).delivery_error == "No active Telegram chat"
+    assert db_session.get(Reminder, flaky.id).delivery_error is None
+    assert not any(reminder.is_sent for reminder in db_session.query(Reminder).all())
+
+    # Not loaded again, until moved
+    assert asyncio.run(sender.deliver([blocked.id, no_chat.id])) == []
+    response = client.put(
+        f"/api/reminders/update/{blocked.id}", headers=user_token_headers,
+        json={"reminder_time": (now + timedelta(hours=1)).isoformat()},
+    )
+    assert response.json()["delivery_error"] is None
+
+
+def test_reminder_sender_handles_reminders_of_deleted_tasks(
+        client: TestClient,
+        db_session: Session,
+        user_token_headers: Dict[str, str],
+        test_tasks: List[Task],
+        test_telegram_user: TelegramUser,
+):
+    orphaned, kept = [
+        Reminder(task_id=task.id, reminder_time=datetime.utcnow(), is_sent=False)
+        for task in test_tasks[:2]
+    ]
+    db_session.add_all([orphaned, kept])
+    db_session.commit()
+    client.delete(f"/api/tasks/{test_tasks[0].id}", headers=user_token_headers)
+
+    class FakeBot:
+        def __init__(self):
+            self.sent = []
+
+        async def send_message(self, chat_id, text, parse_mode=None):
+            self.sent.append(text)
+
+    bot = FakeBot()
+    sender = ReminderSender(bot, session_factory=TestingAsyncSessionLocal, chat_rate=1000)
+    assert asyncio.run(sender.deliver([orphaned.id, kept.id])) == []
+
+    assert len(bot.sent) == 1
+    db_session.expire_all()
+    assert db_session.get(Reminder, orphaned.id).delivery_error == "Task deleted"
+    assert db_session.get(Reminder, kept.id).is_sent
+
+
+def test_tasks_by_group_single_query(
+        client: TestClient, db_session: Session, test_user: User, test_tasks: List[Task]
+):
+    db_session.add_all([
+        Task(title=f"Extra Task {i}", status=TaskStatus.TODO, owner_id=test_user.id)
+        for i in range(6)
+    ])
+    db_session.commit()
+    user_id = test_user.id
+
+    statements = []
+    capture = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        grouped = tasks_by_group(db_session, user_id, Task.status, limit=5)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert len(statements) == 1
+    assert grouped["todo"] == (
+        ["Test Task 1", "Extra Task 0", "Extra Task 1", "Extra Task 2", "Extra Task 3"], 7
+    )
+    assert grouped["done"] == (["Test Task 3"], 1)
+    assert set(grouped) == {"todo", "in_progress", "done", "canceled"}
+
+
+def test_task_list_pages(
+        client: TestClient, db_session: Session, test_user: User, test_tasks: List[Task]
+):
+    db_session.add_all([Task(title=f"Extra Task {i}", owner_id=test_user.id) for i in range(8)])
+    db_session.commit()
+    user_id = test_user.id
+
+    statements = []
+    capture = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        tasks, total = task_page(db_session, user_id, offset=0, limit=10)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert len(statements) == 1
+    assert total == 12
+    assert [task.title for task in tasks[:4]] == [f"Test Task {i}" for i in range(1, 5)]
+
+    text, markup = build_task_list_page(db_session, test_user, "tasks", 0)
+    assert "Showing 1-10 of 12 tasks." in text
+    assert [button.callback_data for button in markup.inline_keyboard[0]] == ["tasks:1"]
+
+    text, markup = build_task_list_page(db_session, test_user, "tasks", 1)
+    assert "Showing 11-12 of 12 tasks." in text
+    assert [button.callback_data for button in markup.inline_keyboard[0]] == ["tasks:0"]
+
+    # Past the last page the windowed count is empty; fall back to the last page
+    text, _ = build_task_list_page(db_session, test_user, "tasks", 5)
+    assert "Showing 11-12 of 12 tasks." in text
+
+    text, markup = build_task_list_page(db_session, test_user, "week", 0)
+    assert text.count("Test Task") == 4
+    assert markup is None
+
+
 def test_create_recurring_task(
         client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task]
 ):
@@ -561,6 +1693,95 @@ def test_delete_recurring_task(
     assert response.status_code == 204
 
 
+@pytest.mark.parametrize("rule, since, until, expected", [
+    # Every other day; expansion starts at `since`, not at start
+    (("daily", 2, datetime(2026, 1, 1, 9), None, None), datetime(2026, 3, 1), datetime(2026, 3, 6),
+     [datetime(2026, 3, 2, 9), datetime(2026, 3, 4, 9)]),
+    # Weekdays only, up to an inclusive end
+    (("daily", 1, datetime(2026, 1, 2, 9), datetime(2026, 1, 6, 9), "MO,TU,WE,TH,FR"),
+     datetime(2026, 1, 1), datetime(2026, 2, 1),
+     [datetime(2026, 1, 2, 9), datetime(2026, 1, 5, 9), datetime(2026, 1, 6, 9)]),
+    # Every second week on Monday and Friday, never before start (a Wednesday)
+    (("weekly", 2, datetime(2026, 1, 7, 18), None, "MO,FR"), datetime(2026, 1, 1), datetime(2026, 1, 27),
+     [datetime(2026, 1, 9, 18), datetime(2026, 1, 19, 18), datetime(2026, 1, 23, 18)]),
+    # Start's weekday by default
+    (("weekly", 1, datetime(2026, 1, 7, 18), None, None), datetime(2026, 1, 1), datetime(2026, 1, 22),
+     [datetime(2026, 1, 7, 18), datetime(2026, 1, 14, 18), datetime(2026, 1, 21, 18)]),
+    # The 31st: months without one are skipped
+    (("monthly", 1, datetime(2026, 1, 31, 8), None, None), datetime(2026, 1, 1), datetime(2026, 6, 1),
+     [datetime(2026, 1, 31, 8), datetime(2026, 3, 31, 8), datetime(2026, 5, 31, 8)]),
+    # Every third month, on every Sunday of it
+    (("monthly", 3, datetime(2025, 11, 1, 8), None, "SU"), datetime(2026, 2, 1), datetime(2026, 3, 1),
+     [datetime(2026, 2, 1, 8), datetime(2026, 2, 8, 8), datetime(2026, 2, 15, 8), datetime(2026, 2, 22, 8)]),
+    (("yearly", 1, datetime(2026, 1, 1), None, None), datetime(2026, 1, 1), datetime(2027, 1, 1), []),
+])
+def test_recurrence_rules(rule, since: datetime, until: datetime, expected: List[datetime]):
+    frequency, interval, start, end, by_weekday = rule
+    assert list(occurrences(frequency, interval, start, since, until, end, by_weekday)) == expected
+
+
+def test_materialize_recurring_tasks(
+        client: TestClient, user_token_headers: Dict[str, str], db_session: Session,
+        test_tasks: List[Task], monkeypatch,
+):
+    monkeypatch.setattr(settings, "RECURRENCE_HORIZON_DAYS", 7)
+    task = test_tasks[1]
+    today = start_of_today()
+    start = today + timedelta(hours=9)
+
+    def occurrence_days() -> List[int]:
+        db_session.expire_all()
+        tasks = db_session.query(Task).filter(Task.recurring_task_id.isnot(None)).order_by(Task.due_date).all()
+        assert all(item.title == task.title and item.owner_id == task.owner_id for item in tasks)
+        return [(item.due_date - start).days for item in tasks]
+
+    for payload in ({"frequency": "yearly"}, {"frequency": "weekly", "by_weekday": "MO,XX"}):
+        response = client.post(
+            f"/api/tasks/{task.id}/recurring", headers=user_token_headers,
+            json={"start_date": start.isoformat(), **payload},
+        )
+        assert response.status_code == 422
+
+    # Up to the horizon as soon as the series is created
+    response = client.post(
+        f"/api/tasks/{task.id}/recurring", headers=user_token_headers,
+        json={"frequency": "daily", "start_date": start.isoformat()},
+    )
+    assert response.status_code == 200
+    series_id = response.json()["id"]
+    assert response.json()["materialized_until"] == (today + timedelta(days=7)).isoformat()
+    assert occurrence_days() == [0, 1, 2, 3, 4, 5, 6]
+
+    async def materialize(now: datetime) -> int:
+        async with TestingAsyncSessionLocal() as db:
+            return await materialize_occurrences(db, now=now)
+
+    # Nothing to do until the horizon moves, and a lost watermark writes nothing twice
+    assert asyncio.run(materialize(datetime.utcnow())) == 0
+    db_session.query(RecurringTask).filter(RecurringTask.id == series_id).update({"materialized_until": today})
+    db_session.commit()
+    assert asyncio.run(materialize(datetime.utcnow())) == 0
+    assert asyncio.run(materialize(today + timedelta(days=3))) == 3
+    assert occurrence_days() == list(range(10))
+
+    def occurrence_id(day: int) -> int:
+        return db_session.query(Task.id).filter(
+            Task.recurring_task_id == series_id, Task.due_date == start + timedelta(days=day),
+        ).scalar()
+
+    # A new rule keeps the occurrences it shares with the old one
+    kept = occurrence_id(2)
+    response = client.put(f"/api/tasks/{task.id}/recurring", headers=user_token_headers, json={"interval": 2})
+    assert response.status_code == 200
+    assert occurrence_days() == [0, 2, 4, 6, 8]
+    assert occurrence_id(2) == kept
+
+    # Deleting the series drops the occurrences still ahead and to do
+    client.put(f"/api/tasks/{occurrence_id(4)}", headers=user_token_headers, json={"status": "in_progress"})
+    assert client.delete(f"/api/tasks/{task.id}/recurring", headers=user_token_headers).status_code == 204
+    assert [day for day in occurrence_days() if day > 0] == [4]
+
+
 def test_connect_telegram(
         client: TestClient, user_token_headers: Dict[str, str], test_user: User
 ):
@@ -616,4 +1837,247 @@ def test_delete_telegram_connection(
         "/api/telegram/connection",
         headers=user_token_headers,
     )
-    assert response.status_code == 204
\ No newline at end of file
+    assert response.status_code == 204
+
+
+@pytest.fixture
+def captured_statements() -> Generator[List, None, None]:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+def explain(statement: str, parameters) -> List[str]:
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+def assert_uses_index(statement: str, parameters) -> None:
+    plan = explain(statement, parameters)
+    full_scans = [step for step in plan if re.fullmatch(r"SCAN \w+", step)]
+    assert not full_scans, f"{statement!r} does a full table scan: {plan}"
+
+
+def test_pool_options_per_process_type(monkeypatch):
+    monkeypatch.setattr(settings, "PROCESS_TYPE", "bot")
+    assert pool_options()["pool_size"] == settings.BOT_DB_POOL_SIZE
+    assert pool_options()["max_overflow"] == settings.BOT_DB_MAX_OVERFLOW
+
+    monkeypatch.setattr(settings, "PROCESS_TYPE", "api")
+    assert pool_options()["pool_size"] == settings.API_DB_POOL_SIZE
+    assert pool_options()["max_overflow"] == settings.API_DB_MAX_OVERFLOW
+
+
+@pytest.mark.parametrize("mode, expected_pings", [("always", 1), ("idle", 0), ("never", 0)])
+def test_pool_pre_ping_modes(monkeypatch, mode: str, expected_pings: int):
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", mode)
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING_IDLE_SECONDS", 3600)
+    pool_engine = create_engine(
+        TEST_SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0
+    )
+    instrument_pool(pool_engine)
+
+    pings = []
+    monkeypatch.setattr(pool_engine.dialect, "do_ping", lambda dbapi_connection: pings.append(1))
+
+    # The first checkout opens a new connection, the second reuses it
+    pool_engine.connect().close()
+    pool_engine.connect().close()
+    assert len(pings) == expected_pings
+    pool_engine.dispose()
+
+
+def test_pool_telemetry_pre_ping_failure_and_timeout(monkeypatch):
+    def sample(name: str) -> float:
+        return REGISTRY.get_sample_value(name, {"pool": "sync"}) or 0
+
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", "always")
+    pool_engine = create_engine(
+        TEST_SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0,
+        pool_timeout=0.05,
+    )
+    instrument_pool(pool_engine)
+    opened = []
+    event.listen(pool_engine, "connect", lambda dbapi_connection, record: opened.append(dbapi_connection))
+    pool_engine.connect().close()
+
+    # The pooled connection is dead, its replacement is fine
+    dead = list(opened)
+
+    def ping(dbapi_connection):
+        if dbapi_connection in dead:
+            raise RuntimeError("server closed the connection unexpectedly")
+
+    failures_before = sample("app_db_pool_pre_ping_failures_total")
+    timeouts_before = sample("app_db_pool_timeouts_total")
+    monkeypatch.setattr(pool_engine.dialect, "do_ping", ping)
+
+    # The dead connection is replaced transparently
+    connection = pool_engine.connect()
+    assert sample("app_db_pool_pre_ping_failures_total") == failures_before + 1
+    assert sample("app_db_pool_checked_out") == 1
+
+    with pytest.raises(exc.TimeoutError):
+        pool_engine.connect()
+    assert sample("app_db_pool_timeouts_total") == timeouts_before + 1
+
+    connection.close()
+    pool_engine.dispose()
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Generator[QueryStats, None, None]:
+    """Fail if the code in the block runs more than `limit` SQL statements."""
+    with track_queries() as stats:
+        yield stats
+    assert stats.statements <= limit, f"{stats.statements} SQL statements, expected at most {limit}"
+
+
+def test_endpoint_query_budgets(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task],
+        test_time_track: TimeTrack, test_reminder: Reminder,
+):
+    task = test_tasks[0]
+    # Every budget includes the user lookup of get_current_user; lists also
+    # read their collection version for the ETag
+    budgets = [
+        (f"/api/tasks/{task.id}", 2),
+        ("/api/tasks/", 3),
+        (f"/api/reminders/reminders/{test_reminder.id}", 2),
+        (f"/api/time-tracking/time/{test_time_track.id}", 2),
+    ]
+    for url, limit in budgets:
+        clear_auth_cache()
+        with assert_max_queries(limit):
+            assert client.get(url, headers=user_token_headers).status_code == 200
+
+    # Owner-scoped writes: one UPDATE/DELETE ... RETURNING each, plus the
+    # collection version bump. Time track updates also lock the old row and
+    # adjust the daily rollup (upsert, plus a cleanup DELETE when a day shrinks).
+    clear_auth_cache()
+    with assert_max_queries(6):
+        response = client.put(
+            f"/api/time-tracking/time/{test_time_track.id}",
+            headers=user_token_headers,
+            json={"end_time": datetime.utcnow().isoformat()},
+        )
+        assert response.status_code == 200
+
+    clear_auth_cache()
+    with assert_max_queries(3):
+        response = client.delete(f"/api/reminders/delete/{test_reminder.id}", headers=user_token_headers)
+        assert response.status_code == 204
+
+
+def test_writes_do_not_refresh(client: TestClient, user_token_headers: Dict[str, str]):
+    # The INSERT returns the generated id and defaults; no SELECT follows it,
+    # only the collection version bump
+    clear_auth_cache()
+    with assert_max_queries(3):
+        response = client.post("/api/tasks/", headers=user_token_headers, json={"title": "No refresh"})
+    assert response.status_code == 200
+    created = response.json()
+    assert created["id"]
+    assert created["status"] == "todo"
+    assert created["priority"] == "medium"
+    assert created["created_at"] and created["updated_at"]
+
+    clear_auth_cache()
+    with assert_max_queries(4):
+        response = client.put(
+            f"/api/tasks/{created['id']}", headers=user_token_headers, json={"status": "done"},
+        )
+    assert response.status_code == 200
+    updated = response.json()
+    assert updated["status"] == "done"
+    assert updated["completed_at"] is not None
+    assert updated["updated_at"] >= created["updated_at"]
+
+    clear_auth_cache()
+    with assert_max_queries(5):
+        response = client.post(f"/api/time-tracking/tasks/{created['id']}/time/start", headers=user_token_headers)
+    assert response.status_code == 200
+    assert response.json()["id"]
+
+
+def test_sql_metrics_and_slow_query_log(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task],
+        monkeypatch, caplog,
+):
+    labels = {"method": "GET", "endpoint": "/api/tasks/{task_id}"}
+    requests_before = REGISTRY.get_sample_value("app_db_statements_per_request_count", labels) or 0
+    statements_before = REGISTRY.get_sample_value("app_db_statements_per_request_sum", labels) or 0
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 1e-6)
+    with caplog.at_level("WARNING", logger="app.core.db"):
+        client.get(f"/api/tasks/{test_tasks[0].id}", headers=user_token_headers)
+
+    assert REGISTRY.get_sample_value("app_db_statements_per_request_count", labels) == requests_before + 1
+    assert REGISTRY.get_sample_value("app_db_statements_per_request_sum", labels) == statements_before + 2
+    assert any(
+        "Slow query" in record.message and "FROM tasks" in record.message and "parameters=" in record.message
+        for record in caplog.records
+    )
+
+
+def test_endpoint_queries_use_indexes(
+        client: TestClient, user_token_headers: Dict[str, str], test_tasks: List[Task],
+        test_time_track: TimeTrack, test_reminder: Reminder, test_recurring_task: RecurringTask,
+        test_telegram_user: TelegramUser, captured_statements: List,
+):
+    task = test_tasks[0]
+    requests = [
+        ("post", "/api/auth/token", {"data": {"username": "testuser", "password": "password"}}),
+        ("get", "/api/auth/me", {}),
+        ("get", "/api/tasks/", {}),
+        ("get", "/api/tasks/?status=todo", {}),
+        ("get", "/api/tasks/?priority=high", {}),
+        ("get", "/api/tasks/?category=work", {}),
+        ("get", "/api/tasks/?order_by=updated_at&limit=1", {}),
+        ("get", f"/api/tasks/{task.id}", {}),
+        ("put", f"/api/tasks/{task.id}", {"json": {"title": "Indexed"}}),
+        ("get", f"/api/tasks/{task.id}/recurring", {}),
+        ("get", f"/api/reminders/tasks/{task.id}", {}),
+        ("get", f"/api/reminders/reminders/{test_reminder.id}", {}),
+        ("get", f"/api/time-tracking/tasks/{task.id}/time", {}),
+        ("get", f"/api/time-tracking/time/{test_time_track.id}", {}),
+        ("post", f"/api/time-tracking/tasks/{test_tasks[1].id}/time/start", {}),
+        ("post", f"/api/time-tracking/tasks/{test_tasks[1].id}/time/stop", {}),
+        ("get", "/api/telegram/connection", {}),
+        ("delete", f"/api/tasks/{test_tasks[3].id}", {}),
+    ]
+    for method, url, kwargs in requests:
+        response = getattr(client, method)(url, headers=user_token_headers, **kwargs)
+        assert response.status_code < 300, (url, response.text)
+
+    checked = 0
+    for statement, parameters in captured_statements:
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            assert_uses_index(statement, parameters)
+            checked += 1
+    assert checked >= len(requests)
+
+
+def test_reminder_scan_uses_partial_index(client: TestClient, test_reminder: Reminder):
+    now = datetime.utcnow()
+    # The scheduler's scan (ReminderScheduler._fetch)
+    query = select(Reminder).where(
+        Reminder.is_sent == False,
+        Reminder.delivery_error.is_(None),
+        Reminder.reminder_time <= now,
+        Reminder.reminder_time >= now - timedelta(minutes=5),
+    )
+    compiled = query.compile(engine)
+    plan = explain(str(compiled), tuple(compiled.params[name] for name in compiled.positiontup))
+    assert any("ix_reminders_unsent_reminder_time" in step for step in plan), plan